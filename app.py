@@ -1,37 +1,550 @@
 import os
+import csv
+import hashlib
+import hmac
+import io
 import logging
-from flask import Flask, render_template, request, jsonify, session
+import time
+from flask import Flask, render_template, request, jsonify, session, stream_with_context, g, abort
+from columnar_dataset import DatasetFormatError
+from conversation_store import NEW_CONVERSATION, Conversation, conversations, new_conversation_id
+from crop_planner import plan_rotation
 from crop_recommendation import (
-    find_crop_recommendations, 
+    find_crop_records,
     format_recommendations_for_chat,
     format_recommendations_for_chart,
     get_climate_remedial_measures,
-    get_options
+    get_options,
+    facet_counts,
+    iter_crop_recommendations,
+    measure_text,
+    current_snapshot,
+    dataset_fingerprint,
+    dataset_version,
+    latest_snapshot,
+    pin_snapshot,
+    unpin_snapshot,
+    reload_in_background,
+    watch_dataset,
+    RecommendationList
+)
+from dataset_registry import UnknownRegion, registry as region_registry
+from fuzzy_lookup import AmbiguousValue, resolve
+from logging_config import configure_logging, new_request_id, request_id
+from message_parser import parse_message
+from metrics import current_endpoint, observe_request, profiler, registry, timed
+from response_cache import LRUCache
+from shared_cache import SharedCache, open_store
+from web_assets import (
+    STATIC_MAX_AGE,
+    StaticAssets,
+    choose_encoding,
+    compress_cached,
+    compressible,
+    encoded_etag
 )
 
 # Configure logging
-logging.basicConfig(level=logging.DEBUG)
+configure_logging()
 logger = logging.getLogger(__name__)
 
 # Create the app
 app = Flask(__name__)
 app.secret_key = os.environ.get("SESSION_SECRET", "default-secret-key")
 
+# Rendered responses keyed on the dataset version and the normalized filters;
+# entries of replaced dataset versions are never hit again and age out
+response_cache = LRUCache(maxsize=int(os.environ.get("FARMBOT_RESPONSE_CACHE_SIZE", "1024")))
+
+# Store shared by the workers behind the response cache, e.g. sqlite:///tmp/farmbot-cache.db;
+# unset keeps every worker's results to itself
+SHARED_CACHE_URL = os.environ.get("FARMBOT_SHARED_CACHE", "")
+
+shared_cache = None
+if SHARED_CACHE_URL:
+    shared_cache = SharedCache(
+        open_store(SHARED_CACHE_URL),
+        ttl=int(os.environ.get("FARMBOT_SHARED_CACHE_TTL", "300")),
+        lock_timeout=int(os.environ.get("FARMBOT_SHARED_CACHE_LOCK_TIMEOUT", "10")),
+        prefix=os.environ.get("FARMBOT_SHARED_CACHE_PREFIX", "farmbot")
+    )
+    # Chat conversations carry over whichever worker serves their next message
+    conversations.share(shared_cache.store, shared_cache.prefix)
+
+# Token required in the X-Admin-Token header of the admin endpoints; unset disables them
+ADMIN_TOKEN = os.environ.get("FARMBOT_ADMIN_TOKEN")
+
+# Seconds between checks of the dataset file for changes; 0 disables the watcher
+DATASET_WATCH_INTERVAL = float(os.environ.get("FARMBOT_DATASET_WATCH_INTERVAL", "0"))
+
+if DATASET_WATCH_INTERVAL > 0:
+    watch_dataset(DATASET_WATCH_INTERVAL)
+
+@app.before_request
+def assign_request_id():
+    """Tag the request's log records with its X-Request-ID, or a new ID."""
+    g.request_id = new_request_id(request.headers.get('X-Request-ID'))
+    g.request_id_token = request_id.set(g.request_id)
+
+@app.after_request
+def add_request_id_header(response):
+    if 'request_id' in g:
+        response.headers['X-Request-ID'] = g.request_id
+    return response
+
+@app.teardown_request
+def reset_request_id(exc):
+    token = g.pop('request_id_token', None)
+    if token is not None:
+        request_id.reset(token)
+
+def request_region():
+    """Region named by the 'region' query argument or the 'region' field of a JSON body."""
+    region = request.args.get('region')
+    if region is None and request.is_json:
+        data = request.get_json(silent=True)
+        if isinstance(data, dict):
+            region = data.get('region')
+    return region or None
+
+@app.before_request
+def pin_dataset_snapshot():
+    """
+    Serve the whole request from the dataset snapshot current when it arrived,
+    or from the snapshot of the region it names, loaded on first use.
+    """
+    region = request_region()
+    try:
+        snapshot = region_registry.get(region) if region is not None else None
+    except UnknownRegion:
+        return jsonify({'status': 'error', 'message': f"Unknown region: {region}"}), 404
+    except DatasetFormatError as e:
+        logger.error("Error loading region %s: %s", region, e)
+        return jsonify({'status': 'error', 'message': f"Region unavailable: {region}"}), 500
+    
+    g.snapshot_token = pin_snapshot(snapshot)
+
+@app.teardown_request
+def unpin_dataset_snapshot(exc):
+    token = g.pop('snapshot_token', None)
+    if token is not None:
+        unpin_snapshot(token)
+
+@app.before_request
+def start_request_timer():
+    """Label the request's stage timings with its endpoint and start its timer."""
+    g.request_start = time.perf_counter()
+    g.endpoint_token = current_endpoint.set(request.endpoint or 'not_found')
+
+@app.teardown_request
+def record_request_duration(exc):
+    start = g.pop('request_start', None)
+    if start is not None:
+        observe_request(request.endpoint or 'not_found', time.perf_counter() - start)
+    token = g.pop('endpoint_token', None)
+    if token is not None:
+        current_endpoint.reset(token)
+
+static_assets = StaticAssets(app.static_folder, reload=lambda: app.debug)
+
+@app.url_defaults
+def hashed_static_url(endpoint, values):
+    """Add the content hash of static files to their URLs (?v=<hash>)."""
+    if endpoint == 'static' and 'filename' in values:
+        digest = static_assets.digest(values['filename'])
+        if digest:
+            values['v'] = digest
+
+def serve_static(filename):
+    """
+    Serve a static file from memory, compressed when the client accepts it.
+    Requests for the file's current content hash may be cached for a year.
+    """
+    asset = static_assets.get(filename)
+    if asset is None:
+        abort(404)
+    
+    encoding = None
+    if compressible(asset.mimetype, len(asset.body)):
+        encoding = choose_encoding(request.headers.get('Accept-Encoding'))
+    
+    response = app.response_class(static_assets.encoded(asset, encoding), mimetype=asset.mimetype)
+    if compressible(asset.mimetype, len(asset.body)):
+        response.vary.add('Accept-Encoding')
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.set_etag(encoded_etag(asset.digest, encoding))
+    
+    if request.args.get('v') == asset.digest:
+        response.cache_control.public = True
+        response.cache_control.max_age = STATIC_MAX_AGE
+        response.cache_control.immutable = True
+    else:
+        response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+app.view_functions['static'] = serve_static
+
+@app.after_request
+def compress_response(response):
+    """Compress text responses above the size threshold for clients that accept it."""
+    if (response.status_code != 200 or response.direct_passthrough or response.is_streamed
+            or 'Content-Encoding' in response.headers):
+        return response
+    
+    body = response.get_data()
+    if not compressible(response.mimetype, len(body)):
+        return response
+    
+    response.vary.add('Accept-Encoding')
+    encoding = choose_encoding(request.headers.get('Accept-Encoding'))
+    if encoding is None:
+        return response
+    
+    with timed("compress"):
+        response.set_data(compress_cached(body, encoding))
+    response.headers['Content-Encoding'] = encoding
+    etag, weak = response.get_etag()
+    if etag:
+        # Revalidate against the encoded body's own tag, which is what the
+        # client holds from an earlier compressed response
+        response.set_etag(encoded_etag(etag, encoding), weak)
+        response.make_conditional(request)
+    return response
+
+def normalize_filter(value):
+    """Normalize a filter value so equivalent requests share a cache key."""
+    if value is None:
+        return None
+    value = str(value).strip()
+    return value or None
+
+def resolve_filter(field, value):
+    """
+    Normalize a filter value and resolve it to the dataset's canonical value.
+    
+    Approximate and transliterated inputs ("red soils", "karisal", "thai")
+    resolve to the canonical value; anything unrecognized is kept as typed.
+    
+    Raises:
+        AmbiguousValue: If the value is about as close to several values,
+            e.g. "soil"
+    """
+    value = normalize_filter(value)
+    if value is None:
+        return None
+    return resolve(field, value) or value
+
+# Rows per chunk written by the streaming export
+EXPORT_CHUNK_SIZE = 200
+
+# CSV columns of the streaming export
+EXPORT_CSV_FIELDS = ["crop_name", "soil_type", "month", "season", "land_type",
+                     "expected_yield", "drought_measures", "flood_measures"]
+
+# Maximum number of queries accepted by /api/recommendations/batch
+BATCH_LIMIT = int(os.environ.get("FARMBOT_BATCH_LIMIT", "1000"))
+
+# Seconds browsers may reuse /api/options before revalidating with If-None-Match
+OPTIONS_MAX_AGE = int(os.environ.get("FARMBOT_OPTIONS_MAX_AGE", "60"))
+
+# Filter fields listed by /api/options, with their query parameter names
+OPTION_FIELDS = {"SOIL TYPE": "soil", "MONTH": "month", "SEASON": "season", "LAND TYPE": "land_type"}
+
+def cached_body(key, build_payload):
+    """
+    Get a rendered JSON body from the response cache, building it on a miss.
+    
+    Args:
+        key (tuple): Cache key, normalized so land size is not part of it
+            unless the body depends on it; the dataset version is added to it
+        build_payload (callable): Returns the payload to serialize
+    
+    Returns:
+        bytes: Serialized JSON body
+    """
+    return response_cache.get_or_compute((dataset_version(),) + key,
+                                         lambda: shared_body(key, lambda: serialize(build_payload())))
+
+def shared_body(key, build_body):
+    """
+    Get a body from the cache shared by the workers, building it on a miss
+    in one worker while the others wait for it.
+    """
+    if shared_cache is None:
+        return build_body()
+    return shared_cache.get_or_compute(dataset_fingerprint(), key, build_body)
+
+def serialize(payload):
+    """Serialize a payload the way jsonify does, timed as the "serialize" stage."""
+    with timed("serialize"):
+        return jsonify(payload).get_data()
+
+def tagged_body(key, build_payload):
+    """
+    Get a rendered JSON body and its strong ETag from the response cache.
+    
+    The ETag is a hash of the body, so it changes exactly when the payload does.
+    
+    Returns:
+        tuple: (serialized JSON body, ETag value without quotes)
+    """
+    def build_tagged_body():
+        body = shared_body(key, lambda: serialize(build_payload()))
+        return body, hashlib.sha256(body).hexdigest()[:32]
+    
+    return response_cache.get_or_compute((dataset_version(), 'tagged') + key, build_tagged_body)
+
+def conditional_json(body, etag, max_age=OPTIONS_MAX_AGE):
+    """
+    Serve a JSON body with a strong ETag and Cache-Control.
+    
+    Requests whose If-None-Match matches the ETag get an empty 304.
+    
+    Args:
+        body (bytes): Serialized JSON body
+        etag (str): ETag value without quotes
+        max_age (int): Seconds the response may be reused without revalidating
+    
+    Returns:
+        Response: 200 with the body, or 304
+    """
+    response = app.response_class(body, mimetype=app.json.mimetype)
+    response.set_etag(etag)
+    response.cache_control.public = True
+    response.cache_control.max_age = max_age
+    return response.make_conditional(request)
+
+def cached_records(soil_type, month, season, land_type):
+    """Get the crop records matching normalized filters from the response cache."""
+    return response_cache.get_or_compute(
+        (dataset_version(), 'records', soil_type, month, season, land_type),
+        lambda: find_crop_records(soil_type, month, season, land_type)
+    )
+
+def chart_body(soil_type, month, season, land_type, land_size=1.0):
+    """
+    Get the rendered chart payload for normalized filters and a land size.
+    
+    The crops are ranked and scaled on their unrounded yields at the land
+    size, from the cached records shared with the chat.
+    """
+    def build_chart_payload():
+        # Scale the matching records to the land size and format them for the chart
+        recommendations = RecommendationList(cached_records(soil_type, month, season, land_type), land_size)
+        return {
+            'status': 'success',
+            'data': format_recommendations_for_chart(recommendations, month, season)
+        }
+    
+    return cached_body(('chart', soil_type, month, season, land_type, land_size), build_chart_payload)
+
+# Rendered template pages with their ETags; the pages only change with the static asset URLs
+rendered_pages = {}
+
+def page_response(template):
+    """
+    Serve a template page rendered once per process (on every request in
+    debug mode), revalidated by the browser with its ETag.
+    """
+    page = rendered_pages.get(template)
+    if page is None or app.debug:
+        body = render_template(template).encode('utf-8')
+        page = rendered_pages[template] = (body, hashlib.sha256(body).hexdigest()[:32])
+    
+    body, etag = page
+    response = app.response_class(body, mimetype='text/html')
+    response.set_etag(etag)
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
 @app.route('/')
 def index():
     """Render the home page"""
-    return render_template('index.html')
+    return page_response('index.html')
 
 @app.route('/about')
 def about():
     """Render the about page"""
-    return render_template('about.html')
+    return page_response('about.html')
+
+class InvalidOptionType(ValueError):
+    """Raised for an /api/options type that is not a filter field."""
+
+def chat_body(message, filters, conversation_id=None):
+    """
+    Answer a chat message, shared by the Flask and ASGI apps.
+    
+    Filters the message does not mention carry over from the conversation's
+    previous messages, and a climate question about the crops just
+    recommended ranks the measures of that stored result set.
+    
+    Args:
+        message (str): The user's chat message
+        filters (dict): Filter values from the sidebar, which take
+            precedence over what the message mentions
+        conversation_id (str): ID of the session's conversation; None
+            answers the message on its own
+    
+    Returns:
+        bytes: Serialized JSON response
+    """
+    # Extract the intent and entities from the message in one scan
+    parsed = parse_message(message)
+    conversation = (conversations.get(conversation_id) if conversation_id else None) or NEW_CONVERSATION
+    context = conversation.slots
+    
+    # Initialize parameters; filters take precedence over the message, and
+    # the message over what earlier messages resolved
+    soil_type = resolve_filter('SOIL TYPE', filters.get('soil')) or parsed.soil_type or context.get('soil_type')
+    land_type = resolve_filter('LAND TYPE', filters.get('land_type')) or parsed.land_type
+    if land_type is None:
+        # An empty land type filter means any land type, and no filter dry
+        # land, unless earlier messages already settled it
+        land_type = context.get('land_type', None if 'land_type' in filters else 'Dry Land')
+    land_size = parsed.land_size or context.get('land_size') or 1.0  # Default to 1 acre
+    
+    # Use filter values if provided, otherwise what the message mentions; a
+    # message naming a month or season replaces both earlier ones
+    time_context = {} if parsed.month or parsed.season else context
+    season = resolve_filter('SEASON', filters.get('season')) or parsed.season or time_context.get('season')
+    month = resolve_filter('MONTH', filters.get('month')) or parsed.month or time_context.get('month')
+    
+    slots = {'soil_type': soil_type, 'month': month, 'season': season,
+             'land_type': land_type, 'land_size': land_size}
+    result_key = (soil_type, month, season, land_type)
+    
+    # Find matching records (cached); recommendations scale them to the land size
+    def find_records():
+        return cached_records(*result_key)
+    
+    # Handle climate remedial measures request
+    if parsed.intent == 'climate':
+        climate_condition = parsed.climate_condition or "drought"  # Default
+        
+        # Get any specific climate condition from filters
+        if filters.get('climate_condition'):
+            if "drought" in filters.get('climate_condition').lower():
+                climate_condition = "drought"
+            elif "flood" in filters.get('climate_condition').lower():
+                climate_condition = "flood"
+            else:
+                climate_condition = resolve('CLIMATE', filters.get('climate_condition')) or climate_condition
+        
+        # Measures of the crops the conversation last recommended for the
+        # same filters, ranked on the stored records; a result recommended
+        # by another worker is found again in this one
+        records = conversation.result_for(dataset_version(), result_key)
+        if records is None and conversation.fingerprint is not None \
+                and conversation.answers(dataset_fingerprint(), result_key):
+            records = find_records()
+            conversation = conversation._replace(version=dataset_version(), records=records)
+        
+        if conversation_id:
+            conversations.set(conversation_id, conversation._replace(slots=slots))
+        
+        if records:
+            def build_result_climate_payload():
+                return {
+                    'status': 'success',
+                    'response': get_climate_remedial_measures(climate_condition, RecommendationList(records))
+                }
+            
+            return cached_body(('climate-results', climate_condition) + result_key,
+                               build_result_climate_payload)
+        
+        # The most common measures for the soil and land type come from the
+        # precomputed measure index; they do not depend on land size
+        def build_climate_payload():
+            return {
+                'status': 'success',
+                'response': get_climate_remedial_measures(
+                    climate_condition, soil_type=soil_type, land_type=land_type)
+            }
+        
+        return cached_body(('climate', climate_condition, soil_type, land_type),
+                           build_climate_payload)
+    
+    # Handle crop recommendations request
+    if conversation_id:
+        # The conversation holds a reference to the cached records
+        fingerprint = dataset_fingerprint() if conversations.shared is not None else None
+        conversations.set(conversation_id, Conversation(
+            slots, dataset_version(), fingerprint, result_key, find_records()))
+    
+    def build_chat_payload():
+        recommendations = RecommendationList(find_records(), land_size)
+        return {
+            'status': 'success',
+            'response': format_recommendations_for_chat(recommendations, land_size, month, season)
+        }
+    
+    return cached_body(('chat', soil_type, month, season, land_type, land_size), build_chat_payload)
+
+def options_body(args):
+    """
+    Get the /api/options payload for query arguments, shared by the Flask and ASGI apps.
+    
+    Args:
+        args (Mapping): Query arguments ('type', or the selected soil, month,
+            season and land_type for the combined catalog)
+    
+    Returns:
+        tuple: (serialized JSON body, ETag value)
+    
+    Raises:
+        InvalidOptionType: If 'type' is not a filter field
+    """
+    option_type = args.get('type', '')
+    
+    if not option_type:
+        selected = {
+            field: resolve_filter(field, args.get(parameter, None))
+            for field, parameter in OPTION_FIELDS.items()
+        }
+        
+        def build_catalog_payload():
+            counts = facet_counts(*selected.values())
+            return {
+                'status': 'success',
+                'options': {field: get_options(field) for field in OPTION_FIELDS},
+                'counts': counts
+            }
+        
+        return tagged_body(('options',) + tuple(selected.values()), build_catalog_payload)
+    
+    if option_type not in OPTION_FIELDS:
+        raise InvalidOptionType(f"Invalid option type: {option_type}")
+    
+    return tagged_body(('options', option_type), lambda: {
+        'status': 'success',
+        'options': get_options(option_type)
+    })
+
+def recommendations_body(args):
+    """
+    Get the chart payload for query arguments, shared by the Flask and ASGI apps.
+    
+    Args:
+        args (Mapping): Query arguments (soil, month, season, land_type, land_size)
+    
+    Returns:
+        bytes: Serialized JSON body
+    """
+    soil_type = resolve_filter('SOIL TYPE', args.get('soil', None))
+    month = resolve_filter('MONTH', args.get('month', None))
+    season = resolve_filter('SEASON', args.get('season', None))
+    land_type = resolve_filter('LAND TYPE', args.get('land_type', 'Dry Land'))
+    land_size = float(args.get('land_size', 1.0))
+    
+    return chart_body(soil_type, month, season, land_type, land_size)
 
 @app.route('/api/chat', methods=['POST'])
 def chat():
     """
     API endpoint to interact with the chatbot
-    Expects: JSON with 'message' and 'filters' (optional)
+    Expects: JSON with 'message', 'filters' (optional), 'region' (optional)
+        and 'reset' (optional, true to start a new conversation)
     Returns: JSON with chatbot response
     """
     try:
@@ -39,75 +552,25 @@ def chat():
         message = data.get('message', '')
         filters = data.get('filters', {})
         
-        logger.debug(f"Received message: {message}")
-        logger.debug(f"Filters: {filters}")
-        
-        # Process the message to determine what the user is asking for
-        message_lower = message.lower()
-        
-        # Initialize parameters
-        soil_type = filters.get('soil', None)
-        month = None
-        season = None
-        land_type = filters.get('land_type', 'Dry Land')  # Default to dry land
-        land_size = 1.0  # Default to 1 acre
-        
-        # Extract land size if mentioned
-        if "acre" in message_lower:
-            # Try to find a number before "acre"
-            words = message_lower.split()
-            for i, word in enumerate(words):
-                if word == "acre" or word == "acres" and i > 0:
-                    try:
-                        land_size = float(words[i-1])
-                    except ValueError:
-                        pass
-        
-        # Handle climate remedial measures request
-        if 'climate' in message_lower or 'remedy' in message_lower or 'drought' in message_lower or 'flood' in message_lower:
-            climate_condition = "drought"  # Default
-            if "flood" in message_lower:
-                climate_condition = "flood"
-                
-            # Get any specific climate condition from filters
-            if filters.get('climate_condition'):
-                if "drought" in filters.get('climate_condition').lower():
-                    climate_condition = "drought"
-                elif "flood" in filters.get('climate_condition').lower():
-                    climate_condition = "flood"
-            
-            # Find recommendations first to extract measures from them
-            recommendations = find_crop_recommendations(soil_type, month, season, land_type, land_size)
-            response = get_climate_remedial_measures(climate_condition, recommendations)
+        # The conversation ID lives in the session cookie, its state on the server
+        conversation_id = session.get('conversation_id')
+        if conversation_id is None:
+            conversation_id = session['conversation_id'] = new_conversation_id()
+        elif data.get('reset'):
+            conversations.delete(conversation_id)
         
-        # Handle crop recommendations request
-        else:
-            # Extract season if mentioned
-            if "summer" in message_lower:
-                season = "Summer"
-            elif "winter" in message_lower:
-                season = "Winter"
-            elif "rainy" in message_lower or "monsoon" in message_lower:
-                season = "Rainy"
-                
-            # Use filter values if provided
-            if filters.get('season'):
-                season = filters.get('season')
-                
-            if filters.get('month'):
-                month = filters.get('month')
-                
-            # Find and format recommendations
-            recommendations = find_crop_recommendations(soil_type, month, season, land_type, land_size)
-            response = format_recommendations_for_chat(recommendations, land_size)
+        logger.debug("Received message %r with filters %r", message, filters)
         
+        return app.response_class(chat_body(message, filters, conversation_id), mimetype=app.json.mimetype)
+    
+    except AmbiguousValue as e:
         return jsonify({
-            'status': 'success',
-            'response': response
-        })
+            'status': 'error',
+            'message': f"Invalid parameter: {str(e)}"
+        }), 400
     
     except Exception as e:
-        logger.error(f"Error processing chat request: {str(e)}")
+        logger.error("Error processing chat request: %s", e)
         return jsonify({
             'status': 'error',
             'message': f"An error occurred: {str(e)}"
@@ -117,61 +580,418 @@ def chat():
 def get_filter_options():
     """
     Get available options for dropdown filters
+    
+    Without 'type', returns every filter's options in one payload together
+    with facet counts: for each value, the number of crops matching it and
+    the other selected filters (soil, month, season, land_type).
+    'region' selects a regional dataset instead of the default one.
+    Responses carry a strong ETag, so unchanged catalogs revalidate with a 304.
+    """
+    try:
+        body, etag = options_body(request.args)
+        return conditional_json(body, etag)
+    
+    except InvalidOptionType as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 400
+    
+    except AmbiguousValue as e:
+        return jsonify({
+            'status': 'error',
+            'message': f"Invalid parameter: {str(e)}"
+        }), 400
+    
+    except Exception as e:
+        logger.error("Error getting options: %s", e)
+        return jsonify({
+            'status': 'error',
+            'message': f"An error occurred: {str(e)}"
+        }), 500
+
+@app.route('/api/recommendations', methods=['GET'])
+def get_recommendations():
+    """
+    Get crop recommendations based on query parameters
+    Used for visualization purposes; 'region' selects a regional dataset
+    """
+    try:
+        body = recommendations_body(request.args)
+        return app.response_class(body, mimetype=app.json.mimetype)
+    
+    except AmbiguousValue as e:
+        return jsonify({
+            'status': 'error',
+            'message': f"Invalid parameter: {str(e)}"
+        }), 400
+    
+    except Exception as e:
+        logger.error("Error getting recommendations: %s", e)
+        return jsonify({
+            'status': 'error',
+            'message': f"An error occurred: {str(e)}"
+        }), 500
+
+@app.route('/api/recommendations/batch', methods=['POST'])
+def get_recommendations_batch():
+    """
+    Get crop recommendations for many farm plots in one request
+    Expects: JSON with 'queries', a list of objects with the query parameters
+    of /api/recommendations (soil, month, season, land_type, land_size)
+    Returns: NDJSON stream with one line per query, in request order: the
+    /api/recommendations body ({"status", "data"}) or, for an invalid query,
+    its error body ({"status": "error", "message"}), with the query's "index"
     """
     try:
-        option_type = request.args.get('type', '')
+        data = request.get_json()
+        queries = data.get('queries') if isinstance(data, dict) else None
         
-        if option_type in ["SOIL TYPE", "MONTH", "SEASON", "LAND TYPE"]:
-            options = get_options(option_type)
+        if not isinstance(queries, list):
             return jsonify({
-                'status': 'success',
-                'options': options
-            })
-        else:
+                'status': 'error',
+                'message': "Expected a JSON object with a 'queries' list"
+            }), 400
+        
+        if len(queries) > BATCH_LIMIT:
             return jsonify({
                 'status': 'error',
-                'message': f"Invalid option type: {option_type}"
+                'message': f"Too many queries: {len(queries)} (limit {BATCH_LIMIT})"
             }), 400
+        
+        # Group identical filter tuples so each distinct tuple is evaluated once
+        keys = [batch_query_key(query) for query in queries]
+        groups = {}
+        for index, key in enumerate(keys):
+            groups.setdefault(key, []).append(index)
+        
+        logger.debug("Batch of %d queries with %d distinct filter sets", len(queries), len(groups))
+        
+        def generate():
+            bodies = {}
+            for index, key in enumerate(keys):
+                if key not in bodies:
+                    if isinstance(key, str):
+                        body = serialize({'status': 'error', 'message': key})
+                    else:
+                        body = chart_body(*key)
+                    # Raw newlines can only be pretty-printing whitespace (debug mode),
+                    # since newlines inside JSON strings are escaped
+                    bodies[key] = body.decode('utf-8').replace('\n', '')
+                
+                # Bodies are JSON objects, {"data":...,"status":...} or
+                # {"message":...,"status":"error"}; prefix the query index
+                yield f'{{"index":{index},{bodies[key][1:]}\n'
+        
+        return app.response_class(stream_with_context(generate()), mimetype='application/x-ndjson')
     
     except Exception as e:
-        logger.error(f"Error getting options: {str(e)}")
+        logger.error("Error getting batch recommendations: %s", e)
         return jsonify({
             'status': 'error',
             'message': f"An error occurred: {str(e)}"
         }), 500
 
-@app.route('/api/recommendations', methods=['GET'])
-def get_recommendations():
+@app.route('/api/recommendations/export', methods=['GET'])
+def export_recommendations():
     """
-    Get crop recommendations based on query parameters
-    Used for visualization purposes
+    Stream the full set of matching recommendations
+    Accepts the /api/recommendations query parameters plus:
+    format ('ndjson' or 'csv'), cursor (from the X-Next-Cursor header of the
+    previous page) and limit (page size, all remaining rows if omitted)
+    land_type has no default here, so the whole table can be exported
+    Returns: NDJSON or CSV stream; X-Next-Cursor is set when more rows remain
     """
     try:
-        # Get parameters from query string
-        soil_type = request.args.get('soil', None)
-        month = request.args.get('month', None)
-        season = request.args.get('season', None)
-        land_type = request.args.get('land_type', 'Dry Land')
+        soil_type = resolve_filter('SOIL TYPE', request.args.get('soil', None))
+        month = resolve_filter('MONTH', request.args.get('month', None))
+        season = resolve_filter('SEASON', request.args.get('season', None))
+        land_type = resolve_filter('LAND TYPE', request.args.get('land_type', None))
         land_size = float(request.args.get('land_size', 1.0))
+        export_format = request.args.get('format', 'ndjson')
+        cursor = int(request.args.get('cursor', 0))
+        limit = request.args.get('limit')
+        limit = int(limit) if limit else None
+        
+        if export_format not in ('ndjson', 'csv'):
+            return jsonify({
+                'status': 'error',
+                'message': f"Invalid export format: {export_format}"
+            }), 400
+        
+        if cursor < 0 or (limit is not None and limit < 1):
+            return jsonify({
+                'status': 'error',
+                'message': "cursor must be >= 0 and limit must be >= 1"
+            }), 400
         
-        # Find crop recommendations based on parameters
-        recommendations = find_crop_recommendations(
-            soil_type, month, season, land_type, land_size
+        rows, next_cursor = iter_crop_recommendations(
+            soil_type, month, season, land_type, land_size, cursor=cursor, limit=limit
         )
         
-        # Format the recommendations for the chart
-        chart_data = format_recommendations_for_chart(recommendations)
+        if export_format == 'csv':
+            body, mimetype = export_csv_chunks(rows), 'text/csv'
+        else:
+            body, mimetype = export_ndjson_chunks(rows), 'application/x-ndjson'
         
+        response = app.response_class(stream_with_context(body), mimetype=mimetype)
+        if next_cursor is not None:
+            response.headers['X-Next-Cursor'] = str(next_cursor)
+        return response
+    
+    except ValueError as e:
         return jsonify({
-            'status': 'success',
-            'data': chart_data
-        })
+            'status': 'error',
+            'message': f"Invalid parameter: {str(e)}"
+        }), 400
     
     except Exception as e:
-        logger.error(f"Error getting recommendations: {str(e)}")
+        logger.error("Error exporting recommendations: %s", e)
         return jsonify({
             'status': 'error',
             'message': f"An error occurred: {str(e)}"
         }), 500
 
+def export_ndjson_chunks(rows):
+    """Serialize (position, recommendation) pairs as NDJSON, a chunk of lines at a time."""
+    chunk = []
+    for _, recommendation in rows:
+        chunk.append(app.json.dumps(recommendation))
+        if len(chunk) >= EXPORT_CHUNK_SIZE:
+            yield "\n".join(chunk) + "\n"
+            chunk = []
+    if chunk:
+        yield "\n".join(chunk) + "\n"
 
+def export_csv_chunks(rows):
+    """Serialize (position, recommendation) pairs as CSV, a chunk of rows at a time."""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_CSV_FIELDS)
+    writer.writeheader()
+    
+    for count, (_, recommendation) in enumerate(rows, 1):
+        row = dict(recommendation)
+        row['drought_measures'] = " ".join(measure_text(measure) for measure in row['drought_measures'])
+        row['flood_measures'] = " ".join(measure_text(measure) for measure in row['flood_measures'])
+        writer.writerow(row)
+        if count % EXPORT_CHUNK_SIZE == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    
+    if buffer.tell():
+        yield buffer.getvalue()
+
+def batch_query_key(query):
+    """
+    Normalize one batch query into its filter tuple.
+    
+    Returns:
+        tuple or str: (soil, month, season, land_type, land_size), or an
+            error message if the query is invalid
+    """
+    if not isinstance(query, dict):
+        return "Each query must be a JSON object"
+    
+    try:
+        land_size = float(query.get('land_size', 1.0))
+    except (TypeError, ValueError):
+        return f"Invalid land_size: {query.get('land_size')}"
+    
+    try:
+        return (
+            resolve_filter('SOIL TYPE', query.get('soil')),
+            resolve_filter('MONTH', query.get('month')),
+            resolve_filter('SEASON', query.get('season')),
+            resolve_filter('LAND TYPE', query.get('land_type', 'Dry Land')),
+            land_size
+        )
+    except AmbiguousValue as e:
+        return f"Invalid parameter: {str(e)}"
+
+@app.route('/api/plan', methods=['GET'])
+def get_plan():
+    """
+    Plan a crop rotation for the highest total expected yield, planting no
+    crop twice within 12 months from the start or in consecutive months
+    Accepts: soil, land_type, land_size, months (default 12), start (month,
+    default Chithirai), drought_safe (1 to plant only crops mostly grown on
+    dry land) and previous_crop (crop in the field before the plan)
+    Returns: JSON with the crop of every month and the total expected yield
+    """
+    try:
+        return app.response_class(plan_body(request.args), mimetype=app.json.mimetype)
+    
+    except ValueError as e:
+        return jsonify({
+            'status': 'error',
+            'message': f"Invalid parameter: {str(e)}"
+        }), 400
+    
+    except Exception as e:
+        logger.error("Error planning crop rotation: %s", e)
+        return jsonify({
+            'status': 'error',
+            'message': f"An error occurred: {str(e)}"
+        }), 500
+
+def plan_body(args):
+    """
+    Get the /api/plan payload for query arguments.
+    
+    Raises:
+        ValueError: If land_size or months is not a number, or the plan
+            parameters are out of range
+    """
+    soil_type = resolve_filter('SOIL TYPE', args.get('soil', None))
+    land_type = resolve_filter('LAND TYPE', args.get('land_type', 'Dry Land'))
+    start_month = resolve_filter('MONTH', args.get('start', None))
+    previous_crop = resolve_filter('CROP NAME', args.get('previous_crop', None))
+    land_size = float(args.get('land_size', 1.0))
+    months = int(args.get('months', 12))
+    drought_safe = args.get('drought_safe', '').lower() in ('1', 'true', 'yes')
+    
+    return cached_body(
+        ('plan', soil_type, land_type, land_size, months, start_month, drought_safe, previous_crop),
+        lambda: {
+            'status': 'success',
+            'plan': plan_rotation(soil_type, land_type, land_size, months, start_month,
+                                  drought_safe, previous_crop)
+        }
+    )
+
+@app.route('/api/regions', methods=['GET'])
+def get_regions():
+    """
+    List the regions whose dataset can be selected with the 'region' parameter
+    """
+    return jsonify({
+        'status': 'success',
+        'regions': region_registry.regions()
+    })
+
+def admin_authorized():
+    """Check the X-Admin-Token header against FARMBOT_ADMIN_TOKEN."""
+    token = request.headers.get('X-Admin-Token', '')
+    return bool(ADMIN_TOKEN) and hmac.compare_digest(token.encode(), ADMIN_TOKEN.encode())
+
+def dataset_status(snapshot):
+    """Describe a dataset snapshot for the admin endpoints."""
+    return {
+        'version': snapshot.version,
+        'rows': len(snapshot.data),
+        'loaded_at': snapshot.loaded_at,
+        'source': snapshot.source
+    }
+
+@app.route('/api/admin/dataset', methods=['GET'])
+def get_dataset_status():
+    """
+    Get the version and size of the dataset snapshot this worker serves,
+    and the regional datasets it has loaded
+    Requires the X-Admin-Token header
+    """
+    if not admin_authorized():
+        return jsonify({'status': 'error', 'message': "Forbidden"}), 403
+    
+    return jsonify({
+        'status': 'success',
+        'dataset': dataset_status(current_snapshot()),
+        'regions': region_registry.stats()
+    })
+
+@app.route('/api/admin/reload', methods=['POST'])
+def reload_dataset():
+    """
+    Reload the dataset from disk in the background and swap it in
+    Requires the X-Admin-Token header; with ?wait=1 the response is sent
+    once the new snapshot is published. Only the worker handling the
+    request reloads, so multi-worker servers should use the file watcher
+    (FARMBOT_DATASET_WATCH_INTERVAL) instead. With ?region=<name>, the
+    region is dropped and loads from its file on its next request.
+    Returns: 202 with the version being replaced, or 200 with the new one
+    """
+    if not admin_authorized():
+        return jsonify({'status': 'error', 'message': "Forbidden"}), 403
+    
+    previous = current_snapshot()
+    region = request_region()
+    if region is not None:
+        region_registry.invalidate(region)
+        if request.args.get('wait') not in ('1', 'true'):
+            return jsonify({
+                'status': 'accepted',
+                'region': region,
+                'replacing': dataset_status(previous)
+            }), 202
+        return jsonify({
+            'status': 'success',
+            'region': region,
+            'dataset': dataset_status(region_registry.get(region))
+        })
+    
+    thread = reload_in_background()
+    
+    if request.args.get('wait') not in ('1', 'true'):
+        return jsonify({
+            'status': 'accepted',
+            'replacing': dataset_status(previous)
+        }), 202
+    
+    thread.join()
+    # The request itself keeps its pinned snapshot; report the published one
+    snapshot = latest_snapshot()
+    if snapshot.version == previous.version:
+        return jsonify({'status': 'error', 'message': "Reload failed, see the server log"}), 500
+    
+    return jsonify({
+        'status': 'success',
+        'dataset': dataset_status(snapshot)
+    })
+
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    """
+    Request and stage latency histograms in the Prometheus text format
+    """
+    return app.response_class(registry.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/api/admin/profiler', methods=['GET', 'POST'])
+def control_profiler():
+    """
+    Control the sampling profiler of this worker
+    Requires the X-Admin-Token header. POST with ?action=start, stop or
+    reset; GET returns the samples as collapsed stacks for flame graph
+    tools, or the profiler status with ?format=json.
+    """
+    if not admin_authorized():
+        return jsonify({'status': 'error', 'message': "Forbidden"}), 403
+    
+    if request.method == 'POST':
+        action = request.args.get('action', '')
+        if action == 'start':
+            profiler.start()
+        elif action == 'stop':
+            profiler.stop()
+        elif action == 'reset':
+            profiler.reset()
+        else:
+            return jsonify({'status': 'error', 'message': f"Invalid action: {action}"}), 400
+        return jsonify({'status': 'success', 'profiler': profiler.status()})
+    
+    if request.args.get('format') == 'json':
+        return jsonify({'status': 'success', 'profiler': profiler.status()})
+    return app.response_class(profiler.collapsed(), mimetype='text/plain')
+
+@app.route('/api/cache/stats', methods=['GET'])
+def get_cache_stats():
+    """
+    Get hit, miss and eviction counters of the response cache, the shared
+    cache and the conversation store
+    """
+    return jsonify({
+        'status': 'success',
+        'cache': response_cache.stats(),
+        'shared_cache': shared_cache.stats() if shared_cache is not None else None,
+        'conversations': conversations.stats()
+    })
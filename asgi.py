@@ -0,0 +1,352 @@
+"""
+ASGI entry point for FarmBot, alongside the WSGI app in main.py:
+
+    uvicorn asgi:app --host 0.0.0.0 --port 5000
+
+/api/chat, /api/recommendations and /api/options are served by async
+handlers that parse the request on the event loop and run the shared
+recommendation core from app.py (parsing, filtering, formatting) in a thread
+pool. Every other route is passed to the Flask app through a small WSGI
+bridge that also runs in the pool and streams the response.
+
+The core is synchronous and has no awaitable downstream calls, so what a
+worker gains over a sync gunicorn worker comes from the thread pool, not
+from async I/O: FARMBOT_ASGI_THREADS requests can wait on blocking calls
+at once instead of one, while CPU-bound work still shares the GIL.
+"""
+
+import asyncio
+import contextvars
+import io
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qsl
+
+from werkzeug.http import parse_etags
+from werkzeug.wrappers import Request
+
+from conversation_store import conversations, new_conversation_id
+from crop_recommendation import pin_snapshot, unpin_snapshot
+from dataset_registry import UnknownRegion, registry as region_registry
+from fuzzy_lookup import AmbiguousValue
+from logging_config import new_request_id, request_id
+from metrics import current_endpoint, observe_request, timed
+from web_assets import choose_encoding, compress_cached, compressible, encoded_etag
+from app import (
+    OPTIONS_MAX_AGE,
+    InvalidOptionType,
+    app as flask_app,
+    chat_body,
+    options_body,
+    recommendations_body
+)
+
+logger = logging.getLogger(__name__)
+
+# Threads running the CPU-bound core and the WSGI bridge
+THREAD_POOL_SIZE = int(os.environ.get("FARMBOT_ASGI_THREADS", "8"))
+
+executor = ThreadPoolExecutor(max_workers=THREAD_POOL_SIZE, thread_name_prefix="farmbot-asgi")
+
+JSON_CONTENT_TYPE = (b"content-type", b"application/json")
+
+async def run_in_pool(func, *args, region=None):
+    """
+    Run a core function in the thread pool inside the Flask app context,
+    on the dataset snapshot current when it starts, or on the snapshot of
+    a region, loaded in the pool on first use. The caller's context
+    variables (e.g. the endpoint labelling stage timings) are copied over.
+    """
+    def call():
+        token = pin_snapshot(region_registry.get(region) if region else None)
+        try:
+            with flask_app.app_context():
+                return func(*args)
+        finally:
+            unpin_snapshot(token)
+    
+    context = contextvars.copy_context()
+    return await asyncio.get_running_loop().run_in_executor(executor, context.run, call)
+
+async def read_body(receive):
+    """Read the whole request body from the ASGI receive channel."""
+    chunks = []
+    while True:
+        message = await receive()
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body"):
+            return b"".join(chunks)
+
+def query_args(scope):
+    """Query arguments as a dict, keeping the first value like request.args.get."""
+    args = {}
+    for key, value in parse_qsl(scope.get("query_string", b"").decode("latin-1"), keep_blank_values=True):
+        args.setdefault(key, value)
+    return args
+
+def request_header(scope, name):
+    """Value of a request header, or None."""
+    name = name.lower().encode("latin-1")
+    for key, value in scope.get("headers", []):
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+async def send_response(send, status, body=b"", headers=()):
+    """Send a complete HTTP response."""
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-length", str(len(body)).encode("ascii")), *headers],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+async def send_json(scope, send, body, headers=(), etag=None):
+    """
+    Send a 200 JSON response, compressed like the Flask responses when it is
+    large enough and the client accepts it.
+    
+    A response with an ETag is sent as an empty 304 when If-None-Match holds
+    the tag of the body in the encoding it would be sent in.
+    """
+    headers = [JSON_CONTENT_TYPE, *headers]
+    encoding = None
+    if compressible("application/json", len(body)):
+        headers.append((b"vary", b"Accept-Encoding"))
+        encoding = choose_encoding(request_header(scope, "accept-encoding"))
+    
+    if etag is not None:
+        etag = encoded_etag(etag, encoding)
+        headers.append((b"etag", f'"{etag}"'.encode("ascii")))
+        if parse_etags(request_header(scope, "if-none-match")).contains_weak(etag):
+            await send_response(send, 304, headers=headers[1:])
+            return
+    
+    if encoding is not None:
+        with timed("compress"):
+            body = compress_cached(body, encoding)
+        headers.append((b"content-encoding", encoding.encode("ascii")))
+    await send_response(send, 200, body, headers)
+
+async def send_error(send, message, status=500):
+    """Send the error payload the Flask routes return."""
+    body = json.dumps({"status": "error", "message": message}).encode("utf-8") + b"\n"
+    await send_response(send, status, body, [JSON_CONTENT_TYPE])
+
+def conversation_session(scope):
+    """
+    Get the conversation ID from the Flask session cookie, starting a new
+    conversation if the request has none.
+    
+    Returns:
+        tuple: (conversation ID, headers setting the session cookie for a
+            new conversation)
+    """
+    interface = flask_app.session_interface
+    session = interface.open_session(flask_app, Request(wsgi_environ(scope, b"")))
+    if session is None:
+        return None, []
+    
+    conversation_id = session.get('conversation_id')
+    if conversation_id is not None:
+        return conversation_id, []
+    
+    conversation_id = session['conversation_id'] = new_conversation_id()
+    response = flask_app.response_class()
+    interface.save_session(flask_app, session, response)
+    return conversation_id, [
+        (b"set-cookie", value.encode("latin-1")) for value in response.headers.getlist("Set-Cookie")
+    ]
+
+async def chat(scope, receive, send):
+    """Async /api/chat; see app.chat."""
+    try:
+        data = json.loads(await read_body(receive) or b"null")
+        message = data.get('message', '')
+        filters = data.get('filters', {})
+        region = data.get('region')
+        
+        conversation_id, headers = conversation_session(scope)
+        if data.get('reset') and not headers:
+            conversations.delete(conversation_id)
+        
+        logger.debug("Received message %r with filters %r", message, filters)
+        
+        body = await run_in_pool(chat_body, message, filters, conversation_id, region=region)
+        await send_json(scope, send, body, headers)
+    
+    except AmbiguousValue as e:
+        await send_error(send, f"Invalid parameter: {str(e)}", 400)
+    
+    except UnknownRegion as e:
+        await send_error(send, f"Unknown region: {e}", 404)
+    
+    except Exception as e:
+        logger.error("Error processing chat request: %s", e)
+        await send_error(send, f"An error occurred: {str(e)}")
+
+async def get_recommendations(scope, receive, send):
+    """Async /api/recommendations; see app.get_recommendations."""
+    try:
+        args = query_args(scope)
+        body = await run_in_pool(recommendations_body, args, region=args.get('region'))
+        await send_json(scope, send, body)
+    
+    except AmbiguousValue as e:
+        await send_error(send, f"Invalid parameter: {str(e)}", 400)
+    
+    except UnknownRegion as e:
+        await send_error(send, f"Unknown region: {e}", 404)
+    
+    except Exception as e:
+        logger.error("Error getting recommendations: %s", e)
+        await send_error(send, f"An error occurred: {str(e)}")
+
+async def get_filter_options(scope, receive, send):
+    """Async /api/options with ETag revalidation; see app.get_filter_options."""
+    try:
+        args = query_args(scope)
+        body, etag = await run_in_pool(options_body, args, region=args.get('region'))
+        headers = [(b"cache-control", f"public, max-age={OPTIONS_MAX_AGE}".encode("ascii"))]
+        await send_json(scope, send, body, headers, etag=etag)
+    
+    except InvalidOptionType as e:
+        await send_error(send, str(e), 400)
+    
+    except AmbiguousValue as e:
+        await send_error(send, f"Invalid parameter: {str(e)}", 400)
+    
+    except UnknownRegion as e:
+        await send_error(send, f"Unknown region: {e}", 404)
+    
+    except Exception as e:
+        logger.error("Error getting options: %s", e)
+        await send_error(send, f"An error occurred: {str(e)}")
+
+# Routes served natively; everything else goes through the WSGI bridge
+ROUTES = {
+    ("POST", "/api/chat"): chat,
+    ("GET", "/api/recommendations"): get_recommendations,
+    ("GET", "/api/options"): get_filter_options,
+}
+
+def wsgi_environ(scope, body):
+    """Build a WSGI environ for the Flask app from an ASGI HTTP scope."""
+    server = scope.get("server") or ("localhost", 80)
+    client = scope.get("client") or ("", 0)
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", "").encode("utf-8").decode("latin-1"),
+        "PATH_INFO": scope["path"].encode("utf-8").decode("latin-1"),
+        "QUERY_STRING": scope.get("query_string", b"").decode("latin-1"),
+        "SERVER_NAME": server[0],
+        "SERVER_PORT": str(server[1]),
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "REMOTE_ADDR": client[0],
+        "REMOTE_PORT": str(client[1]),
+        "CONTENT_LENGTH": str(len(body)),
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": io.BytesIO(body),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": True,
+        "wsgi.run_once": False,
+    }
+    for key, value in scope.get("headers", []):
+        name = key.decode("latin-1").upper().replace("-", "_")
+        value = value.decode("latin-1")
+        if name == "CONTENT_TYPE":
+            environ["CONTENT_TYPE"] = value
+        elif name != "CONTENT_LENGTH":
+            name = f"HTTP_{name}"
+            environ[name] = f"{environ[name]},{value}" if name in environ else value
+    return environ
+
+async def wsgi_bridge(scope, receive, send):
+    """Serve a request with the Flask app, streaming its response chunks."""
+    environ = wsgi_environ(scope, await read_body(receive))
+    started = {}
+    
+    def start_response(status, headers, exc_info=None):
+        started["status"] = int(status.split(" ", 1)[0])
+        started["headers"] = [
+            (name.lower().encode("latin-1"), value.encode("latin-1")) for name, value in headers
+        ]
+    
+    # Streamed responses push Flask's request context on the first chunk and pop
+    # it after the last, so every step of a request runs in the same context
+    context = contextvars.Context()
+    loop = asyncio.get_running_loop()
+    
+    def step(func, *args):
+        return loop.run_in_executor(executor, context.run, func, *args)
+    
+    result = await step(flask_app.wsgi_app, environ, start_response)
+    chunks = iter(result)
+    try:
+        chunk = await step(next, chunks, None)
+        await send({
+            "type": "http.response.start",
+            "status": started["status"],
+            "headers": started["headers"],
+        })
+        while chunk is not None:
+            if chunk:
+                await send({"type": "http.response.body", "body": chunk, "more_body": True})
+            chunk = await step(next, chunks, None)
+        await send({"type": "http.response.body", "body": b""})
+    finally:
+        if hasattr(result, "close"):
+            await step(result.close)
+
+async def lifespan(receive, send):
+    """Handle server startup and shutdown events."""
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            executor.shutdown(wait=False)
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+def with_request_id(send):
+    """Wrap a send channel to add the X-Request-ID header to the response."""
+    header = (b"x-request-id", request_id.get().encode("ascii"))
+    
+    async def send_with_request_id(message):
+        if message["type"] == "http.response.start":
+            message = {**message, "headers": [*message["headers"], header]}
+        await send(message)
+    
+    return send_with_request_id
+
+async def app(scope, receive, send):
+    """The ASGI application."""
+    if scope["type"] == "lifespan":
+        await lifespan(receive, send)
+        return
+    if scope["type"] != "http":
+        raise ValueError(f"Unsupported ASGI scope type: {scope['type']}")
+    
+    handler = ROUTES.get((scope["method"], scope["path"]))
+    if handler is None:
+        # The Flask app times the requests it serves itself
+        await wsgi_bridge(scope, receive, send)
+        return
+    
+    endpoint = handler.__name__
+    token = current_endpoint.set(endpoint)
+    request_token = request_id.set(new_request_id(request_header(scope, "x-request-id")))
+    start = time.perf_counter()
+    try:
+        await handler(scope, receive, with_request_id(send))
+    finally:
+        observe_request(endpoint, time.perf_counter() - start)
+        request_id.reset(request_token)
+        current_endpoint.reset(token)
@@ -0,0 +1,4 @@
+"""
+Benchmarks for the FarmBot recommendation engine and API.
+Run individual benchmarks from the project root, e.g. ``python -m benchmarks.bench_index``.
+"""
@@ -0,0 +1,148 @@
+"""
+Load test of the sync (WSGI) app against the ASGI app when /api/chat waits
+on a slow blocking call, such as a weather lookup or an LLM call.
+
+The app has no async dependency point, so the simulated call blocks in
+time.sleep inside the shared recommendation core, where both apps would
+make it. The sync app is served by a fixed number of workers (like gunicorn
+sync workers), so concurrent clients queue for a free worker; the ASGI app
+runs the core in its thread pool, once with as many threads as there are
+sync workers and once with FARMBOT_ASGI_THREADS. Any gain is the pool's
+width, not async I/O: with equal counts the two servers wait the same.
+Latency is measured per request from the moment a client sends it.
+
+Usage: python -m benchmarks.bench_asgi [--delay 0.2] [--clients 64] [--requests 4] [--workers 4]
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import asgi
+from app import app
+from benchmarks.bench_parser import message_corpus
+from benchmarks.common import print_table, summarize
+
+@contextlib.contextmanager
+def slow_core(delay):
+    """Make the chat core of both apps block on a slow call first."""
+    modules = (sys.modules["app"], asgi)
+    core = asgi.chat_body
+    
+    def slow_chat_body(*args, **kwargs):
+        time.sleep(delay)
+        return core(*args, **kwargs)
+    
+    for module in modules:
+        module.chat_body = slow_chat_body
+    try:
+        yield
+    finally:
+        for module in modules:
+            module.chat_body = core
+
+@contextlib.contextmanager
+def pool_size(threads):
+    """Run the ASGI app on a thread pool of the given size."""
+    executor = asgi.executor
+    asgi.executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="farmbot-asgi")
+    try:
+        yield
+    finally:
+        asgi.executor.shutdown()
+        asgi.executor = executor
+
+def run_sync(messages, clients, workers):
+    """Drive the Flask app with concurrent clients sharing a fixed worker pool."""
+    worker_slots = threading.Semaphore(workers)
+    
+    def request(message):
+        client = app.test_client()
+        start = time.perf_counter()
+        with worker_slots:
+            response = client.post("/api/chat", json={"message": message, "filters": {}})
+        assert response.status_code == 200
+        return (time.perf_counter() - start) * 1000
+    
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        latencies = list(pool.map(request, messages))
+    return latencies, time.perf_counter() - start
+
+async def run_async(messages, clients):
+    """Drive the ASGI app with concurrent clients on one event loop."""
+    queue = list(messages)
+    latencies = []
+    
+    async def request(message):
+        body = json.dumps({"message": message, "filters": {}}).encode("utf-8")
+        events = [{"type": "http.request", "body": body, "more_body": False}]
+        statuses = []
+        
+        async def receive():
+            return events.pop(0) if events else {"type": "http.disconnect"}
+        
+        async def send(event):
+            if event["type"] == "http.response.start":
+                statuses.append(event["status"])
+        
+        scope = {
+            "type": "http", "method": "POST", "path": "/api/chat", "query_string": b"",
+            "headers": [(b"content-type", b"application/json")],
+        }
+        start = time.perf_counter()
+        await asgi.app(scope, receive, send)
+        assert statuses == [200]
+        latencies.append((time.perf_counter() - start) * 1000)
+    
+    async def client():
+        while queue:
+            await request(queue.pop())
+    
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(clients)))
+    return latencies, time.perf_counter() - start
+
+def run_asgi(messages, clients, threads):
+    """Drive the ASGI app on a thread pool of the given size."""
+    with pool_size(threads):
+        return asyncio.run(run_async(messages, clients))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--delay", type=float, default=0.2, help="seconds the slow blocking call takes")
+    parser.add_argument("--clients", type=int, default=64, help="concurrent clients")
+    parser.add_argument("--requests", type=int, default=4, help="requests per client")
+    parser.add_argument("--workers", type=int, default=4, help="sync workers")
+    args = parser.parse_args()
+    
+    messages = message_corpus(count=args.clients * args.requests)
+    # Warm the parser and caches so both apps start from the same state
+    with app.app_context():
+        for message in set(messages):
+            asgi.chat_body(message, {})
+    
+    with slow_core(args.delay):
+        runs = [
+            (f"sync, {args.workers} workers", run_sync(messages, args.clients, args.workers)),
+            (f"asgi, {args.workers} threads", run_asgi(messages, args.clients, args.workers)),
+            (f"asgi, {asgi.THREAD_POOL_SIZE} threads", run_asgi(messages, args.clients, asgi.THREAD_POOL_SIZE)),
+        ]
+    
+    rows = []
+    for name, (latencies, elapsed) in runs:
+        stats = summarize(latencies)
+        rows.append((name, f"{len(messages) / elapsed:,.1f}", f"{stats['p50']:.0f}",
+                     f"{stats['p95']:.0f}", f"{stats['p99']:.0f}"))
+    
+    print(f"/api/chat with a {args.delay * 1000:.0f} ms blocking call, {args.clients} concurrent clients, "
+          f"{len(messages)} requests")
+    print_table(("server", "req/s", "p50 ms", "p95 ms", "p99 ms"), rows)
+
+if __name__ == "__main__":
+    main()
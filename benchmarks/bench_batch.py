@@ -0,0 +1,68 @@
+"""
+Benchmark POST /api/recommendations/batch against N sequential
+GET /api/recommendations calls through the Flask test client.
+
+Each strategy is measured with a cold response cache and again warm.
+
+Usage: python -m benchmarks.bench_batch
+"""
+
+import json
+import time
+
+import crop_recommendation
+from app import app, response_cache
+from benchmarks.bench_index import request_mix
+from benchmarks.common import print_table
+
+BATCH_SIZES = (10, 100, 500)
+
+def farm_queries(count):
+    """Farm plot queries drawn from the real facet values, with varying land sizes."""
+    keys = ("soil", "month", "season", "land_type")
+    queries = []
+    for i, filters in enumerate(request_mix(crop_recommendation.crop_data, count=count, seed=count)):
+        query = {key: value for key, value in zip(keys, filters) if value}
+        query["land_size"] = 0.5 + i % 10
+        queries.append(query)
+    return queries
+
+def sequential(client, queries):
+    for query in queries:
+        response = client.get("/api/recommendations", query_string=query)
+        assert response.status_code == 200
+
+def batched(client, queries):
+    response = client.post("/api/recommendations/batch", json={"queries": queries})
+    lines = response.get_data(as_text=True).splitlines()
+    assert len(lines) == len(queries) and all(json.loads(line)["status"] == "success" for line in lines)
+
+def elapsed_ms(func, *args):
+    start = time.perf_counter()
+    func(*args)
+    return (time.perf_counter() - start) * 1000
+
+def main():
+    client = app.test_client()
+    rows = []
+    
+    for size in BATCH_SIZES:
+        queries = farm_queries(size)
+        timings = []
+        for strategy in (sequential, batched):
+            response_cache.clear()
+            cold = elapsed_ms(strategy, client, queries)
+            warm = elapsed_ms(strategy, client, queries)
+            timings.append((cold, warm))
+        
+        (seq_cold, seq_warm), (batch_cold, batch_warm) = timings
+        distinct = len({tuple(sorted((k, v) for k, v in q.items() if k != "land_size")) for q in queries})
+        rows.append((size, distinct, f"{seq_cold:.1f}", f"{batch_cold:.1f}",
+                     f"{seq_warm:.1f}", f"{batch_warm:.1f}", f"{seq_cold / batch_cold:.1f}x"))
+    
+    print("Total time for N farm plots (ms); sequential excludes network round trips")
+    print_table(("N", "distinct", "seq cold", "batch cold", "seq warm", "batch warm", "cold speedup"),
+                rows)
+
+if __name__ == "__main__":
+    main()
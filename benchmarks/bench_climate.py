@@ -0,0 +1,80 @@
+"""
+Climate remedial measures for a chat request: the previous path (find the
+matching recommendations, then deduplicate their measures with list
+membership checks) against ranking the recommendations' measures with a
+counter, and against a lookup in the precomputed measure index.
+
+Usage: python -m benchmarks.bench_climate
+"""
+
+import itertools
+import time
+
+import crop_recommendation
+from crop_recommendation import (
+    MEASURES_UNAVAILABLE,
+    MeasureIndex,
+    find_crop_recommendations,
+    get_climate_remedial_measures,
+    measure_text
+)
+from benchmarks.common import print_table, time_calls
+
+def legacy_climate_measures(climate_condition, soil_type, land_type):
+    """The previous chat path, deduplicating with `not in` on a list."""
+    recommendations = find_crop_recommendations(soil_type, None, None, land_type)
+    field = "drought_measures" if "drought" in climate_condition else "flood_measures"
+    all_measures = []
+    for rec in recommendations:
+        all_measures.extend(rec[field])
+    
+    unique_measures = []
+    for measure in all_measures:
+        if measure not in unique_measures and measure != MEASURES_UNAVAILABLE:
+            unique_measures.append(measure)
+    
+    response = f"Remedial measures for {climate_condition} conditions:\n\n"
+    for i, measure in enumerate(unique_measures[:7], 1):
+        response += f"{i}. {measure_text(measure)}\n\n"
+    return response
+
+def ranked_climate_measures(climate_condition, soil_type, land_type):
+    """Rank the matching recommendations' measures with a counter."""
+    recommendations = find_crop_recommendations(soil_type, None, None, land_type)
+    return get_climate_remedial_measures(climate_condition, recommendations)
+
+def indexed_climate_measures(climate_condition, soil_type, land_type):
+    """Look the measures up in the measure index, as the chat endpoint does."""
+    return get_climate_remedial_measures(climate_condition, soil_type=soil_type, land_type=land_type)
+
+def main():
+    soils = [None] + crop_recommendation.get_options("SOIL TYPE")
+    lands = [None] + crop_recommendation.get_options("LAND TYPE")
+    scopes = {
+        "whole dataset": [(None, None)],
+        "land type only": [(None, land) for land in lands[1:]],
+        "soil and land type": list(itertools.product(soils[1:], lands[1:])),
+    }
+    
+    rows = []
+    for scope, pairs in scopes.items():
+        calls = [(condition, soil, land) for condition in ("drought", "flood") for soil, land in pairs]
+        matched = max(len(find_crop_recommendations(soil, None, None, land)) for soil, land in pairs)
+        timings = [
+            time_calls(func, calls, repeat=20)
+            for func in (legacy_climate_measures, ranked_climate_measures, indexed_climate_measures)
+        ]
+        rows.append((scope, matched, *(f"{stats['p50']:.1f}" for stats in timings),
+                     f"{timings[0]['p50'] / timings[2]['p50']:,.0f}x"))
+    
+    print("Latency per request in microseconds (p50)")
+    print_table(("filters", "max rows", "previous", "counter", "index", "speedup"), rows)
+    
+    records = crop_recommendation.crop_records
+    start = time.perf_counter()
+    MeasureIndex(records, crop_recommendation.measure_table)
+    print(f"\nBuilding the measure index for {len(records)} rows: "
+          f"{(time.perf_counter() - start) * 1000:.1f} ms per dataset load")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Chat follow-ups: answering "what about flood?" by searching the dataset for
+the restated filters again against ranking the result set stored with the
+conversation, plus the memory and eviction costs of the conversation store.
+
+Each conversation of the mix first gets crop recommendations for a filter
+combination, then asks for drought and flood measures. Stored conversations
+hold references to the records the recommendation found, so their memory
+is the slots and the list, not the records.
+
+Usage: python -m benchmarks.bench_conversation [--conversations 10000]
+"""
+
+import argparse
+import time
+import tracemalloc
+
+import crop_recommendation
+from benchmarks.bench_index import request_mix
+from benchmarks.common import print_table, time_calls
+from conversation_store import NEW_CONVERSATION, Conversation, ConversationStore, new_conversation_id
+from crop_recommendation import (
+    RecommendationList,
+    dataset_version,
+    find_crop_recommendations,
+    find_crop_records,
+    get_climate_remedial_measures
+)
+
+CONDITIONS = ("drought", "flood")
+
+def start_conversations(store, combos):
+    """Store a conversation per filter combination, as after its first message; return their IDs."""
+    ids = []
+    for soil_type, month, season, land_type in combos:
+        conversation_id = new_conversation_id()
+        slots = {"soil_type": soil_type, "month": month, "season": season,
+                 "land_type": land_type, "land_size": 1.0}
+        key = (soil_type, month, season, land_type)
+        store.set(conversation_id, Conversation(slots, dataset_version(), None, key, find_crop_records(*key)))
+        ids.append(conversation_id)
+    return ids
+
+def rerun_follow_up(condition, soil_type, month, season, land_type):
+    """The follow-up without conversation state: search again, rank the recommendation dicts."""
+    return get_climate_remedial_measures(condition, find_crop_recommendations(soil_type, month, season, land_type))
+
+def stored_follow_up(store, conversation_id, condition):
+    """The follow-up from the stored result set, ranked on the records' measure IDs."""
+    conversation = store.get(conversation_id)
+    records = conversation.result_for(dataset_version(), conversation.result_key)
+    return get_climate_remedial_measures(condition, RecommendationList(records))
+
+def store_bytes(count, combos):
+    """Bytes traced for a store of `count` conversations over already found result sets."""
+    for combo in combos:
+        find_crop_records(*combo)
+    tracemalloc.start()
+    store = ConversationStore(maxsize=count)
+    start_conversations(store, (combos[i % len(combos)] for i in range(count)))
+    traced = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return traced
+
+def expiry_cost(count):
+    """Microseconds per conversation expired by the TTL, and per one evicted over the size bound."""
+    store = ConversationStore(maxsize=count, ttl=0.05)
+    for i in range(count):
+        store.set(str(i), NEW_CONVERSATION)
+    time.sleep(0.06)
+    start = time.perf_counter()
+    store.get("0")
+    expired = (time.perf_counter() - start) * 1e6 / count
+    assert len(store) == 0 and store.expirations == count
+    
+    store = ConversationStore(maxsize=count)
+    for i in range(count):
+        store.set(str(i), NEW_CONVERSATION)
+    start = time.perf_counter()
+    for i in range(count, 2 * count):
+        store.set(str(i), NEW_CONVERSATION)
+    evicted = (time.perf_counter() - start) * 1e6 / count
+    assert len(store) == count and store.evictions == count
+    return expired, evicted
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--conversations", type=int, default=10000, help="conversations held by the store")
+    args = parser.parse_args()
+    
+    combos = request_mix(crop_recommendation.crop_data)
+    store = ConversationStore()
+    ids = start_conversations(store, combos)
+    
+    rows = []
+    for condition in CONDITIONS:
+        rerun_calls = [(condition, *combo) for combo in combos]
+        stored_calls = [(store, conversation_id, condition) for conversation_id in ids]
+        for rerun_args, stored_args in zip(rerun_calls, stored_calls):
+            assert rerun_follow_up(*rerun_args) == stored_follow_up(*stored_args), rerun_args
+        
+        rerun = time_calls(rerun_follow_up, rerun_calls)
+        stored = time_calls(stored_follow_up, stored_calls)
+        rows.append((condition, f"{rerun['p50']:.0f}", f"{rerun['p95']:.0f}",
+                     f"{stored['p50']:.0f}", f"{stored['p95']:.0f}", f"{rerun['mean'] / stored['mean']:.1f}x"))
+    
+    print(f"Follow-up climate questions over {len(combos)} conversations, latency in us")
+    print_table(("condition", "re-run p50", "re-run p95", "stored p50", "stored p95", "speedup"), rows)
+    
+    traced = store_bytes(args.conversations, combos)
+    expired, evicted = expiry_cost(args.conversations)
+    print(f"\n{args.conversations:,} stored conversations: {traced / 2**20:.1f} MB traced, "
+          f"{traced / args.conversations:.0f} bytes each")
+    print(f"Expiring idle conversations: {expired:.2f} us each; evicting over the size bound: {evicted:.2f} us each")
+
+if __name__ == "__main__":
+    main()
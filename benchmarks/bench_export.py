@@ -0,0 +1,57 @@
+"""
+Compare peak memory of the streaming export endpoint with building one
+jsonify payload of the full result set, as the dataset grows 1x-20x.
+
+Usage: python -m benchmarks.bench_export
+"""
+
+import tracemalloc
+
+from flask import jsonify
+
+import crop_recommendation
+from app import app
+from benchmarks.common import scaled_dataset, print_table
+
+SCALES = (1, 5, 20)
+
+def peak_kib(func):
+    """Peak traced memory while running func, in KiB."""
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak / 1024
+
+def use_dataset(data):
+    # Both strategies read the records directly, without the optional NumPy engine
+    crop_recommendation.USE_NUMPY = False
+    crop_recommendation.install_snapshot(data)
+
+def main():
+    base = crop_recommendation.crop_data
+    client = app.test_client()
+    rows = []
+    
+    for scale in SCALES:
+        use_dataset(scaled_dataset(base, scale))
+        
+        def stream():
+            response = client.get("/api/recommendations/export", buffered=False)
+            size = sum(len(chunk) for chunk in response.response)
+            response.close()
+            return size
+        
+        def single_payload():
+            with app.test_request_context():
+                return len(jsonify(crop_recommendation.find_crop_recommendations()).get_data())
+        
+        rows.append((f"{scale}x", len(crop_recommendation.crop_records),
+                     f"{peak_kib(single_payload):.0f}", f"{peak_kib(stream):.0f}"))
+    
+    use_dataset(base)
+    print("Peak memory while exporting the whole table (KiB)")
+    print_table(("scale", "rows", "jsonify payload", "NDJSON stream"), rows)
+
+if __name__ == "__main__":
+    main()
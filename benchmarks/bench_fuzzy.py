@@ -0,0 +1,77 @@
+"""
+Latency of fuzzy_lookup.resolve for exact, approximate, transliterated and
+unknown inputs, and of the chat parser's fuzzy fallback, with what each
+resolves to.
+
+Usage: python -m benchmarks.bench_fuzzy
+"""
+
+import fuzzy_lookup
+from message_parser import parse_message
+from benchmarks.common import print_table, time_calls
+
+INPUTS = {
+    "exact": [
+        ("SOIL TYPE", "Red Soil"),
+        ("SEASON", "Summer"),
+        ("CROP NAME", "Groundnut"),
+        ("MONTH", "Thai(Mid January-Mid February)"),
+    ],
+    "approximate": [
+        ("SOIL TYPE", "red soils"),
+        ("SOIL TYPE", "blak soil"),
+        ("CROP NAME", "tomatoe"),
+        ("CROP NAME", "grundnut"),
+        ("MONTH", "margazi"),
+        ("SEASON", "sumer"),
+    ],
+    "transliterated / Tamil": [
+        ("SOIL TYPE", "karisal"),
+        ("SOIL TYPE", "கரிசல் மண்"),
+        ("MONTH", "thai month"),
+        ("MONTH", "மார்கழி மாதம்"),
+        ("LAND TYPE", "nanjai"),
+        ("CLIMATE", "வெள்ளம்"),
+    ],
+    "unknown": [
+        ("SOIL TYPE", "loam"),
+        ("CROP NAME", "xyz"),
+        ("MONTH", "someday"),
+    ],
+}
+
+MESSAGES = [
+    ("crops for blak soil in margazi",),
+    ("blak soil crops",),
+    ("what about grundnut yield in sumer",),
+    ("What should I grow in black soil during summer on wet land?",),
+]
+
+def main():
+    fuzzy_lookup.get_index("SOIL TYPE")  # build the indexes outside the timing
+    parse_message(MESSAGES[0][0])
+    
+    rows = []
+    for kind, calls in INPUTS.items():
+        stats = time_calls(fuzzy_lookup.resolve, calls, repeat=2000)
+        rows.append((kind, f"{stats['p50']:.1f}", f"{stats['p99']:.1f}"))
+    stats = time_calls(parse_message, MESSAGES, repeat=2000)
+    rows.append(("parse_message with fallback", f"{stats['p50']:.1f}", f"{stats['p99']:.1f}"))
+    
+    print("Latency in microseconds")
+    print_table(("input", "p50", "p99"), rows)
+    
+    print("\nResolutions:")
+    for calls in INPUTS.values():
+        for field, text in calls:
+            print(f"  {field:<10} {text!r} -> {fuzzy_lookup.resolve(field, text)!r}")
+    
+    print("\nChat messages, as parse_message resolves them:")
+    for (message,) in MESSAGES:
+        parsed = parse_message(message)
+        entities = {name: value for name, value in parsed._asdict().items()
+                    if value and name in ("soil_type", "month", "season", "land_type", "crops")}
+        print(f"  {message!r} -> {entities}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Benchmark the inverted index used by find_crop_recommendations against the
+previous linear list-comprehension scans, as the dataset grows 1x-100x.
+
+Usage: python -m benchmarks.bench_index
+"""
+
+import itertools
+import random
+
+import crop_recommendation
+from benchmarks.common import scaled_dataset, time_calls, print_table
+
+SCALES = (1, 10, 100)
+
+def linear_scan(data, soil_type=None, month=None, season=None, land_type=None):
+    """The filtering strategy find_crop_recommendations used before the index."""
+    filtered_data = data
+    if soil_type:
+        filtered_data = [entry for entry in filtered_data if entry.get("SOIL TYPE") == soil_type]
+    if month:
+        filtered_data = [entry for entry in filtered_data if entry.get("MONTH") == month]
+    if season:
+        filtered_data = [entry for entry in filtered_data if entry.get("SEASON") == season]
+    if land_type:
+        filtered_data = [entry for entry in filtered_data if entry.get("LAND TYPE") == land_type]
+    return filtered_data
+
+def request_mix(data, count=200, seed=7):
+    """Build a reproducible mix of filter combinations like the web UI sends."""
+    rng = random.Random(seed)
+    values = [[None] + crop_recommendation.get_options(field)
+              for field in crop_recommendation.FILTER_FIELDS]
+    combos = list(itertools.product(*values))
+    return [rng.choice(combos) for _ in range(count)]
+
+def main():
+    base = crop_recommendation.crop_data
+    calls = request_mix(base)
+    rows = []
+    
+    for scale in SCALES:
+        data = scaled_dataset(base, scale)
+        index = crop_recommendation.build_index(data)
+        
+        # Both strategies must return the same rows in the same order
+        for args in calls[:50]:
+            assert linear_scan(data, *args) == crop_recommendation.select_entries(data, index, *args)
+        
+        scan = time_calls(lambda *args: linear_scan(data, *args), calls)
+        indexed = time_calls(lambda *args: crop_recommendation.select_entries(data, index, *args), calls)
+        
+        # End-to-end find_crop_recommendations on the indexed path
+        crop_recommendation.install_snapshot(data)
+        try:
+            full = time_calls(crop_recommendation.find_crop_recommendations, calls, repeat=1)
+        finally:
+            crop_recommendation.install_snapshot(base)
+        
+        rows.append((f"{scale}x", len(data),
+                     f"{scan['p50']:.1f}", f"{indexed['p50']:.1f}",
+                     f"{scan['p95']:.1f}", f"{indexed['p95']:.1f}",
+                     f"{scan['mean'] / indexed['mean']:.1f}x", f"{full['p50']:.1f}"))
+    
+    print("Filter latency per request (microseconds)")
+    print_table(("scale", "rows", "scan p50", "index p50", "scan p95", "index p95",
+                 "speedup", "find p50"), rows)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+CSV ingestion: the previous hand conversion (read the whole CSV, dump it as
+JSON, compile every row with compile_dataset) against ingest.py on a first
+run, a rerun of an unchanged file and a rerun after editing 1% of the rows.
+
+The CSV holds --copies of the dataset, each copy with its own seeded yield
+jitter so that rows are distinct. Time is the best of --repeat runs; peak
+memory is traced in a separate run.
+
+Usage: python -m benchmarks.bench_ingest [--copies 20] [--repeat 3]
+"""
+
+import argparse
+import csv
+import json
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import columnar_dataset
+import crop_recommendation
+import ingest
+from benchmarks.common import print_table
+
+def write_csv(path, copies, edited_share=0.0, seed=3):
+    """Write `copies` jittered copies of the dataset as CSV, editing a share of the rows."""
+    rng = random.Random(seed)
+    edits = random.Random(seed + 1)
+    columns = list(ingest.COLUMNS)
+    with open(path, "w", newline="", encoding="utf-8") as file:
+        writer = csv.writer(file)
+        writer.writerow(columns)
+        for _ in range(copies):
+            for entry in crop_recommendation.crop_data:
+                row = dict(entry, YIELD=round(entry["YIELD"] * rng.uniform(0.8, 1.2), 2))
+                if edits.random() < edited_share:
+                    row["YIELD"] = round(row["YIELD"] + 1, 2)
+                writer.writerow([row.get(column, "") for column in columns])
+
+def legacy_convert(source_path, output_path):
+    """The previous pipeline: the whole CSV in memory, a JSON dump, then compile_dataset."""
+    with open(source_path, newline="", encoding="utf-8") as file:
+        rows = [
+            {name: float(value) if name == "YIELD" else int(value) if name == "CROP ID" else value
+             for name, value in record.items() if value}
+            for record in csv.DictReader(file)
+        ]
+    json_path = Path(output_path).with_suffix(".json")
+    with open(json_path, "w", encoding="utf-8") as file:
+        json.dump(rows, file, indent=2)
+    columnar_dataset.compile_dataset(rows, output_path, source=columnar_dataset.source_signature(json_path))
+
+def run_ingest(source_path, output_path, fresh):
+    """Ingest, starting from an empty staging database if fresh."""
+    staging_path = Path(output_path).with_suffix(".staging.db")
+    if fresh:
+        for path in (staging_path, Path(str(staging_path) + "-wal"), Path(str(staging_path) + "-shm")):
+            if path.exists():
+                os.remove(path)
+    return ingest.ingest(source_path, output_path)
+
+def measure(func, *args, repeat=3, setup=None):
+    """Best wall time in s over repeat runs, then the traced peak in MB of one more run."""
+    best = float("inf")
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - start)
+    
+    if setup:
+        setup()
+    tracemalloc.start()
+    func(*args)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best, peak / 2**20, result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--copies", type=int, default=20, help="copies of the dataset in the CSV")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per case")
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as directory:
+        source = Path(directory) / "crops.csv"
+        edited = Path(directory) / "crops-edited.csv"
+        write_csv(source, args.copies)
+        write_csv(edited, args.copies, edited_share=0.01)
+        legacy_output = Path(directory) / "legacy.bin"
+        output = Path(directory) / "crops.bin"
+        
+        rows = []
+        seconds, peak, _ = measure(legacy_convert, source, legacy_output, repeat=args.repeat)
+        rows.append(("previous conversion", f"{seconds:.2f}", f"{peak:.1f}", "-", "yes"))
+        
+        seconds, peak, report = measure(run_ingest, source, output, True, repeat=args.repeat)
+        rows.append(("ingest, first run", f"{seconds:.2f}", f"{peak:.1f}", report.normalized, "yes"))
+        
+        seconds, peak, report = measure(run_ingest, source, output, False, repeat=args.repeat)
+        rows.append(("ingest, unchanged", f"{seconds:.2f}", f"{peak:.1f}", report.normalized,
+                     "yes" if report.compiled else "no"))
+        assert columnar_dataset.load_compiled(output) == columnar_dataset.load_compiled(legacy_output), \
+            "ingest compiled different rows than the previous conversion"
+        
+        def restage():
+            run_ingest(source, output, False)
+        seconds, peak, report = measure(run_ingest, edited, output, False, repeat=args.repeat, setup=restage)
+        rows.append(("ingest, 1% edited", f"{seconds:.2f}", f"{peak:.1f}", report.normalized,
+                     "yes" if report.compiled else "no"))
+        
+        size = os.path.getsize(source)
+    
+    print(f"{report.rows:,} rows, {size / 2**20:.1f} MB of CSV; best of {args.repeat}, peak traced memory")
+    print_table(("pipeline", "seconds", "peak MB", "rows normalized", "rewrote output"), rows)
+
+if __name__ == "__main__":
+    main()
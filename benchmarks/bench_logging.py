@@ -0,0 +1,94 @@
+"""
+Throughput of /api/chat and /api/recommendations under the previous logging
+setup (basicConfig at DEBUG, written synchronously by the request thread)
+against logging_config at DEBUG and at its INFO default.
+
+Records go to a temporary file so the terminal does not skew the timings.
+The response cache is cleared before every pass, so each request runs the
+full parse, filter and format path and its debug logging.
+
+Usage: python -m benchmarks.bench_logging
+"""
+
+import logging
+import tempfile
+import time
+
+import app as app_module
+import crop_recommendation
+import logging_config
+from benchmarks.bench_index import request_mix
+from benchmarks.bench_parser import message_corpus
+from benchmarks.common import print_table
+
+def configure_previous(stream):
+    """The setup app.py used to run at import."""
+    logging_config.stop_logging()
+    logging.basicConfig(level=logging.DEBUG, stream=stream, force=True)
+
+def configure_queue(level):
+    def configure(stream):
+        logging.getLogger().handlers.clear()
+        logging_config.configure_logging(level=level, stream=stream)
+    
+    return configure
+
+CONFIGURATIONS = [
+    ("basicConfig DEBUG (previous)", configure_previous),
+    ("queue handler DEBUG", configure_queue("DEBUG")),
+    ("queue handler INFO (default)", configure_queue("INFO")),
+]
+
+def measure(client, messages, charts, repeat=3):
+    """Best-of-repeat requests per second for chat and chart requests."""
+    def chat():
+        for message in messages:
+            client.post("/api/chat", json={"message": message, "filters": {}})
+    
+    def chart():
+        for url in charts:
+            client.get(url)
+    
+    results = {}
+    for name, run, count in (("chat", chat, len(messages)), ("chart", chart, len(charts))):
+        best = float("inf")
+        for _ in range(repeat):
+            app_module.response_cache.clear()
+            start = time.perf_counter()
+            run()
+            best = min(best, time.perf_counter() - start)
+        results[name] = count / best
+    return results
+
+def main():
+    # benchmarks.common silences logging for the other benchmarks
+    logging.disable(logging.NOTSET)
+    
+    client = app_module.app.test_client()
+    messages = message_corpus(count=1000)
+    charts = [
+        "/api/recommendations?" + "&".join(f"{key}={value}" for key, value in zip(
+            ("soil", "month", "season", "land_type"), filters) if value)
+        for filters in request_mix(crop_recommendation.crop_data, count=1000)
+    ]
+    
+    rows, baseline = [], None
+    for name, configure in CONFIGURATIONS:
+        with tempfile.TemporaryFile("w+", encoding="utf-8") as stream:
+            configure(stream)
+            results = measure(client, messages, charts)
+            logging_config.stop_logging()
+            logging.getLogger().handlers.clear()
+            written = stream.tell()
+        
+        baseline = baseline or results
+        rows.append((name, f"{results['chat']:,.0f}", f"{results['chart']:,.0f}",
+                     f"{results['chat'] / baseline['chat']:.2f}x",
+                     f"{results['chart'] / baseline['chart']:.2f}x",
+                     f"{written / 1e6:,.1f}"))
+    
+    print("Requests per second through the Flask test client (response cache cleared per pass)")
+    print_table(("logging", "chat req/s", "chart req/s", "chat speedup", "chart speedup", "log MB"), rows)
+
+if __name__ == "__main__":
+    main()
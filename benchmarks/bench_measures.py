@@ -0,0 +1,78 @@
+"""
+Splitting remedial-measure texts: the previous character-by-character
+format_measures against split_measures (one pass over the paragraphs) and
+the cached format_measures, over every distinct measure text in the
+dataset and over synthetic texts of growing length.
+
+Usage: python -m benchmarks.bench_measures
+"""
+
+import time
+
+import crop_recommendation
+from crop_recommendation import format_measures, split_measures
+from benchmarks.common import print_table, time_calls
+
+def legacy_format_measures(measures_text):
+    """The splitter format_measures used before split_measures."""
+    if not measures_text:
+        return ["Information not available"]
+    
+    parts = []
+    current_part = ""
+    
+    for char in measures_text:
+        current_part += char
+        if char == '.' and len(current_part.strip()) > 0:
+            parts.append(current_part.strip())
+            current_part = ""
+    
+    if current_part.strip():
+        parts.append(current_part.strip())
+    
+    return parts if parts else ["Information not available"]
+
+def measure_texts():
+    """Every distinct remedial-measure text of the dataset."""
+    fields = (crop_recommendation.DROUGHT_MEASURES_FIELD, crop_recommendation.FLOOD_MEASURES_FIELD)
+    return sorted({entry.get(field, "") for entry in crop_recommendation.crop_data for field in fields})
+
+def long_text(texts, copies):
+    """A synthetic text made of `copies` copies of every dataset text."""
+    return "\n\n".join(texts * copies)
+
+def main():
+    texts = measure_texts()
+    calls = [(text,) for text in texts]
+    format_measures(texts[0])  # compile the patterns outside the timing
+    
+    rows = []
+    for name, func in (
+        ("previous (per character)", legacy_format_measures),
+        ("split_measures (uncached)", split_measures),
+        ("format_measures (cached)", format_measures),
+    ):
+        stats = time_calls(func, calls, repeat=50)
+        rows.append((name, f"{stats['mean']:.1f}", f"{stats['p50']:.1f}", f"{stats['p99']:.1f}"))
+    
+    lengths = [len(text) for text in texts]
+    print(f"{len(texts)} distinct measure texts, {min(lengths)}-{max(lengths)} characters; "
+          "latency per text in microseconds")
+    print_table(("splitter", "mean", "p50", "p99"), rows)
+    
+    rows = []
+    for copies in (1, 10, 100):
+        text = long_text(texts, copies)
+        timings = []
+        for func in (legacy_format_measures, split_measures):
+            start = time.perf_counter()
+            func(text)
+            timings.append((time.perf_counter() - start) * 1000)
+        rows.append((f"{len(text):,}", f"{timings[0]:.2f}", f"{timings[1]:.2f}",
+                     f"{timings[0] / timings[1]:.1f}x"))
+    
+    print("\nOne text made of repeated dataset texts, time in ms")
+    print_table(("characters", "previous", "split_measures", "speedup"), rows)
+
+if __name__ == "__main__":
+    main()
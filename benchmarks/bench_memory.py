@@ -0,0 +1,75 @@
+"""
+Report the resident memory of one worker process after loading the dataset,
+with and without interning of the remedial-measure text
+(FARMBOT_INTERN_MEASURES), against the original load: the JSON file parsed
+with a separate copy of the text in every row.
+
+Interning only changes the JSON load. The compiled dataset (the default
+when csvjson.bin is up to date) already decodes each pooled text once and
+shares it between rows, so it gets the saving in both modes.
+
+Each mode is measured in a fresh interpreter, as a gunicorn worker would be.
+
+Usage: python -m benchmarks.bench_memory
+"""
+
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+from benchmarks.common import print_table
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+PROBE = """
+import json, logging, tracemalloc
+logging.disable(logging.CRITICAL)
+
+def rss_kib():
+    with open("/proc/self/status") as status:
+        for line in status:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+
+before = rss_kib()
+tracemalloc.start()
+import crop_recommendation
+traced = tracemalloc.get_traced_memory()[0]
+tracemalloc.stop()
+table = crop_recommendation.measure_table
+print(json.dumps({
+    "rss_kib": rss_kib() - before,
+    "traced_kib": traced // 1024,
+    "items": len(table),
+    "references": sum(len(r.drought_ids) + len(r.flood_ids) for r in crop_recommendation.crop_records),
+}))
+"""
+
+def measure(intern, dataset_format):
+    """Import the recommendation module in a fresh interpreter and report its footprint."""
+    env = dict(os.environ, FARMBOT_INTERN_MEASURES="1" if intern else "0",
+               FARMBOT_DATASET_FORMAT=dataset_format)
+    output = subprocess.run([sys.executable, "-c", PROBE], cwd=PROJECT_ROOT, env=env,
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def main():
+    modes = [
+        ("JSON, per-row copies (original)", measure(False, "json")),
+        ("JSON, interned", measure(True, "json")),
+        ("compiled, not interned", measure(False, "auto")),
+        ("compiled, interned (default)", measure(True, "auto")),
+    ]
+    original = modes[0][1]
+    print_table(("mode", "RSS growth KiB", "traced KiB", "RSS saved KiB", "traced saved KiB"), [
+        (name, result["rss_kib"], result["traced_kib"],
+         original["rss_kib"] - result["rss_kib"], original["traced_kib"] - result["traced_kib"])
+        for name, result in modes
+    ])
+    default = modes[-1][1]
+    print(f"\n{default['references']} measure item references share {default['items']} table entries")
+
+if __name__ == "__main__":
+    main()
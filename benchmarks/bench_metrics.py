@@ -0,0 +1,80 @@
+"""
+Overhead of the latency instrumentation and the sampling profiler on
+/api/chat and /api/recommendations throughput.
+
+The instrumentation is configured at import, so each configuration runs in
+its own interpreter. Usage: python -m benchmarks.bench_metrics
+"""
+
+import json
+import os
+import subprocess
+import sys
+import time
+
+CONFIGURATIONS = [
+    ("metrics off", {"FARMBOT_METRICS": "0", "FARMBOT_PROFILER": "0"}),
+    ("metrics on", {"FARMBOT_METRICS": "1", "FARMBOT_PROFILER": "0"}),
+    ("metrics on + profiler", {"FARMBOT_METRICS": "1", "FARMBOT_PROFILER": "1"}),
+]
+
+def measure(repeat=5):
+    """Best-of-repeat requests per second for chat and chart requests."""
+    from app import app
+    from benchmarks.bench_index import request_mix
+    from benchmarks.bench_parser import message_corpus
+    import crop_recommendation
+    
+    client = app.test_client()
+    messages = message_corpus(count=1000)
+    charts = [
+        "/api/recommendations?" + "&".join(f"{key}={value}" for key, value in zip(
+            ("soil", "month", "season", "land_type"), filters) if value)
+        for filters in request_mix(crop_recommendation.crop_data, count=1000)
+    ]
+    
+    def chat():
+        for message in messages:
+            client.post("/api/chat", json={"message": message, "filters": {}})
+    
+    def chart():
+        for url in charts:
+            client.get(url)
+    
+    results = {}
+    for name, run, count in (("chat", chat, len(messages)), ("chart", chart, len(charts))):
+        run()  # warm the caches
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            run()
+            best = min(best, time.perf_counter() - start)
+        results[name] = count / best
+    return results
+
+def main():
+    if "--worker" in sys.argv:
+        import logging
+        logging.disable(logging.INFO)
+        print(json.dumps(measure()))
+        return
+    
+    from benchmarks.common import print_table
+    
+    rows, baseline = [], None
+    for name, env in CONFIGURATIONS:
+        output = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_metrics", "--worker"],
+            env={**os.environ, **env}, capture_output=True, text=True, check=True
+        ).stdout
+        results = json.loads(output.strip().splitlines()[-1])
+        baseline = baseline or results
+        rows.append((name, f"{results['chat']:,.0f}", f"{results['chart']:,.0f}",
+                     f"{(1 - results['chat'] / baseline['chat']) * 100:+.1f}%",
+                     f"{(1 - results['chart'] / baseline['chart']) * 100:+.1f}%"))
+    
+    print("Requests per second through the Flask test client (cached responses)")
+    print_table(("configuration", "chat req/s", "chart req/s", "chat overhead", "chart overhead"), rows)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""
+Compare the pure-Python and NumPy backends of find_crop_recommendations and
+format_recommendations_for_chart on datasets grown 1x-100x.
+
+Requires NumPy. Usage: python -m benchmarks.bench_numpy
+"""
+
+import crop_recommendation
+import numpy_backend
+from benchmarks.bench_index import request_mix
+from benchmarks.common import scaled_dataset, time_calls, print_table
+
+SCALES = (1, 10, 100)
+
+def use_dataset(data, numpy_enabled):
+    """Point the recommendation module at a dataset and backend."""
+    crop_recommendation.USE_NUMPY = numpy_enabled
+    crop_recommendation.install_snapshot(data)
+
+def chart_request(*args):
+    recommendations = crop_recommendation.find_crop_recommendations(*args)
+    return crop_recommendation.format_recommendations_for_chart(recommendations)
+
+def main():
+    if not numpy_backend.available():
+        raise SystemExit("NumPy is not installed")
+    
+    base = crop_recommendation.crop_data
+    calls = [args + (2.5,) for args in request_mix(base, count=100)]
+    rows = []
+    
+    for scale in SCALES:
+        data = scaled_dataset(base, scale)
+        results = {}
+        for name, numpy_enabled in (("python", False), ("numpy", True)):
+            use_dataset(data, numpy_enabled)
+            results[name] = ([chart_request(*args) for args in calls[:20]],
+                             time_calls(chart_request, calls, repeat=1))
+        
+        assert results["python"][0] == results["numpy"][0], "backends disagree"
+        python, numpy = results["python"][1], results["numpy"][1]
+        rows.append((f"{scale}x", len(data), f"{python['p50']:.0f}", f"{numpy['p50']:.0f}",
+                     f"{python['p95']:.0f}", f"{numpy['p95']:.0f}",
+                     f"{python['mean'] / numpy['mean']:.1f}x"))
+    
+    use_dataset(base, numpy_backend.available())
+    print("find_crop_recommendations + chart formatting per request (microseconds)")
+    print_table(("scale", "rows", "python p50", "numpy p50", "python p95", "numpy p95", "speedup"), rows)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Bytes on the wire and modelled time to interactive of the chat page, for a
+first visit and a repeat visit with a warm browser cache.
+
+"previous" requests the page, the local static files and the initial
+/api/options call the way the page did before web_assets: unhashed static
+URLs revalidated on every visit, no compression and no ETag on the page.
+"current" accepts gzip (and br when brotli is installed), follows the
+hashed static URLs the page now links and revalidates the page with its
+ETag. The CDN stylesheets and scripts are the same in both and left out.
+
+Time to interactive is modelled from the measured bytes on throttled
+network profiles: one round trip to connect, then the page, then the local
+static files in parallel, then /api/options once app.js runs. Each request
+costs a round trip plus its response bytes at the profile's bandwidth;
+cached files cost nothing.
+
+Usage: python -m benchmarks.bench_pages
+"""
+
+import re
+
+import app as app_module
+import web_assets
+from benchmarks.common import print_table
+
+# (name, downstream kbit/s, round-trip time in ms), after the browser throttling presets
+NETWORK_PROFILES = [
+    ("Slow 3G", 400, 400),
+    ("Regular 3G", 750, 100),
+    ("Fast 3G", 1600, 40),
+    ("4G", 9000, 20),
+]
+
+ACCEPT_ENCODING = "gzip, deflate, br"
+
+def wire_bytes(response):
+    """Size of a response on the wire: status line, headers and body."""
+    status = len(f"HTTP/1.1 {response.status}\r\n")
+    headers = sum(len(key) + len(value) + 4 for key, value in response.headers.items())
+    return status + headers + 2 + len(response.get_data())
+
+def static_urls(page):
+    """Local static URLs linked by a rendered page."""
+    return re.findall(r"""(/static/[^"'\s]+)""", page)
+
+def visit(client, current, cache):
+    """
+    Load the chat page like a browser.
+    
+    Args:
+        client: Flask test client
+        current (bool): Use compression, hashed URLs and page ETags
+        cache (dict): Browser cache of URL -> (ETag, immutable), filled in
+    
+    Returns:
+        list: (stage, bytes) per request sent, in the order they depend on each other
+    """
+    headers = {"Accept-Encoding": ACCEPT_ENCODING} if current else {}
+    
+    def get(url, conditional=True):
+        cached = cache.get(url)
+        if cached and cached[1]:
+            return None
+        request_headers = dict(headers)
+        if cached and cached[0] and conditional:
+            request_headers["If-None-Match"] = cached[0]
+        response = client.get(url, headers=request_headers)
+        if response.status_code == 200:
+            cache[url] = (response.headers.get("ETag"), "immutable" in response.headers.get("Cache-Control", ""))
+        return response
+    
+    requests = []
+    page = get("/", conditional=current)
+    requests.append(("page", wire_bytes(page)))
+    html = client.get("/").get_data(as_text=True)
+    
+    for url in static_urls(html):
+        if not current:
+            url = url.split("?", 1)[0]
+        response = get(url)
+        if response is not None:
+            requests.append(("static", wire_bytes(response)))
+    
+    requests.append(("options", wire_bytes(get("/api/options"))))
+    return requests
+
+def time_to_interactive(requests, bandwidth_kbps, rtt_ms):
+    """Modelled time to interactive in ms for the requests of one visit."""
+    bytes_per_ms = bandwidth_kbps * 1000 / 8 / 1000
+    total = rtt_ms  # connection setup
+    for stage in ("page", "static", "options"):
+        sizes = [size for name, size in requests if name == stage]
+        if sizes:
+            # Requests of a stage share the link and are sent together
+            total += rtt_ms + sum(sizes) / bytes_per_ms
+    return total
+
+def main():
+    client = app_module.app.test_client()
+    
+    results = {}
+    for name, current in (("previous", False), ("current", True)):
+        cache = {}
+        first = visit(client, current, cache)
+        repeat = visit(client, current, cache)
+        results[name] = (first, repeat)
+    
+    rows = []
+    for name, (first, repeat) in results.items():
+        for label, requests in (("first visit", first), ("repeat visit", repeat)):
+            by_stage = {stage: sum(size for s, size in requests if s == stage) for stage in ("page", "static", "options")}
+            rows.append((name, label, len(requests), *(f"{by_stage[stage]:,}" for stage in by_stage),
+                         f"{sum(by_stage.values()):,}"))
+    
+    encodings = "br, gzip" if web_assets.brotli is not None else "gzip (brotli not installed)"
+    print(f"Bytes on the wire per visit (local requests only; encodings: {encodings})")
+    print_table(("version", "visit", "requests", "page", "static", "options", "total"), rows)
+    
+    rows = []
+    for profile, bandwidth, rtt in NETWORK_PROFILES:
+        row = [profile]
+        for index in (0, 1):
+            before = time_to_interactive(results["previous"][index], bandwidth, rtt)
+            after = time_to_interactive(results["current"][index], bandwidth, rtt)
+            row += [f"{before:,.0f}", f"{after:,.0f}", f"{(1 - after / before) * 100:.0f}%"]
+        rows.append(row)
+    
+    print("\nModelled time to interactive in ms")
+    print_table(("network", "first previous", "first current", "saved",
+                 "repeat previous", "repeat current", "saved"), rows)
+
+if __name__ == "__main__":
+    main()
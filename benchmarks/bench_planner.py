@@ -0,0 +1,122 @@
+"""
+Crop rotation planning: the plan-year assignments of crop_planner against
+trying every crop sequence, which is only feasible for a few months, a
+check that multi-year plans never repeat a crop within a plan year where
+the best crop of every month would, and planning times for one- to
+ten-year horizons over every soil and land type of the dataset.
+
+Usage: python -m benchmarks.bench_planner
+"""
+
+import itertools
+import time
+
+import crop_planner
+import crop_recommendation
+from benchmarks.common import print_table, time_calls
+
+def brute_force_total(matrix, start, months):
+    """Highest summed base yield over every sequence of distinct crops (months up to a year)."""
+    best = 0.0
+    for sequence in itertools.product([None, *range(len(matrix.crops))], repeat=months):
+        planted = [crop for crop in sequence if crop is not None]
+        if len(planted) != len(set(planted)):
+            continue
+        total = 0.0
+        for step, crop in enumerate(sequence):
+            if crop is None:
+                continue
+            record = matrix.records[(start + step) % len(crop_recommendation.MONTH_ORDER)][crop]
+            if record is None:
+                break
+            total += record.base_yield
+        else:
+            best = max(best, total)
+    return best
+
+def repeats(sequence):
+    """Number of crops planted more than once in a plan year of the sequence, over all years."""
+    year = len(crop_recommendation.MONTH_ORDER)
+    count = 0
+    for first in range(0, len(sequence), year):
+        planted = [crop for crop in sequence[first:first + year] if crop is not None]
+        count += len(planted) - len(set(planted))
+    return count
+
+def month_best(matrix, start, months):
+    """The highest-yielding crop of every month, ignoring the rotation rules."""
+    sequence = []
+    for step in range(months):
+        row = matrix.records[(start + step) % len(crop_recommendation.MONTH_ORDER)]
+        yields = [(record.base_yield, crop) for crop, record in enumerate(row) if record is not None]
+        sequence.append(max(yields)[1] if yields else None)
+    return sequence
+
+def sequence_total(matrix, start, sequence):
+    """Summed base yield of a planned sequence."""
+    return sum(
+        matrix.records[(start + step) % len(crop_recommendation.MONTH_ORDER)][crop].base_yield
+        for step, crop in enumerate(sequence) if crop is not None
+    )
+
+def main():
+    scopes = [(soil, land) for soil in crop_recommendation.get_options("SOIL TYPE")
+              for land in crop_recommendation.get_options("LAND TYPE")]
+    
+    rows = []
+    for months in (2, 3):
+        brute_seconds = plan_seconds = 0.0
+        for soil, land in scopes:
+            matrix = crop_planner.yield_matrix(soil, land)
+            # Start where the best crop of the first two months is the same, so
+            # the distinct-crop rule has to give up some yield
+            start = next((position for position in range(len(crop_recommendation.MONTH_ORDER))
+                          if len(set(month_best(matrix, position, 2))) == 1), 0)
+            begin = time.perf_counter()
+            expected = brute_force_total(matrix, start, months)
+            brute_seconds += time.perf_counter() - begin
+            begin = time.perf_counter()
+            planned = sequence_total(matrix, start, crop_planner.best_sequence(matrix, start, months))
+            plan_seconds += time.perf_counter() - begin
+            assert abs(planned - expected) < 1e-6, (soil, land, months, planned, expected)
+        rows.append((months, f"{brute_seconds / len(scopes) * 1000:,.2f}",
+                     f"{plan_seconds / len(scopes) * 1000:.3f}"))
+    
+    print(f"Same optimum as brute force on all {len(scopes)} soil and land types; ms per plan")
+    print_table(("months", "brute force", "assignment"), rows)
+    
+    rows = []
+    for months in (12, 24):
+        greedy = planned = 0
+        for soil, land in scopes:
+            matrix = crop_planner.yield_matrix(soil, land)
+            sequence = crop_planner.best_sequence(matrix, 0, months)
+            assert repeats(sequence) == 0, (soil, land, months, sequence)
+            assert all(a is None or a != b for a, b in zip(sequence, sequence[1:])), (soil, land, months)
+            greedy += repeats(month_best(matrix, 0, months))
+            planned += repeats(sequence)
+        rows.append((months, greedy, planned))
+    
+    print(f"\nCrops planted again within a plan year, summed over all {len(scopes)} soil and land types")
+    print_table(("months", "best crop per month", "plan"), rows)
+    
+    crops = max(len(crop_planner.yield_matrix(soil, land).crops) for soil, land in scopes)
+    calls = [(soil, land, 1.0) for soil, land in scopes]
+    rows = []
+    for months in (12, 36, 60, 120):
+        cold = []
+        for soil, land in scopes:
+            crop_planner._yield_matrix.cache_clear()
+            crop_planner._block_plans.cache_clear()
+            start = time.perf_counter()
+            crop_planner.plan_rotation(soil, land, 1.0, months)
+            cold.append((time.perf_counter() - start) * 1000)
+        warm = time_calls(crop_planner.plan_rotation, [call + (months,) for call in calls], repeat=20)
+        rows.append((months, f"{max(cold):.2f}", f"{warm['p50'] / 1000:.3f}", f"{warm['p99'] / 1000:.3f}"))
+    
+    print(f"\nplan_rotation in ms, up to {crops} crops per soil and land type "
+          "(cold: building the yield matrix and solving the plan years first)")
+    print_table(("months", "cold max", "warm p50", "warm p99"), rows)
+
+if __name__ == "__main__":
+    main()
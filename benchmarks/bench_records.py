@@ -0,0 +1,77 @@
+"""
+Measure memory and allocations per find_crop_recommendations request with the
+precomputed CropRecord objects, compared with rebuilding every recommendation
+(float parsing and format_measures) from the raw entries on each call.
+
+Usage: python -m benchmarks.bench_records
+"""
+
+import tracemalloc
+
+import crop_recommendation
+from crop_recommendation import format_measures
+from benchmarks.bench_index import request_mix
+from benchmarks.common import time_calls, print_table
+
+def legacy_find(soil_type=None, month=None, season=None, land_type=None, land_size=1.0):
+    """find_crop_recommendations as it was before records were precomputed."""
+    entries = crop_recommendation.select_entries(
+        crop_recommendation.crop_data, crop_recommendation.crop_index,
+        soil_type, month, season, land_type)
+    recommendations = []
+    for entry in entries:
+        expected_yield = float(entry.get("YIELD", 0)) * land_size * 2.471 / 1000
+        recommendations.append({
+            "crop_name": entry.get("CROP NAME", "Unknown Crop"),
+            "soil_type": entry.get("SOIL TYPE", "Unknown"),
+            "month": entry.get("MONTH", "Unknown"),
+            "season": entry.get("SEASON", "Unknown"),
+            "land_type": entry.get("LAND TYPE", "Unknown"),
+            "expected_yield": round(expected_yield, 2),
+            "drought_measures": format_measures(
+                entry.get("REMEDIAL MEASURES - DROUGHT", "Information not available")),
+            "flood_measures": format_measures(
+                entry.get("REMEDIAL MEASURE - FLOOD", "Information not available"))
+        })
+    return recommendations
+
+def allocations(func, calls):
+    """Average allocated bytes and blocks retained by one request's result."""
+    total_bytes = total_blocks = peak = 0
+    for args in calls:
+        tracemalloc.start()
+        before = tracemalloc.take_snapshot()
+        result = func(*args)
+        after = tracemalloc.take_snapshot()
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+        stats = after.compare_to(before, "filename")
+        total_bytes += sum(stat.size_diff for stat in stats if stat.size_diff > 0)
+        total_blocks += sum(stat.count_diff for stat in stats if stat.count_diff > 0)
+        del result
+    return total_bytes / len(calls), total_blocks / len(calls), peak
+
+def main():
+    calls = [args + (2.5,) for args in request_mix(crop_recommendation.crop_data, count=60)]
+    rows = []
+    
+    for name, func in (("rebuild per request", legacy_find),
+                       ("precomputed records", crop_recommendation.find_crop_recommendations)):
+        size, blocks, peak = allocations(func, calls)
+        latency = time_calls(func, calls, repeat=3)
+        rows.append((name, f"{size / 1024:.1f}", f"{blocks:.0f}", f"{peak / 1024:.1f}",
+                     f"{latency['p50']:.1f}", f"{latency['p95']:.1f}"))
+    
+    print("Per request (average over the request mix)")
+    print_table(("strategy", "alloc KiB", "alloc blocks", "peak KiB", "p50 us", "p95 us"), rows)
+    
+    tracemalloc.start()
+    measures = crop_recommendation.MeasureTable()
+    records = [crop_recommendation.CropRecord.from_entry(entry, measures)
+               for entry in crop_recommendation.crop_data]
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print(f"\nOne-off cost of {len(records)} records at load: {size / 1024:.1f} KiB")
+
+if __name__ == "__main__":
+    main()
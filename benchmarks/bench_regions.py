@@ -0,0 +1,117 @@
+"""
+Regional datasets: loading every region when the worker starts against the
+lazy registry of dataset_registry, which loads a region on its first request
+and evicts the least recently used ones beyond a memory budget.
+
+Writes --regions copies of the dataset, each with its own seeded yield
+jitter, to a temporary directory, then replays a skewed request stream
+(a few busy districts, a long tail of quiet ones) against registries whose
+budget fits a quarter, half or all of the regions.
+
+Usage: python -m benchmarks.bench_regions [--regions 40] [--requests 1000]
+"""
+
+import argparse
+import json
+import random
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import crop_recommendation
+from benchmarks.common import print_table, summarize
+from dataset_registry import DatasetRegistry
+
+def write_regions(directory, count, seed=11):
+    """Write `count` region files, the dataset with jittered yields; return their names."""
+    rng = random.Random(seed)
+    with open(crop_recommendation.DATA_PATH, encoding="utf-8") as file:
+        data = json.load(file)
+    
+    names = []
+    for number in range(count):
+        name = f"district-{number:02d}"
+        region = []
+        for entry in data:
+            entry = dict(entry)
+            if isinstance(entry.get("YIELD"), (int, float)):
+                entry["YIELD"] = round(entry["YIELD"] * rng.uniform(0.8, 1.2), 2)
+            region.append(entry)
+        with open(Path(directory) / f"{name}.json", "w", encoding="utf-8") as file:
+            json.dump(region, file)
+        names.append(name)
+    return names
+
+def eager_load(directory, names):
+    """Load every region up front, as a worker without the registry would; return the snapshots."""
+    return {
+        name: crop_recommendation.build_snapshot(
+            crop_recommendation.load_data(path=Path(directory) / f"{name}.json"),
+            crop_recommendation.next_version()
+        )
+        for name in names
+    }
+
+def request_stream(names, requests, seed=5):
+    """Region of every request, Zipf-distributed over the regions."""
+    rng = random.Random(seed)
+    weights = [1 / rank for rank in range(1, len(names) + 1)]
+    return rng.choices(names, weights=weights, k=requests)
+
+def traced_region(directory, name):
+    """Bytes allocated by loading one region, as traced, and as estimated by the registry."""
+    tracemalloc.start()
+    dataset = crop_recommendation.build_snapshot(
+        crop_recommendation.load_data(path=Path(directory) / f"{name}.json"),
+        crop_recommendation.next_version()
+    )
+    traced = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return traced, crop_recommendation.estimate_snapshot_size(dataset)
+
+def replay(directory, names, budget, requests):
+    """Replay the request stream against a fresh registry; return a result row."""
+    registry = DatasetRegistry(directory, budget)
+    cold, warm = [], []
+    for region in request_stream(names, requests):
+        loads = registry.loads
+        start = time.perf_counter()
+        registry.get(region)
+        (cold if registry.loads > loads else warm).append((time.perf_counter() - start) * 1000)
+    
+    stats = registry.stats()
+    cold, warm = summarize(cold), summarize(warm)
+    return (f"{budget / 2**20:.1f}", f"{stats['estimated_bytes'] / 2**20:.1f}", len(stats["loaded"]),
+            stats["loads"], stats["evictions"], f"{warm['count'] / requests:.1%}",
+            f"{cold['p50']:.1f}", f"{cold['p99']:.1f}", f"{warm['p50']:.4f}", f"{warm['p99']:.4f}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--regions", type=int, default=40, help="number of regional datasets")
+    parser.add_argument("--requests", type=int, default=1000, help="requests replayed")
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as directory:
+        names = write_regions(directory, args.regions)
+        traced, region_bytes = traced_region(directory, names[0])
+        
+        start = time.perf_counter()
+        snapshots = eager_load(directory, names)
+        eager_seconds = time.perf_counter() - start
+        eager_bytes = sum(map(crop_recommendation.estimate_snapshot_size, snapshots.values()))
+        del snapshots
+        
+        replays = [replay(directory, names, region_bytes * max(1, round(args.regions * share)), args.requests)
+                   for share in (0.25, 0.5, 1.0)]
+    
+    print(f"{args.regions} regions of {len(crop_recommendation.crop_data)} rows, "
+          f"{region_bytes / 2**20:.2f} MB estimated ({traced / 2**20:.2f} MB traced) each")
+    print(f"Loading all at startup: {eager_seconds:.2f} s, {eager_bytes / 2**20:.1f} MB held")
+    print(f"\nLazy registry, {args.requests} Zipf-distributed requests; "
+          "lookup latency in ms for a region being loaded (cold) or already loaded (warm)")
+    print_table(("budget MB", "held MB", "regions held", "loads", "evictions", "warm share",
+                 "cold p50", "cold p99", "warm p50", "warm p99"), replays)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Cross-worker result cache: how many of N forked workers compute the same
+cold query when they ask for it at once, with the stampede lock against a
+plain get-then-set, and the cost of a lookup in each store.
+
+Each cold query is a chart payload for one filter combination of the
+seeded request mix, rendered with the crop_recommendation core and padded
+with a fixed sleep standing in for a slower downstream call.
+
+Usage: python -m benchmarks.bench_shared_cache [--workers 8]
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import tempfile
+import time
+
+import crop_recommendation
+from benchmarks.bench_index import request_mix
+from benchmarks.common import print_table, time_calls
+from response_cache import LRUCache
+from shared_cache import LocalStore, SharedCache, SQLiteStore
+
+# Extra seconds every computation takes, so the workers' requests overlap
+COMPUTE_DELAY = 0.02
+
+def render(filters):
+    """Render the chart payload for a filter tuple."""
+    recommendations = crop_recommendation.find_crop_recommendations(*filters)
+    payload = crop_recommendation.format_recommendations_for_chart(recommendations)
+    return json.dumps(payload).encode("utf-8")
+
+def worker(path, queries, locked, barrier, computed):
+    """Ask for every query once, counting the computations this process ran."""
+    cache = SharedCache(SQLiteStore(path))
+    version = crop_recommendation.dataset_fingerprint()
+    
+    def compute(filters):
+        with computed.get_lock():
+            computed.value += 1
+        time.sleep(COMPUTE_DELAY)
+        return render(filters)
+    
+    for filters in queries:
+        barrier.wait()
+        if locked:
+            cache.get_or_compute(version, filters, lambda: compute(filters))
+        else:
+            # Without a lock every worker that misses computes the entry
+            name = cache.key(version, filters)
+            if cache.store.get(name) is None:
+                cache.store.set(name, compute(filters), ex=cache.ttl)
+
+def stampede(workers, queries, locked):
+    """Computations and elapsed seconds for the workers asking every query at once."""
+    context = multiprocessing.get_context("fork")
+    computed = context.Value("i", 0)
+    barrier = context.Barrier(workers)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "cache.db")
+        SQLiteStore(path)
+        processes = [context.Process(target=worker, args=(path, queries, locked, barrier, computed))
+                     for _ in range(workers)]
+        start = time.perf_counter()
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        return computed.value, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--workers", type=int, default=8, help="worker processes")
+    parser.add_argument("--queries", type=int, default=20, help="distinct cold queries")
+    args = parser.parse_args()
+    
+    queries = list(dict.fromkeys(request_mix(crop_recommendation.crop_data, count=args.queries * 5)))[:args.queries]
+    crop_recommendation.dataset_fingerprint()
+    
+    rows = []
+    for name, locked in (("get then set", False), ("stampede lock", True)):
+        computed, elapsed = stampede(args.workers, queries, locked)
+        rows.append((name, len(queries), computed, f"{computed / len(queries):.2f}", f"{elapsed:.2f}"))
+    
+    print(f"{args.workers} workers asking {len(queries)} cold queries at once "
+          f"(computation padded by {COMPUTE_DELAY * 1000:.0f} ms)")
+    print_table(("shared cache", "queries", "computations", "per query", "seconds"), rows)
+    
+    body = render(queries[0])
+    with tempfile.TemporaryDirectory() as directory:
+        stores = (("LocalStore", LocalStore()), ("SQLiteStore", SQLiteStore(os.path.join(directory, "cache.db"))))
+        rows = []
+        
+        local = LRUCache()
+        local.set("key", body)
+        stats = time_calls(local.get, [("key",)], repeat=2000)
+        rows.append(("worker LRU cache", f"{stats['p50']:.1f}", f"{stats['p99']:.1f}"))
+        
+        for name, store in stores:
+            cache = SharedCache(store)
+            cache.get_or_compute("v", queries[0], lambda: body)
+            stats = time_calls(cache.get_or_compute, [("v", queries[0], lambda: body)], repeat=2000)
+            rows.append((f"{name} hit", f"{stats['p50']:.1f}", f"{stats['p99']:.1f}"))
+        
+        stats = time_calls(render, [(filters,) for filters in queries], repeat=5)
+        rows.append(("render (no cache)", f"{stats['p50']:.1f}", f"{stats['p99']:.1f}"))
+    
+    print(f"\nLookup of a {len(body):,} byte body in microseconds")
+    print_table(("path", "p50", "p99"), rows)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Benchmark cold-start dataset loading: parsing the pretty-printed JSON file
+versus mmap-loading the compiled columnar dataset.
+
+Compiles static/data/csvjson.bin first if it is missing or stale.
+
+Usage: python -m benchmarks.bench_startup
+"""
+
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import columnar_dataset
+from benchmarks.common import summarize, print_table
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+IMPORT_PROBE = """
+import logging, time
+logging.disable(logging.CRITICAL)
+start = time.perf_counter()
+import crop_recommendation
+print((time.perf_counter() - start) * 1000)
+"""
+
+def worker_import_ms(dataset_format, runs=7):
+    """Time `import crop_recommendation` in fresh interpreters, as a worker boot would."""
+    env = dict(os.environ, FARMBOT_DATASET_FORMAT=dataset_format)
+    samples = []
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, "-c", IMPORT_PROBE], cwd=PROJECT_ROOT, env=env,
+                                capture_output=True, text=True, check=True).stdout
+        samples.append(float(output.strip().splitlines()[-1]))
+    return summarize(samples)
+
+def load_ms(load, runs=20):
+    """Time a loader function in-process."""
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        load()
+        samples.append((time.perf_counter() - start) * 1000)
+    return summarize(samples)
+
+def main():
+    source, compiled = columnar_dataset.DEFAULT_SOURCE, columnar_dataset.DEFAULT_OUTPUT
+    try:
+        columnar_dataset.load_compiled(compiled, source_path=source)
+    except columnar_dataset.DatasetFormatError:
+        columnar_dataset.main([str(source), str(compiled)])
+    
+    def load_json():
+        with open(source, "r", encoding="utf-8") as file:
+            return json.load(file)
+    
+    rows = [
+        ("parse JSON", f"{os.path.getsize(source) / 1024:.0f}",
+         *(f"{load_ms(load_json)[p]:.2f}" for p in ("p50", "p95"))),
+        ("mmap columnar", f"{os.path.getsize(compiled) / 1024:.0f}",
+         *(f"{load_ms(lambda: columnar_dataset.load_compiled(compiled, source))[p]:.2f}"
+           for p in ("p50", "p95"))),
+    ]
+    print("Dataset load (ms)")
+    print_table(("format", "file KiB", "p50", "p95"), rows)
+    
+    json_import, binary_import = worker_import_ms("json"), worker_import_ms("auto")
+    print("\nWorker import of crop_recommendation, fresh interpreter (ms)")
+    print_table(("format", "p50", "p95"), [
+        ("json", f"{json_import['p50']:.1f}", f"{json_import['p95']:.1f}"),
+        ("columnar", f"{binary_import['p50']:.1f}", f"{binary_import['p95']:.1f}"),
+    ])
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Shared helpers for the benchmark scripts.
+"""
+
+import logging
+import statistics
+import time
+
+# Keep request-path debug logging out of the measurements
+logging.disable(logging.INFO)
+
+def scaled_dataset(data, factor):
+    """
+    Grow a dataset by repeating its rows.
+    
+    Args:
+        data (list): Original crop data entries
+        factor (int): Number of copies of the dataset to concatenate
+        
+    Returns:
+        list: Dataset with len(data) * factor entries
+    """
+    return [dict(entry) for _ in range(factor) for entry in data]
+
+def time_calls(func, calls, repeat=5):
+    """
+    Time a function over a list of argument tuples.
+    
+    Args:
+        func (callable): Function under test
+        calls (list): Argument tuples, one per simulated request
+        repeat (int): Number of passes over the calls
+        
+    Returns:
+        dict: Per-call latency statistics in microseconds
+    """
+    samples = []
+    for _ in range(repeat):
+        for args in calls:
+            start = time.perf_counter()
+            func(*args)
+            samples.append((time.perf_counter() - start) * 1e6)
+    
+    return summarize(samples)
+
+def summarize(samples):
+    """Summarize latency samples (any unit) into mean and percentiles."""
+    samples = sorted(samples)
+    
+    def percentile(p):
+        return samples[min(len(samples) - 1, int(round(p / 100 * (len(samples) - 1))))]
+    
+    return {
+        "mean": statistics.fmean(samples),
+        "p50": percentile(50),
+        "p95": percentile(95),
+        "p99": percentile(99),
+        "count": len(samples),
+    }
+
+def print_table(headers, rows):
+    """Print rows as a plain text table."""
+    widths = [max(len(str(cell)) for cell in column) for column in zip(headers, *rows)]
+    line = "  ".join(f"{{:>{width}}}" for width in widths)
+    print(line.format(*headers))
+    for row in rows:
+        print(line.format(*row))
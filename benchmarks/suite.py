@@ -0,0 +1,342 @@
+"""
+Regression benchmark suite for the recommendation core and the API.
+
+Runs reproducible, seeded workloads built from the real facet values of
+csvjson.json and reports latency percentiles and throughput for each:
+
+- micro: find_crop_recommendations, format_measures and parse_message
+  called directly
+- client: /api/chat, /api/recommendations and /api/options through the
+  Flask test client, one request at a time
+- http: the same routes over real sockets against a local threaded server,
+  driven by concurrent clients
+
+plus the resident memory of the worker process (this process also serves
+the HTTP workload). The response cache is cleared before every measured
+pass, so repeated queries in a mix hit it as they would in production.
+Each figure is the median over the passes.
+
+Results are compared against benchmarks/baseline.json; a scenario whose
+p95 latency or throughput is more than --threshold worse is reported as a
+regression and the suite exits with status 1. Baselines depend on the
+machine, so record one on the box that runs the comparisons:
+    
+    python -m benchmarks.suite --save-baseline
+    python -m benchmarks.suite [--quick] [--threshold 0.25] [--only micro,client,http]
+"""
+
+import argparse
+import gc
+import http.client
+import json
+import os
+import platform
+import resource
+import statistics
+import sys
+import threading
+import time
+from urllib.parse import urlencode
+
+from werkzeug.serving import make_server
+
+import app as app_module
+import crop_recommendation
+from benchmarks.bench_index import request_mix
+from benchmarks.bench_parser import message_corpus
+from benchmarks.common import print_table, summarize
+from message_parser import parse_message
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+SECTIONS = ("micro", "client", "http")
+
+# Filter parameters of the API routes, in the order request_mix yields values
+FILTER_PARAMETERS = ("soil", "month", "season", "land_type")
+
+def filter_query(filters):
+    """URL query string for a filter tuple from request_mix."""
+    return urlencode({key: value for key, value in zip(FILTER_PARAMETERS, filters) if value})
+
+def build_workloads(count):
+    """
+    Build the seeded request mixes shared by all sections.
+    
+    Args:
+        count (int): Requests per route
+    
+    Returns:
+        dict: Filter tuples, chat messages and measure texts
+    """
+    snapshot = crop_recommendation.current_snapshot()
+    measures = sorted({
+        entry.get(field, "")
+        for entry in snapshot.data
+        for field in (crop_recommendation.DROUGHT_MEASURES_FIELD, crop_recommendation.FLOOD_MEASURES_FIELD)
+    })
+    return {
+        "filters": request_mix(snapshot.data, count=count),
+        "messages": message_corpus(count=count),
+        "measures": measures,
+    }
+
+def route_requests(workloads):
+    """(route, method, path, JSON body) lists for the API scenarios."""
+    return {
+        "/api/chat": [("POST", "/api/chat", {"message": message, "filters": {}})
+                      for message in workloads["messages"]],
+        "/api/recommendations": [("GET", f"/api/recommendations?{filter_query(filters)}", None)
+                                 for filters in workloads["filters"]],
+        "/api/options": [("GET", f"/api/options?{filter_query(filters)}", None)
+                         for filters in workloads["filters"]],
+    }
+
+def timed_pass(calls):
+    """Run calls once, returning per-call latencies in ms and the elapsed seconds."""
+    latencies = []
+    start = time.perf_counter()
+    for call in calls:
+        call_start = time.perf_counter()
+        call()
+        latencies.append((time.perf_counter() - call_start) * 1000)
+    return latencies, time.perf_counter() - start
+
+def measure(calls, repeat):
+    """
+    Latency and throughput of a list of zero-argument calls.
+    
+    The first pass warms the caches and is discarded.
+    """
+    def run():
+        latencies, elapsed = timed_pass(calls)
+        return latencies, len(calls) / elapsed
+    
+    return repeated(run, repeat)
+
+def repeated(run, repeat):
+    """
+    Repeat a measured pass and summarize it.
+    
+    Each statistic is the median over the passes, which keeps one pass
+    disturbed by the machine (a GC cycle, another process) from moving it.
+    
+    Args:
+        run (callable): Runs one pass, returning (latencies in ms, requests/sec)
+        repeat (int): Measured passes after a warm-up pass
+    """
+    app_module.response_cache.clear()
+    run()
+    passes = []
+    for _ in range(repeat):
+        app_module.response_cache.clear()
+        gc.collect()
+        latencies, rps = run()
+        stats = summarize(latencies)
+        passes.append({"p50_ms": stats["p50"], "p95_ms": stats["p95"], "p99_ms": stats["p99"], "rps": rps})
+    return {key: statistics.median(stats[key] for stats in passes) for key in passes[0]}
+
+def run_micro(workloads, repeat):
+    """Core functions called directly."""
+    find = crop_recommendation.find_crop_recommendations
+    format_measures = crop_recommendation.format_measures
+    return {
+        "find_crop_recommendations": measure(
+            [lambda filters=filters: find(*filters) for filters in workloads["filters"]], repeat),
+        "format_measures": measure(
+            [lambda text=text: format_measures(text) for text in workloads["measures"]], repeat),
+        "parse_message": measure(
+            [lambda message=message: parse_message(message) for message in workloads["messages"]], repeat),
+    }
+
+def run_client(workloads, repeat):
+    """API routes through the Flask test client."""
+    client = app_module.app.test_client()
+    
+    def call(method, path, body):
+        response = client.open(path, method=method, json=body)
+        assert response.status_code == 200, (path, response.status_code)
+    
+    return {
+        f"client {route}": measure([lambda request=request: call(*request) for request in requests], repeat)
+        for route, requests in route_requests(workloads).items()
+    }
+
+def run_http(workloads, repeat, concurrency):
+    """API routes over HTTP against a local threaded server."""
+    server = make_server("127.0.0.1", 0, app_module.app, threaded=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    
+    def call(method, path, body):
+        connection = http.client.HTTPConnection("127.0.0.1", server.server_port, timeout=30)
+        try:
+            headers = {"Content-Type": "application/json"} if body is not None else {}
+            connection.request(method, path, json.dumps(body) if body is not None else None, headers)
+            response = connection.getresponse()
+            response.read()
+            assert response.status == 200, (path, response.status)
+        finally:
+            connection.close()
+    
+    def load(requests):
+        """Send the requests from concurrent clients, each taking the next pending one."""
+        pending = iter(requests)
+        lock = threading.Lock()
+        latencies = []
+        
+        def client():
+            while True:
+                with lock:
+                    request = next(pending, None)
+                if request is None:
+                    return
+                start = time.perf_counter()
+                call(*request)
+                elapsed = (time.perf_counter() - start) * 1000
+                with lock:
+                    latencies.append(elapsed)
+        
+        clients = [threading.Thread(target=client) for _ in range(concurrency)]
+        start = time.perf_counter()
+        for client_thread in clients:
+            client_thread.start()
+        for client_thread in clients:
+            client_thread.join()
+        return latencies, time.perf_counter() - start
+    
+    results = {}
+    try:
+        for route, requests in route_requests(workloads).items():
+            def run(requests=requests):
+                latencies, elapsed = load(requests)
+                return latencies, len(requests) / elapsed
+            
+            results[f"http {route}"] = repeated(run, repeat)
+    finally:
+        server.shutdown()
+        thread.join()
+    return results
+
+def memory_usage():
+    """Current and peak resident set size of this process in MB."""
+    usage = {}
+    try:
+        with open("/proc/self/status", encoding="ascii") as status:
+            for line in status:
+                key, _, value = line.partition(":")
+                if key in ("VmRSS", "VmHWM"):
+                    usage[key] = int(value.split()[0]) / 1024
+    except OSError:
+        pass
+    # ru_maxrss is in kilobytes on Linux
+    peak = usage.get("VmHWM", resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024)
+    return {"rss_mb": usage.get("VmRSS", peak), "peak_rss_mb": peak}
+
+def compare(results, baseline, threshold):
+    """
+    Compare results with a baseline.
+    
+    Returns:
+        tuple: (table rows, names of regressed scenarios)
+    """
+    rows, regressions = [], []
+    for name, current in results["scenarios"].items():
+        previous = baseline.get("scenarios", {}).get(name)
+        if previous is None:
+            rows.append((name, "-", "-", "new"))
+            continue
+        p95_change = current["p95_ms"] / previous["p95_ms"] - 1
+        rps_change = current["rps"] / previous["rps"] - 1
+        regressed = p95_change > threshold or rps_change < -threshold / (1 + threshold)
+        if regressed:
+            regressions.append(name)
+        rows.append((name, f"{p95_change * 100:+.1f}%", f"{rps_change * 100:+.1f}%",
+                     "REGRESSION" if regressed else "ok"))
+    
+    previous_peak = baseline.get("memory", {}).get("peak_rss_mb")
+    if previous_peak:
+        peak_change = results["memory"]["peak_rss_mb"] / previous_peak - 1
+        regressed = peak_change > threshold
+        if regressed:
+            regressions.append("peak RSS")
+        rows.append(("peak RSS", "-", f"{peak_change * 100:+.1f}% MB",
+                     "REGRESSION" if regressed else "ok"))
+    return rows, regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--save-baseline", action="store_true", help="store the results as the baseline")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="baseline file")
+    parser.add_argument("--threshold", type=float, default=0.25, help="tolerated slowdown, 0.25 = 25%%")
+    parser.add_argument("--only", default=",".join(SECTIONS), help="comma-separated sections to run")
+    parser.add_argument("--quick", action="store_true", help="smaller mixes and fewer passes")
+    parser.add_argument("--concurrency", type=int, default=8, help="concurrent HTTP clients")
+    args = parser.parse_args()
+    
+    sections = [section.strip() for section in args.only.split(",") if section.strip()]
+    unknown = set(sections) - set(SECTIONS)
+    if unknown:
+        parser.error(f"unknown sections: {', '.join(sorted(unknown))}")
+    
+    count, repeat = (100, 2) if args.quick else (500, 5)
+    workloads = build_workloads(count)
+    idle_memory = memory_usage()
+    
+    scenarios = {}
+    if "micro" in sections:
+        scenarios.update(run_micro(workloads, repeat))
+    if "client" in sections:
+        scenarios.update(run_client(workloads, repeat))
+    if "http" in sections:
+        scenarios.update(run_http(workloads, repeat, args.concurrency))
+    
+    memory = memory_usage()
+    memory["idle_rss_mb"] = idle_memory["rss_mb"]
+    results = {
+        "environment": {
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+            "dataset_rows": len(crop_recommendation.current_snapshot().data),
+            "requests_per_route": count,
+            "passes": repeat,
+            "http_concurrency": args.concurrency,
+        },
+        "scenarios": scenarios,
+        "memory": memory,
+    }
+    
+    print(f"Latency in ms, median of {repeat} passes of {count} requests per scenario")
+    print_table(("scenario", "req/s", "p50", "p95", "p99"), [
+        (name, f"{stats['rps']:,.0f}", f"{stats['p50_ms']:.3f}", f"{stats['p95_ms']:.3f}", f"{stats['p99_ms']:.3f}")
+        for name, stats in scenarios.items()
+    ])
+    print(f"\nWorker RSS: {memory['idle_rss_mb']:.1f} MB after startup, {memory['rss_mb']:.1f} MB now, "
+          f"{memory['peak_rss_mb']:.1f} MB peak")
+    
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2, sort_keys=True)
+            file.write("\n")
+        print(f"\nBaseline saved to {args.baseline}")
+        return 0
+    
+    if not os.path.exists(args.baseline):
+        print(f"\nNo baseline at {args.baseline}; record one with --save-baseline")
+        return 0
+    
+    with open(args.baseline, encoding="utf-8") as file:
+        baseline = json.load(file)
+    if baseline.get("environment", {}).get("requests_per_route") != count:
+        print("\nNote: the baseline was recorded with a different mix size (--quick?)")
+    
+    rows, regressions = compare(results, baseline, args.threshold)
+    print(f"\nAgainst {args.baseline} (threshold {args.threshold * 100:.0f}%)")
+    print_table(("scenario", "p95 change", "req/s change", "status"), rows)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s): {', '.join(regressions)}")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
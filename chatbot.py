@@ -6,11 +6,17 @@ This module simulates the existing chatbot functionality.
 import logging
 import random
 from crop_data import crop_data, climate_remedies
+from term_matcher import TermMatcher
 
-# Configure logging
-logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
+# Vocabulary of user queries, compiled once for single-pass matching
+query_matcher = TermMatcher({
+    "soil": {crop['suitable_soil']: crop['suitable_soil'] for crop in reversed(crop_data)},
+    "temperature": {word: word for word in ['hot', 'cold', 'warm', 'cool', 'temperature']},
+    "rainfall": {word: word for word in ['dry', 'wet', 'rain', 'rainy', 'rainfall', 'humid']}
+})
+
 def get_crop_recommendation(user_input, filters=None):
     """
     Process user input and return crop recommendations
@@ -22,23 +28,24 @@ def get_crop_recommendation(user_input, filters=None):
     Returns:
         str: Formatted crop recommendations
     """
-    logger.debug(f"Processing crop recommendation query: {user_input}")
+    logger.debug("Processing crop recommendation query: %s", user_input)
     
     # Extract key information from user input
     # This is a simplified version - in a real system, you would use 
     # more sophisticated NLP techniques or your existing chatbot logic
     user_input = user_input.lower()
     
-    # Extract soil type, if mentioned
+    # Extract soil type and mentions of temperature or rainfall in one scan
     soil_type = None
-    for crop_info in crop_data:
-        if crop_info['suitable_soil'].lower() in user_input:
-            soil_type = crop_info['suitable_soil']
-            break
-    
-    # Extract other conditions like temperature or rainfall if mentioned
-    temperature_mentioned = any(word in user_input for word in ['hot', 'cold', 'warm', 'cool', 'temperature'])
-    rainfall_mentioned = any(word in user_input for word in ['dry', 'wet', 'rain', 'rainfall', 'humid'])
+    temperature_mentioned = False
+    rainfall_mentioned = False
+    for category, value, _ in query_matcher.finditer(user_input):
+        if category == "soil" and soil_type is None:
+            soil_type = value
+        elif category == "temperature":
+            temperature_mentioned = True
+        elif category == "rainfall":
+            rainfall_mentioned = True
     
     # Apply filters if provided
     filtered_crops = crop_data
@@ -94,7 +101,7 @@ def get_climate_remedial_measures(user_input, filters=None):
     Returns:
         str: Formatted climate remedial measures
     """
-    logger.debug(f"Processing climate remedial measures query: {user_input}")
+    logger.debug("Processing climate remedial measures query: %s", user_input)
     
     # Extract climate condition from user input
     user_input = user_input.lower()
@@ -0,0 +1,354 @@
+"""
+Compact columnar binary format for the crop dataset.
+
+The JSON dataset is compiled offline into a single file that workers read
+with mmap and decode column by column, instead of every worker parsing
+2.4 MB of JSON at import. This only makes loading faster: each worker
+decodes the rows into its own dicts and closes the mapping, so no memory
+is shared between workers after the load. Pooled strings are decoded once
+per worker and shared by the rows using them. Build the file with:
+
+    python columnar_dataset.py [source.json] [output.bin]
+
+Layout: an 8-byte magic, a little-endian u32 header length, a small JSON
+header (columns, category values, section offsets), then 8-byte aligned
+sections. Categorical columns are stored as u8/u16 codes, numeric columns
+as f64/i64 arrays and text columns as u32 references into a deduplicated
+string pool (u32 offsets followed by UTF-8 bytes).
+"""
+
+import json
+import logging
+import mmap
+import os
+import struct
+import sys
+from array import array
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"FBCOLv1\0"
+FORMAT_VERSION = 1
+
+DEFAULT_SOURCE = Path(__file__).parent / "static" / "data" / "csvjson.json"
+DEFAULT_OUTPUT = DEFAULT_SOURCE.with_suffix(".bin")
+
+# Low-cardinality columns stored as small-int codes
+CATEGORY_COLUMNS = ("SOIL TYPE", "MONTH", "SEASON", "LAND TYPE", "CROP NAME")
+
+# Markers for values missing from a row
+MISSING_CODE = {"B": 0xFF, "H": 0xFFFF}
+MISSING_TEXT = 0xFFFFFFFF
+MISSING_INT = -(2 ** 63)
+
+# Typecode a column of each kind is built in, and its missing value;
+# category codes are narrowed to u8 when few enough values occur
+KIND_TYPECODES = {"category": "H", "int": "q", "float": "d", "text": "I"}
+MISSING_VALUES = {"category": MISSING_CODE["H"], "int": MISSING_INT, "float": float("nan"), "text": MISSING_TEXT}
+
+class DatasetFormatError(Exception):
+    """Raised when a compiled dataset is missing, stale or malformed."""
+
+def source_signature(source_path):
+    """Size and modification time of the JSON source, used to detect stale builds."""
+    stat = os.stat(source_path)
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+def _column_kind(name, values):
+    if name in CATEGORY_COLUMNS:
+        return "category"
+    present = [value for value in values if value is not None]
+    if present and all(isinstance(value, int) and not isinstance(value, bool) for value in present):
+        return "int"
+    if present and all(isinstance(value, (int, float)) and not isinstance(value, bool) for value in present):
+        return "float"
+    return "text"
+
+def compile_dataset(rows, output_path, source=None):
+    """
+    Write crop data rows to the columnar binary format.
+    
+    Args:
+        rows (list): Crop data entries as loaded from JSON
+        output_path (str or Path): Destination file
+        source (dict): Optional source signature stored in the header
+    
+    Returns:
+        dict: The header written to the file
+    """
+    names = []
+    for row in rows:
+        for name in row:
+            if name not in names:
+                names.append(name)
+    
+    pool, pool_ids = [], {}
+    
+    def pool_id(text):
+        if text not in pool_ids:
+            pool_ids[text] = len(pool)
+            pool.append(text)
+        return pool_ids[text]
+    
+    columns, sections = [], []
+    for name in names:
+        values = [row.get(name) for row in rows]
+        kind = _column_kind(name, values)
+        column = {"name": name, "kind": kind}
+        
+        if kind == "category":
+            categories = list(dict.fromkeys(value for value in values if value is not None))
+            typecode = "B" if len(categories) < MISSING_CODE["B"] else "H"
+            codes = {value: code for code, value in enumerate(categories)}
+            data = array(typecode, (codes.get(value, MISSING_CODE[typecode]) for value in values))
+            column.update(values=categories, typecode=typecode)
+        elif kind == "int":
+            data = array("q", (MISSING_INT if value is None else value for value in values))
+            column["typecode"] = "q"
+        elif kind == "float":
+            data = array("d", (float("nan") if value is None else float(value) for value in values))
+            column["typecode"] = "d"
+        else:
+            data = array("I", (MISSING_TEXT if value is None else pool_id(str(value)) for value in values))
+            column["typecode"] = "I"
+        
+        columns.append(column)
+        sections.append(data)
+    
+    return _write_dataset(output_path, len(rows), columns, sections, pool, source)
+
+def _write_dataset(output_path, row_count, columns, sections, pool, source):
+    """
+    Write encoded columns and the string pool to a compiled dataset file.
+    
+    The file is written next to the destination and renamed over it, so
+    readers never see a partial file.
+    
+    Returns:
+        dict: The header written to the file
+    """
+    sections = list(sections)
+    encoded = [text.encode("utf-8") for text in pool]
+    offsets = array("I", [0])
+    for blob in encoded:
+        offsets.append(offsets[-1] + len(blob))
+    sections.extend([offsets, b"".join(encoded)])
+    
+    header = {
+        "version": FORMAT_VERSION,
+        "rows": row_count,
+        "columns": columns,
+        "pool_size": len(pool),
+        "source": source,
+    }
+    
+    # Section offsets depend on the header length, which depends on the offsets;
+    # the header is padded to a fixed size once it stops growing
+    layout = []
+    header_bytes = b""
+    while True:
+        start = _align(len(MAGIC) + 4 + len(header_bytes))
+        layout = []
+        position = start
+        for section in sections:
+            size = len(section) * section.itemsize if isinstance(section, array) else len(section)
+            layout.append([position, size])
+            position = _align(position + size)
+        header["sections"] = layout
+        encoded_header = json.dumps(header, ensure_ascii=False).encode("utf-8")
+        if len(encoded_header) <= len(header_bytes):
+            header_bytes = encoded_header.ljust(len(header_bytes))
+            break
+        header_bytes = encoded_header.ljust(_align(len(encoded_header)))
+    
+    temp_path = Path(str(output_path) + ".tmp")
+    with open(temp_path, "wb") as file:
+        file.write(MAGIC)
+        file.write(struct.pack("<I", len(header_bytes)))
+        file.write(header_bytes)
+        for section, (position, size) in zip(sections, layout):
+            file.write(b"\0" * (position - file.tell()))
+            file.write(section.tobytes() if isinstance(section, array) else section)
+    os.replace(temp_path, output_path)
+    
+    return header
+
+class ColumnarWriter:
+    """
+    Compile rows into the columnar format one row at a time.
+    
+    compile_dataset infers the column kinds from every row, so it needs
+    them all in memory. The writer takes the columns and their kinds up
+    front and only keeps the encoded columns and the string pool, so rows
+    can be streamed from a large export or a staging database (see
+    ingest.py).
+    
+    Args:
+        columns (dict): Kind ("category", "int", "float" or "text") of every
+            column by name, in file order
+    """
+    
+    def __init__(self, columns):
+        unknown = [name for name, kind in columns.items() if kind not in KIND_TYPECODES]
+        if unknown:
+            raise ValueError(f"Unknown column kind for {', '.join(unknown)}")
+        self.kinds = dict(columns)
+        self.rows = 0
+        self._data = {name: array(KIND_TYPECODES[kind]) for name, kind in self.kinds.items()}
+        self._categories = {name: {} for name, kind in self.kinds.items() if kind == "category"}
+        self._pool, self._pool_ids = [], {}
+    
+    def add(self, row):
+        """Append a row; columns missing from it are stored as missing values."""
+        for name, kind in self.kinds.items():
+            value = row.get(name)
+            data = self._data[name]
+            if value is None:
+                data.append(MISSING_VALUES[kind])
+            elif kind == "category":
+                codes = self._categories[name]
+                code = codes.get(value)
+                if code is None:
+                    if len(codes) >= MISSING_CODE["H"]:
+                        raise ValueError(f"Too many distinct values in column {name}")
+                    code = codes[value] = len(codes)
+                data.append(code)
+            elif kind == "int":
+                data.append(int(value))
+            elif kind == "float":
+                data.append(float(value))
+            else:
+                text = str(value)
+                text_id = self._pool_ids.get(text)
+                if text_id is None:
+                    text_id = self._pool_ids[text] = len(self._pool)
+                    self._pool.append(text)
+                data.append(text_id)
+        self.rows += 1
+    
+    def write(self, output_path, source=None):
+        """
+        Write the rows added so far to a compiled dataset file.
+        
+        Args:
+            output_path (str or Path): Destination file
+            source (dict): Optional source signature stored in the header
+        
+        Returns:
+            dict: The header written to the file
+        """
+        columns, sections = [], []
+        for name, kind in self.kinds.items():
+            data = self._data[name]
+            column = {"name": name, "kind": kind}
+            if kind == "category":
+                categories = list(self._categories[name])
+                if len(categories) < MISSING_CODE["B"]:
+                    missing = MISSING_CODE["H"]
+                    data = array("B", (MISSING_CODE["B"] if code == missing else code for code in data))
+                column["values"] = categories
+            column["typecode"] = data.typecode
+            columns.append(column)
+            sections.append(data)
+        return _write_dataset(output_path, self.rows, columns, sections, self._pool, source)
+
+def _align(position, boundary=8):
+    return (position + boundary - 1) // boundary * boundary
+
+def load_compiled(path, source_path=None):
+    """
+    Load crop data rows from a compiled dataset via mmap.
+    
+    Args:
+        path (str or Path): Compiled dataset file
+        source_path (str or Path): Optional JSON source; if given, the build
+            must match its current size and modification time
+    
+    Returns:
+        list: Crop data entries, identical to the JSON rows except that
+            numeric values come back as float/int from the typed arrays
+    
+    Raises:
+        DatasetFormatError: If the file is missing, stale or malformed
+    """
+    try:
+        with open(path, "rb") as file:
+            buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError) as e:
+        raise DatasetFormatError(f"Cannot open compiled dataset {path}: {e}") from e
+    
+    view = memoryview(buffer)
+    try:
+        if bytes(view[:len(MAGIC)]) != MAGIC:
+            raise DatasetFormatError(f"{path} is not a compiled crop dataset")
+        (header_length,) = struct.unpack_from("<I", buffer, len(MAGIC))
+        header_start = len(MAGIC) + 4
+        header = json.loads(bytes(view[header_start:header_start + header_length]))
+        
+        if header.get("version") != FORMAT_VERSION:
+            raise DatasetFormatError(f"Unsupported dataset format version {header.get('version')}")
+        if source_path is not None and header.get("source") != source_signature(source_path):
+            raise DatasetFormatError(f"{path} is stale relative to {source_path}")
+        
+        return _decode_rows(view, header)
+    finally:
+        view.release()
+        buffer.close()
+
+def _decode_rows(view, header):
+    sections = header["sections"]
+    offsets_position, offsets_size = sections[-2]
+    blob_position, blob_size = sections[-1]
+    offsets = view[offsets_position:offsets_position + offsets_size].cast("I")
+    blob = view[blob_position:blob_position + blob_size]
+    
+    # Each pooled string is decoded once and shared by every row using it
+    strings = [None] * header["pool_size"]
+    
+    def text(text_id):
+        value = strings[text_id]
+        if value is None:
+            value = strings[text_id] = str(blob[offsets[text_id]:offsets[text_id + 1]], "utf-8")
+        return value
+    
+    decoded = []
+    for column, (position, size) in zip(header["columns"], sections):
+        data = view[position:position + size].cast(column["typecode"])
+        kind = column["kind"]
+        if kind == "category":
+            values, missing = column["values"], MISSING_CODE[column["typecode"]]
+            decoded.append([None if code == missing else values[code] for code in data])
+        elif kind == "int":
+            decoded.append([None if value == MISSING_INT else value for value in data])
+        elif kind == "float":
+            decoded.append([None if value != value else value for value in data])
+        else:
+            decoded.append([None if text_id == MISSING_TEXT else text(text_id) for text_id in data])
+        data.release()
+    
+    offsets.release()
+    blob.release()
+    
+    names = [column["name"] for column in header["columns"]]
+    return [
+        {name: value for name, value in zip(names, values) if value is not None}
+        for values in zip(*decoded)
+    ]
+
+def main(argv=None):
+    """Compile a JSON dataset: python columnar_dataset.py [source.json] [output.bin]"""
+    argv = sys.argv[1:] if argv is None else argv
+    source_path = Path(argv[0]) if argv else DEFAULT_SOURCE
+    output_path = Path(argv[1]) if len(argv) > 1 else source_path.with_suffix(".bin")
+    
+    with open(source_path, "r", encoding="utf-8") as file:
+        rows = json.load(file)
+    
+    header = compile_dataset(rows, output_path, source=source_signature(source_path))
+    size = os.path.getsize(output_path)
+    print(f"Compiled {header['rows']} rows ({header['pool_size']} pooled strings) "
+          f"from {source_path} into {output_path}: {size / 1024:.1f} KiB")
+
+if __name__ == "__main__":
+    main()
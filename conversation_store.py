@@ -0,0 +1,205 @@
+"""
+Server-side state of chat conversations.
+
+Each browser session gets a conversation ID in its Flask session cookie.
+The store keeps, per conversation, the filters resolved so far (soil, month,
+season, land type and land size) and the last recommendation result set, so
+a follow-up such as "what about flood?" is answered for the crops just
+recommended without restating the filters or searching the dataset again.
+
+Conversations live in the worker's memory, at most a fixed number of them,
+and are dropped after a period without messages; the least recently active
+one goes first when the store is full. With FARMBOT_SHARED_CACHE set, the
+filters and the key of the last result set are also written to the shared
+store, so the next message of a conversation served by another worker
+carries them over too; that worker finds the result set again in its own
+caches, since records are not serialized.
+"""
+
+import json
+import logging
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+logger = logging.getLogger(__name__)
+
+# Conversations kept per worker, and seconds an idle one is kept
+CONVERSATION_LIMIT = int(os.environ.get("FARMBOT_CONVERSATION_LIMIT", "10000"))
+CONVERSATION_TTL = float(os.environ.get("FARMBOT_CONVERSATION_TTL", "1800"))
+
+class Conversation(namedtuple("Conversation", ["slots", "version", "fingerprint", "result_key", "records"])):
+    """
+    State of a conversation after its last message.
+    
+    `slots` maps soil_type, month, season, land_type and land_size to the
+    values resolved so far. `records` are the crop records of the last
+    recommendation, found for the filters in `result_key` in dataset
+    version `version`, or None before the first recommendation and in a
+    conversation read back from the shared store. `fingerprint` is the
+    dataset fingerprint of the result, set only when conversations are
+    shared between workers.
+    """
+    __slots__ = ()
+    
+    def result_for(self, version, key):
+        """The last result's records if they answer key in dataset version, else None."""
+        if self.records is not None and self.version == version and self.result_key == key:
+            return self.records
+        return None
+    
+    def answers(self, fingerprint, key):
+        """Whether the last result answers key in the dataset with this fingerprint."""
+        return self.fingerprint == fingerprint and self.result_key == key
+    
+    def dumps(self):
+        """Serialize everything but the records for the shared store."""
+        return json.dumps({
+            "slots": self.slots,
+            "fingerprint": self.fingerprint,
+            "result_key": self.result_key
+        }).encode("utf-8")
+    
+    @classmethod
+    def loads(cls, value):
+        """Rebuild a conversation serialized by dumps, without its records."""
+        state = json.loads(value)
+        result_key = state["result_key"]
+        return cls(state["slots"], None, state["fingerprint"],
+                   tuple(result_key) if result_key is not None else None, None)
+
+# State of a conversation before its first message
+NEW_CONVERSATION = Conversation({}, None, None, None, None)
+
+def new_conversation_id():
+    """Return a random, unguessable conversation ID."""
+    return secrets.token_urlsafe(16)
+
+class ConversationStore:
+    """
+    Thread-safe store of conversations with a size bound and an idle TTL.
+    
+    Entries are kept in order of last activity, so idle ones are always at
+    the front and expire in O(1) each. A maxsize of 0 keeps nothing.
+    
+    Conversations missing from this worker are looked up in the shared
+    store, if one is set; its errors are logged and counted, and the
+    conversation then only carries over within this worker.
+    
+    Args:
+        maxsize (int): Maximum number of conversations in this worker
+        ttl (float): Seconds after its last message a conversation is dropped
+        shared: Object with Redis-style get, set(ex) and delete, or None
+        prefix (str): Namespace of the keys in the shared store
+    """
+    
+    def __init__(self, maxsize=CONVERSATION_LIMIT, ttl=CONVERSATION_TTL, shared=None, prefix="farmbot"):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.shared = shared
+        self.prefix = prefix
+        self._entries = OrderedDict()  # conversation ID -> (last activity, Conversation)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.expirations = 0
+        self.evictions = 0
+        self.errors = 0
+    
+    def __len__(self):
+        return len(self._entries)
+    
+    def share(self, store, prefix="farmbot"):
+        """Also keep conversations in a store shared by the workers."""
+        self.shared = store
+        self.prefix = prefix
+    
+    def _shared_key(self, conversation_id):
+        return f"{self.prefix}:conversation:{conversation_id}"
+    
+    def get(self, conversation_id):
+        """Return a conversation, or None if it is unknown or has expired."""
+        if self.maxsize <= 0:
+            return None
+        with self._lock:
+            self._expire(time.monotonic())
+            entry = self._entries.get(conversation_id)
+            if entry is not None:
+                self.hits += 1
+                return entry[1]
+        
+        conversation = None
+        if self.shared is not None:
+            try:
+                value = self.shared.get(self._shared_key(conversation_id))
+                if value is not None:
+                    conversation = Conversation.loads(value)
+            except Exception as e:
+                self._count("errors")
+                logger.warning("Shared conversation store unavailable: %s", e)
+        self._count("shared_hits" if conversation is not None else "misses")
+        return conversation
+    
+    def set(self, conversation_id, conversation):
+        """Store a conversation's new state and mark it as active."""
+        if self.maxsize <= 0:
+            return
+        if self.shared is not None:
+            try:
+                self.shared.set(self._shared_key(conversation_id), conversation.dumps(),
+                                ex=max(1, int(self.ttl)))
+            except Exception as e:
+                self._count("errors")
+                logger.warning("Shared conversation store error storing a conversation: %s", e)
+        with self._lock:
+            now = time.monotonic()
+            self._entries[conversation_id] = (now, conversation)
+            self._entries.move_to_end(conversation_id)
+            self._expire(now)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+    
+    def delete(self, conversation_id):
+        """Forget a conversation."""
+        with self._lock:
+            self._entries.pop(conversation_id, None)
+        if self.shared is not None:
+            try:
+                self.shared.delete(self._shared_key(conversation_id))
+            except Exception as e:
+                self._count("errors")
+                logger.warning("Shared conversation store error deleting a conversation: %s", e)
+    
+    def _count(self, counter):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+    
+    def _expire(self, now):
+        while self._entries:
+            last_active, _ = next(iter(self._entries.values()))
+            if now - last_active < self.ttl:
+                break
+            self._entries.popitem(last=False)
+            self.expirations += 1
+    
+    def stats(self):
+        """Return the store counters as a dict."""
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "shared": type(self.shared).__name__ if self.shared is not None else None,
+                "hits": self.hits,
+                "shared_hits": self.shared_hits,
+                "misses": self.misses,
+                "expirations": self.expirations,
+                "evictions": self.evictions,
+                "errors": self.errors
+            }
+
+conversations = ConversationStore()
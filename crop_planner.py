@@ -0,0 +1,364 @@
+"""
+Multi-season crop rotation planner.
+
+Picks one crop (or a fallow month) for every month of a horizon starting
+at a Tamil month, maximizing the total expected yield for a soil and land
+type, so that no crop is planted twice in a plan year (the 12 months from
+the start month on, then the next 12) nor in two consecutive months across
+years, and, optionally, only drought-safe crops are planted.
+
+The dataset rows for a soil and land type are reduced once per dataset
+version to a (month x crop) matrix of the best-yielding record. A plan year
+with distinct crops is a maximum-weight assignment of its months to crops
+and fallow slots, solved with the Hungarian algorithm in
+O(months^2 x crops). Years only interact through the crop of a year's last
+month, which the next year may not start with, so a multi-year plan is a
+dynamic program over (year, crop planted before it) whose transitions are
+the best year plans ending in each crop.
+"""
+
+import os
+from collections import Counter, namedtuple
+from functools import lru_cache
+
+from crop_recommendation import (
+    MONTH_ORDER,
+    MONTH_POSITIONS,
+    VERSION_CACHE_SIZE,
+    current_snapshot,
+    find_crop_records,
+)
+
+# Longest horizon a plan may cover, in months
+MAX_PLAN_MONTHS = int(os.environ.get("FARMBOT_PLAN_MAX_MONTHS", "120"))
+
+# Yield matrices kept per dataset version, soil, land type and drought filter,
+# and solved plan years per those and the year's start month and length
+YIELD_MATRIX_CACHE_SIZE = 64
+BLOCK_PLAN_CACHE_SIZE = 256
+
+# A crop counts as drought-safe when at least this share of its dataset rows
+# grow it on this land type, i.e. it is mostly grown rainfed
+DROUGHT_SAFE_LAND_TYPE = "Dry Land"
+DROUGHT_SAFE_SHARE = 0.5
+
+# Cost of an assignment the Hungarian algorithm may not make
+_FORBIDDEN = 1e15
+
+class YieldMatrix(namedtuple("YieldMatrix", ["crops", "records"])):
+    """
+    Best-yielding record of every crop in every month.
+    
+    `crops` lists the crop names; `records[month][crop]` is the CropRecord
+    with the highest yield for that month position and crop index, or None
+    if the crop has no row for the month.
+    """
+    __slots__ = ()
+
+def month_position(month):
+    """Position in MONTH_ORDER of a dataset month such as "Thai(Mid January-Mid February)"."""
+    return MONTH_POSITIONS.get(month.split("(", 1)[0].strip())
+
+def drought_safe_crops():
+    """Crops of the current dataset grown on Dry Land in at least DROUGHT_SAFE_SHARE of their rows."""
+    return _drought_safe_crops(current_snapshot().version)
+
+@lru_cache(maxsize=VERSION_CACHE_SIZE)
+def _drought_safe_crops(version):
+    rows, dry = Counter(), Counter()
+    for record in current_snapshot().records:
+        rows[record.crop_name] += 1
+        if record.land_type == DROUGHT_SAFE_LAND_TYPE:
+            dry[record.crop_name] += 1
+    return frozenset(crop for crop, count in rows.items() if dry[crop] >= DROUGHT_SAFE_SHARE * count)
+
+def yield_matrix(soil_type=None, land_type=None, drought_safe=False):
+    """
+    Get the (month x crop) yield matrix for a soil and land type.
+    
+    Args:
+        soil_type (str): Soil type, or None for every soil type
+        land_type (str): Land type, or None for every land type
+        drought_safe (bool): Only keep drought-safe crops
+    
+    Returns:
+        YieldMatrix: The matrix, built once per dataset version
+    """
+    return _yield_matrix(current_snapshot().version, soil_type, land_type, drought_safe)
+
+@lru_cache(maxsize=YIELD_MATRIX_CACHE_SIZE)
+def _yield_matrix(version, soil_type, land_type, drought_safe):
+    allowed = drought_safe_crops() if drought_safe else None
+    best = {}
+    for record in find_crop_records(soil_type, None, None, land_type):
+        position = month_position(record.month)
+        if position is None or (allowed is not None and record.crop_name not in allowed):
+            continue
+        key = (position, record.crop_name)
+        if key not in best or record.base_yield > best[key].base_yield:
+            best[key] = record
+    
+    crops = tuple(sorted({crop for _, crop in best}))
+    records = tuple(
+        tuple(best.get((position, crop)) for crop in crops)
+        for position in range(len(MONTH_ORDER))
+    )
+    return YieldMatrix(crops, records)
+
+def plan_rotation(soil_type=None, land_type=None, land_size=1.0, months=12, start_month=None,
+                  drought_safe=False, previous_crop=None):
+    """
+    Plan the crop of every month of a horizon for the highest total yield.
+    
+    No crop is planted twice within a plan year, i.e. the first 12 months
+    from the start month, the next 12 and so on, nor in two consecutive
+    months.
+    
+    Args:
+        soil_type (str): Soil type, or None for every soil type
+        land_type (str): Land type, or None for every land type
+        land_size (float): Land size in acres
+        months (int): Number of months to plan, up to MAX_PLAN_MONTHS
+        start_month (str): Dataset month the plan starts in, Chithirai if None
+        drought_safe (bool): Only plant crops mostly grown on dry land
+        previous_crop (str): Crop in the field before the plan starts, which
+            may not be planted in the first month
+    
+    Returns:
+        dict: The planned months, each with its crop (None for a fallow
+            month), and the total expected yield in tons
+    
+    Raises:
+        ValueError: If months is out of range or start_month is not a month
+    """
+    if not 1 <= months <= MAX_PLAN_MONTHS:
+        raise ValueError(f"months must be between 1 and {MAX_PLAN_MONTHS}")
+    
+    start = 0 if start_month is None else month_position(start_month)
+    if start is None:
+        raise ValueError(f"Unknown month: {start_month}")
+    
+    matrix = yield_matrix(soil_type, land_type, drought_safe)
+    years = [_block_plans(current_snapshot().version, soil_type, land_type, drought_safe, start, length)
+             for length in year_lengths(months)]
+    choices = best_sequence(matrix, start, months, previous_crop, years)
+    
+    month_names = month_names_by_position()
+    planned = []
+    for step, crop in enumerate(choices):
+        position = (start + step) % len(MONTH_ORDER)
+        record = matrix.records[position][crop] if crop is not None else None
+        planned.append({
+            "year": step // len(MONTH_ORDER) + 1,
+            "month": month_names.get(position, MONTH_ORDER[position]),
+            "crop": record.crop_name if record else None,
+            "season": record.season if record else None,
+            "expected_yield": record.expected_yield(land_size) if record else 0.0
+        })
+    
+    return {
+        "soil_type": soil_type,
+        "land_type": land_type,
+        "land_size": land_size,
+        "drought_safe": drought_safe,
+        "months": planned,
+        "total_yield": round(sum(month["expected_yield"] for month in planned), 2)
+    }
+
+def year_lengths(months):
+    """Months of every plan year of a horizon: full years, then the remainder."""
+    lengths = [len(MONTH_ORDER)] * (months // len(MONTH_ORDER))
+    if months % len(MONTH_ORDER):
+        lengths.append(months % len(MONTH_ORDER))
+    return lengths
+
+class BlockPlans:
+    """
+    Best plans of one plan year, with distinct crops in its months.
+    
+    Plans are solved on demand and memoized: the best plan whose first
+    month avoids a crop, and the best plan ending in a given crop (or
+    fallow) whose first month avoids a crop.
+    
+    Args:
+        matrix (YieldMatrix): Yields of the soil and land type
+        start (int): Month position of the year's first month
+        length (int): Number of months in the year
+    """
+    
+    def __init__(self, matrix, start, length):
+        self.crop_count = len(matrix.crops)
+        self.rows = [matrix.records[(start + step) % len(MONTH_ORDER)] for step in range(length)]
+        self._plans = {}
+    
+    def best(self, avoid=None):
+        """Best (total, crops) plan whose first month is not crop `avoid`."""
+        return self._avoiding(avoid, None)
+    
+    def ending(self, last, avoid=None):
+        """
+        Best (total, crops) plan whose last month is crop `last` (None for
+        fallow) and whose first month is not crop `avoid`, or None if no
+        plan ends in that crop.
+        """
+        return self._avoiding(avoid, ("last", last))
+    
+    def _avoiding(self, avoid, last):
+        # The unconstrained first month is solved once; avoiding a crop
+        # only needs another solve when the best plan starts with it
+        plan = self._solve(None, last)
+        if plan is not None and avoid is not None and plan[1][0] == avoid:
+            plan = self._solve(avoid, last)
+        return plan
+    
+    def _solve(self, avoid, last):
+        key = (avoid, last)
+        if key not in self._plans:
+            self._plans[key] = self._assign(avoid, last)
+        return self._plans[key]
+    
+    def _assign(self, avoid, last):
+        """Solve the year as an assignment of months to crops and fallow slots."""
+        length = len(self.rows)
+        fallow = [0.0] * length  # One fallow slot per month, so every month may lie fallow
+        cost = []
+        for step, row in enumerate(self.rows):
+            crops = [-record.base_yield if record is not None else _FORBIDDEN for record in row]
+            slots = list(fallow)
+            if step == 0 and avoid is not None:
+                crops[avoid] = _FORBIDDEN
+            if last is not None and step == length - 1:
+                # Pin the last month to the crop, or to a fallow slot
+                crops = [value if crop == last[1] else _FORBIDDEN for crop, value in enumerate(crops)]
+                if last[1] is not None:
+                    slots = [_FORBIDDEN] * length
+            cost.append(crops + slots)
+        
+        columns = assign(cost)
+        if any(cost[step][column] >= _FORBIDDEN for step, column in enumerate(columns)):
+            return None
+        crops = tuple(column if column < self.crop_count else None for column in columns)
+        return -sum(cost[step][column] for step, column in enumerate(columns)), crops
+
+@lru_cache(maxsize=BLOCK_PLAN_CACHE_SIZE)
+def _block_plans(version, soil_type, land_type, drought_safe, start, length):
+    return BlockPlans(_yield_matrix(version, soil_type, land_type, drought_safe), start, length)
+
+def assign(cost):
+    """
+    Minimum-cost assignment of every row to a distinct column (Hungarian
+    algorithm with potentials, O(rows^2 x columns)).
+    
+    Args:
+        cost (list): Rows of equal-length cost lists, no more rows than columns
+    
+    Returns:
+        list: Column of every row
+    """
+    rows, columns = len(cost), len(cost[0])
+    inf = float("inf")
+    row_potential = [0.0] * (rows + 1)
+    column_potential = [0.0] * (columns + 1)
+    owner = [0] * (columns + 1)  # Row (1-based) assigned to each column, 0 if none
+    way = [0] * (columns + 1)
+    
+    for row in range(1, rows + 1):
+        owner[0] = row
+        column = 0
+        slack = [inf] * (columns + 1)
+        used = [False] * (columns + 1)
+        while owner[column] != 0:
+            used[column] = True
+            current = owner[column]
+            costs, potential = cost[current - 1], row_potential[current]
+            delta, next_column = inf, 0
+            for j in range(1, columns + 1):
+                if not used[j]:
+                    reduced = costs[j - 1] - potential - column_potential[j]
+                    if reduced < slack[j]:
+                        slack[j], way[j] = reduced, column
+                    if slack[j] < delta:
+                        delta, next_column = slack[j], j
+            for j in range(columns + 1):
+                if used[j]:
+                    row_potential[owner[j]] += delta
+                    column_potential[j] -= delta
+                else:
+                    slack[j] -= delta
+            column = next_column
+        
+        # Augment along the alternating path back to the new row
+        while column:
+            previous = way[column]
+            owner[column] = owner[previous]
+            column = previous
+    
+    assignment = [0] * rows
+    for j in range(1, columns + 1):
+        if owner[j]:
+            assignment[owner[j] - 1] = j - 1
+    return assignment
+
+def best_sequence(matrix, start, months, previous_crop=None, years=None):
+    """
+    Crop index of every month step maximizing the summed base yield, with
+    no crop planted twice in a plan year or in two consecutive months.
+    
+    Args:
+        matrix (YieldMatrix): Yields of the soil and land type
+        start (int): Month position of the first step
+        months (int): Number of steps
+        previous_crop (str): Crop planted before the first step, if any
+        years (list): BlockPlans of every plan year, built from matrix if
+            not given
+    
+    Returns:
+        list: Crop index per step, None for a fallow month
+    """
+    if years is None:
+        years = [BlockPlans(matrix, start, length) for length in year_lengths(months)]
+    states = [*range(len(matrix.crops)), None]  # Crop planted before a year, None if fallow
+    
+    # value[f]: best total of the remaining years when crop f was planted
+    # just before them; plans[year][f]: the year's plan achieving it
+    value = {state: 0.0 for state in states}
+    plans = []
+    for year in reversed(years):
+        if not plans:
+            # Nothing follows the last year, so its last crop is free
+            year_plans = {state: year.best(state) for state in states}
+            value = {state: plan[0] for state, plan in year_plans.items()}
+        else:
+            year_plans, next_value = {}, {}
+            for state in states:
+                best = None
+                for last in states:
+                    plan = year.ending(last, state)
+                    if plan is not None and (best is None or plan[0] + value[last] > best[0]):
+                        best = (plan[0] + value[last], plan)
+                next_value[state] = best[0]
+                year_plans[state] = best[1]
+            value = next_value
+        plans.append(year_plans)
+    plans.reverse()
+    
+    state = matrix.crops.index(previous_crop) if previous_crop in matrix.crops else None
+    sequence = []
+    for year_plans in plans:
+        crops = year_plans[state][1]
+        sequence.extend(crops)
+        state = crops[-1]
+    return sequence
+
+def month_names_by_position():
+    """Full dataset month names by MONTH_ORDER position."""
+    return _month_names(current_snapshot().version)
+
+@lru_cache(maxsize=VERSION_CACHE_SIZE)
+def _month_names(version):
+    names = {}
+    for month in current_snapshot().facets.get("MONTH", ()):
+        position = month_position(month)
+        if position is not None:
+            names.setdefault(position, month)
+    return names
@@ -4,45 +4,380 @@ This module provides crop recommendations and climate remedial measures
 based on user input criteria.
 """
 
+import contextvars
+import hashlib
+import itertools
 import json
 import os
 import logging
+import re
+import sys
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter, namedtuple
+from collections.abc import Sequence
+from functools import lru_cache
+from operator import attrgetter, itemgetter
 from pathlib import Path
 
-# Configure logging
-logging.basicConfig(level=logging.DEBUG)
+import numpy_backend
+from metrics import instrument
+from scoring import ItemFeatures, engine as scoring_engine
+from columnar_dataset import DatasetFormatError, load_compiled, source_signature
+
 logger = logging.getLogger(__name__)
 
 # Month order for sorting
 MONTH_ORDER = ["Chithirai", "Vaikasi", "Aani", "Aadi", "Aavani", "Purattasi", 
                "Aippasi", "Karthigai", "Margazhi", "Thai", "Maasi", "Panguni"]
 
-def load_data():
-    """Load crop data from the JSON file."""
-    try:
-        data_path = Path(__file__).parent / "static" / "data" / "csvjson.json"
-        with open(data_path, "r", encoding="utf-8") as file:
-            return json.load(file)
-    except (FileNotFoundError, json.JSONDecodeError) as e:
-        logger.error(f"Error loading crop data: {e}")
-        return []
+# Dataset files; the compiled one is built by `python columnar_dataset.py`
+DATA_PATH = Path(__file__).parent / "static" / "data" / "csvjson.json"
+COMPILED_DATA_PATH = DATA_PATH.with_suffix(".bin")
 
-# Load data once when module is imported
-crop_data = load_data()
+# "auto" uses the compiled dataset when it is up to date, "json" always parses JSON
+DATASET_FORMAT = os.environ.get("FARMBOT_DATASET_FORMAT", "auto")
+
+# "auto" uses the NumPy backend when NumPy is installed, "python" disables it
+BACKEND = os.environ.get("FARMBOT_BACKEND", "auto")
+USE_NUMPY = BACKEND != "python" and numpy_backend.available()
+
+# Fields indexed for filtering, in the order of find_crop_recommendations arguments
+FILTER_FIELDS = ("SOIL TYPE", "MONTH", "SEASON", "LAND TYPE")
+
+_NO_ROWS = frozenset()
+
+# Fields whose distinct values are precomputed for get_options and /api/options
+FACET_FIELDS = FILTER_FIELDS + ("CROP NAME",)
+
+# Position of each Tamil month name, for ordering month values
+MONTH_POSITIONS = {name: position for position, name in enumerate(MONTH_ORDER)}
+
+# Dataset columns holding remedial-measure paragraphs
+DROUGHT_MEASURES_FIELD = "REMEDIAL MEASURES - DROUGHT"
+FLOOD_MEASURES_FIELD = "REMEDIAL MEASURE - FLOOD"
+
+# Store each distinct remedial-measure text once instead of once per row
+INTERN_MEASURES = os.environ.get("FARMBOT_INTERN_MEASURES", "1") != "0"
+
+# Item standing in for a missing remedial-measure text
+MEASURES_UNAVAILABLE = {"title": None, "detail": "Information not available"}
+
+# Paragraphs of a remedial-measure text are separated by blank lines
+PARAGRAPH_BREAK = re.compile(r"\n[^\S\n]*\n")
+
+# Title of a "Title: detail" paragraph, a short phrase without sentence punctuation
+MEASURE_TITLE = re.compile(r"([^:.!?]{1,80}): ")
+
+# Detail paragraphs ending like this are joined with a space, others (list entries) with "; "
+SENTENCE_ENDINGS = (".", "!", "?", ":")
+
+# Distinct remedial-measure texts whose split items are kept
+MEASURE_CACHE_SIZE = 4096
+
+# Climate conditions with remedial measures, and the CropRecord field holding their item IDs
+MEASURE_CONDITIONS = {"drought": "drought_ids", "flood": "flood_ids"}
+
+# Measures listed in a climate remedial measures response
+CLIMATE_MEASURE_LIMIT = 7
+
+# Item IDs of a missing remedial-measure text, the first text of every MeasureTable
+UNAVAILABLE_IDS = (0,)
+
+class MeasureTable:
+    """
+    Table of the distinct remedial-measure items of one dataset snapshot.
+    
+    The measure paragraphs repeat across the soil/month/season rows of a crop,
+    so each text is split with split_measures once, each item is stored
+    once, and rows refer to items by integer ID. Every snapshot has its own
+    table, so the texts and items of a replaced or evicted snapshot are freed
+    with its records.
+    """
+    
+    def __init__(self):
+        self.items = []
+        self._item_ids = {}
+        self._paragraphs = {}
+        self._resolved = {}
+        self.add("")
+    
+    def __len__(self):
+        return len(self.items)
+    
+    def __getitem__(self, measure_id):
+        return self.items[measure_id]
+    
+    def add(self, text):
+        """
+        Add a remedial-measure text to the table.
+        
+        Args:
+            text (str): Text as stored in the dataset
+        
+        Returns:
+            tuple: IDs of the text's items
+        """
+        ids = self._paragraphs.get(text)
+        if ids is None:
+            ids = tuple(self._item_id(item) for item in split_measures(text))
+            self._paragraphs[text] = ids
+        return ids
+    
+    def resolve(self, ids):
+        """Return the items for a tuple of IDs as a shared tuple."""
+        items = self._resolved.get(ids)
+        if items is None:
+            items = self._resolved[ids] = tuple(self.items[i] for i in ids)
+        return items
+    
+    def _item_id(self, item):
+        key = (item["title"], item["detail"])
+        measure_id = self._item_ids.get(key)
+        if measure_id is None:
+            measure_id = self._item_ids[key] = len(self.items)
+            self.items.append(item)
+        return measure_id
+
+class CropRecord(namedtuple("CropRecord", [
+        "crop_name", "soil_type", "month", "season", "land_type",
+        "base_yield", "drought_ids", "flood_ids", "measures"])):
+    """
+    Immutable, pre-parsed view of one dataset entry.
+    
+    YIELD is parsed and the remedial measures are split into IDs of the
+    snapshot's MeasureTable (`measures`) once at load time, so a request
+    only has to scale the yield by the land size.
+    """
+    __slots__ = ()
+    
+    @classmethod
+    def from_entry(cls, entry, measures):
+        """
+        Build a record from a raw crop data entry.
+        
+        Args:
+            entry (dict): Crop data entry
+            measures (MeasureTable): Table of the snapshot the record belongs to
+        """
+        return cls(
+            crop_name=entry.get("CROP NAME", "Unknown Crop"),
+            soil_type=entry.get("SOIL TYPE", "Unknown"),
+            month=entry.get("MONTH", "Unknown"),
+            season=entry.get("SEASON", "Unknown"),
+            land_type=entry.get("LAND TYPE", "Unknown"),
+            base_yield=float(entry.get("YIELD", 0)),
+            drought_ids=measures.add(entry.get(DROUGHT_MEASURES_FIELD, "")),
+            flood_ids=measures.add(entry.get(FLOOD_MEASURES_FIELD, "")),
+            measures=measures
+        )
+    
+    @property
+    def drought_measures(self):
+        return self.measures.resolve(self.drought_ids)
+    
+    @property
+    def flood_measures(self):
+        return self.measures.resolve(self.flood_ids)
+    
+    def yield_tons(self, land_size=1.0):
+        """Unrounded expected yield in tons for the given land size in acres."""
+        return self.base_yield * land_size * 2.471 / 1000
+    
+    def expected_yield(self, land_size=1.0):
+        """Expected yield in tons for the given land size in acres."""
+        return round(self.yield_tons(land_size), 2)
+    
+    def to_recommendation(self, land_size=1.0, expected_yield=None):
+        """
+        Build the recommendation object returned by the API.
+        
+        Args:
+            land_size (float): Size of land in acres
+            expected_yield (float): Already computed expected yield, if any
+        """
+        if expected_yield is None:
+            expected_yield = self.expected_yield(land_size)
+        
+        return {
+            "crop_name": self.crop_name,
+            "soil_type": self.soil_type,
+            "month": self.month,
+            "season": self.season,
+            "land_type": self.land_type,
+            "expected_yield": expected_yield,
+            "drought_measures": self.drought_measures,
+            "flood_measures": self.flood_measures
+        }
+
+def load_data(intern_measures=INTERN_MEASURES, path=DATA_PATH):
+    """
+    Load crop data, preferring the compiled columnar dataset.
+    
+    The compiled file (see columnar_dataset.py) next to the JSON file, with
+    a .bin suffix, is used when it exists and was built from the current
+    JSON file; otherwise the JSON file is parsed. Without a JSON file, the
+    compiled file built by ingest.py is the dataset.
+    
+    Args:
+        intern_measures (bool): Replace the remedial-measure paragraphs of every
+            row with a single shared copy of each distinct text
+        path (Path): JSON file to load, the default dataset if not given
+    
+    Returns:
+        list: Crop data entries
+    """
+    data = None
+    if DATASET_FORMAT in ("auto", "binary"):
+        try:
+            source_path = path if os.path.exists(path) else None
+            data = load_compiled(Path(path).with_suffix(".bin"), source_path=source_path)
+        except (DatasetFormatError, OSError) as e:
+            log = logger.warning if DATASET_FORMAT == "binary" else logger.debug
+            log("Compiled crop data unavailable, falling back to JSON: %s", e)
+    
+    if data is None:
+        try:
+            with open(path, "r", encoding="utf-8") as file:
+                data = json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError) as e:
+            logger.error("Error loading crop data: %s", e)
+            return []
+    
+    if intern_measures:
+        # Keyed by the text itself, so every row keeps exactly its own text
+        texts = {}
+        for entry in data:
+            for field in (DROUGHT_MEASURES_FIELD, FLOOD_MEASURES_FIELD):
+                if entry.get(field):
+                    entry[field] = texts.setdefault(entry[field], entry[field])
+    
+    return data
+
+def build_index(data):
+    """
+    Build an inverted index over the filterable fields of the dataset.
+    
+    Args:
+        data (list): List of crop data entries
+    
+    Returns:
+        dict: Mapping of field name to {value: frozenset of row positions}
+    """
+    postings = {field: {} for field in FILTER_FIELDS}
+    for position, entry in enumerate(data):
+        for field in FILTER_FIELDS:
+            if field in entry:
+                postings[field].setdefault(entry[field], []).append(position)
+    
+    return {
+        field: {value: frozenset(positions) for value, positions in values.items()}
+        for field, values in postings.items()
+    }
+
+def select_positions(index, size, soil_type=None, month=None, season=None, land_type=None):
+    """
+    Find the dataset positions matching the given filters using the inverted index.
+    
+    Posting sets are intersected smallest first and the result is returned
+    in dataset order, matching what a linear scan over the data would give.
+    
+    Args:
+        index (dict): Inverted index from build_index
+        size (int): Number of entries in the dataset
+    
+    Returns:
+        list or range: Matching positions in ascending order
+    """
+    filters = zip(FILTER_FIELDS, (soil_type, month, season, land_type))
+    postings = [index[field].get(value, _NO_ROWS) for field, value in filters if value]
+    
+    if not postings:
+        return range(size)
+    
+    postings.sort(key=len)
+    positions = postings[0].intersection(*postings[1:]) if len(postings) > 1 else postings[0]
+    return sorted(positions)
+
+def select_entries(data, index, soil_type=None, month=None, season=None, land_type=None):
+    """
+    Select the dataset entries matching the given filters using the inverted index.
+    
+    Returns:
+        list: Matching crop data entries in dataset order
+    """
+    positions = select_positions(index, len(data), soil_type, month, season, land_type)
+    return [data[position] for position in positions]
+
+def _month_sort_key(month):
+    """Sort key ordering month values by the Tamil month order, unknown months last."""
+    position = MONTH_POSITIONS.get(month.split("(")[0].strip())
+    return (position is None, position or 0, month)
+
+def build_facets(data):
+    """
+    Collect the sorted distinct values of every facet field.
+    
+    Args:
+        data (list): List of crop data entries
+    
+    Returns:
+        dict: Mapping of field name to a tuple of values; months follow the
+            Tamil month order, other fields are sorted alphabetically
+    """
+    values = {field: set() for field in FACET_FIELDS}
+    for entry in data:
+        for field, seen in values.items():
+            if field in entry:
+                seen.add(entry[field])
+    
+    return {
+        field: tuple(sorted(seen, key=_month_sort_key if field == "MONTH" else None))
+        for field, seen in values.items()
+    }
 
 def get_options(key):
     """Retrieve unique options from dataset for a specific field."""
-    if key == "MONTH":
-        # Extract unique month values and sort by Tamil month order
-        months = set(entry.get(key, "Unknown") for entry in crop_data if key in entry)
-        # Sort months based on the Tamil month order
-        return sorted(months, 
-                     key=lambda x: MONTH_ORDER.index(x.split("(")[0].strip()) 
-                     if x.split("(")[0].strip() in MONTH_ORDER else float('inf'))
+    current = current_snapshot()
+    if key in current.facets:
+        return list(current.facets[key])
     
-    # For other keys, just return sorted unique values
-    return sorted(set(entry.get(key, "Unknown") for entry in crop_data if key in entry))
+    # Fields outside the precomputed facets are collected on demand
+    return sorted(set(entry.get(key, "Unknown") for entry in current.data if key in entry))
 
+def facet_counts(soil_type=None, month=None, season=None, land_type=None):
+    """
+    Count the matching rows for every value of every filter field.
+    
+    Each field is counted against the other selected filters but not its
+    own, so a dropdown shows how many crops each alternative would give.
+    
+    Returns:
+        dict: Mapping of field name to {value: number of matching rows},
+            with values in facet order
+    """
+    current = current_snapshot()
+    selected = dict(zip(FILTER_FIELDS, (soil_type, month, season, land_type)))
+    counts = {}
+    
+    for field in FILTER_FIELDS:
+        postings = [
+            current.index[other].get(value, _NO_ROWS)
+            for other, value in selected.items() if value and other != field
+        ]
+        postings.sort(key=len)
+        rows = postings[0].intersection(*postings[1:]) if postings else None
+        
+        field_index = current.index[field]
+        counts[field] = {
+            value: len(field_index[value]) if rows is None else len(field_index[value] & rows)
+            for value in current.facets[field]
+        }
+    
+    return counts
+
+@instrument("find")
 def find_crop_recommendations(soil_type=None, month=None, season=None, land_type=None, land_size=1.0):
     """
     Find suitable crops based on input criteria.
@@ -57,83 +392,593 @@ def find_crop_recommendations(soil_type=None, month=None, season=None, land_type
     Returns:
         list: List of suitable crop recommendations with details
     """
-    logger.debug(f"Finding crops with soil={soil_type}, month={month}, season={season}, land_type={land_type}")
+    logger.debug("Finding crops with soil=%s, month=%s, season=%s, land_type=%s", soil_type, month, season, land_type)
+    
+    engine = current_snapshot().numpy_engine
+    if engine is not None:
+        return engine.find(soil_type, month, season, land_type, land_size)
+    
+    # Only the yield depends on the request; everything else is precomputed
+    records = find_crop_records(soil_type, month, season, land_type)
+    return [record.to_recommendation(land_size) for record in records]
+
+@instrument("find_records")
+def find_crop_records(soil_type=None, month=None, season=None, land_type=None):
+    """
+    Find the pre-parsed records matching the input criteria.
     
-    filtered_data = crop_data
+    The result does not depend on the land size, so it can be cached and
+    scaled afterwards with RecommendationList.
     
-    # Apply filters if provided
-    if soil_type:
-        filtered_data = [entry for entry in filtered_data if entry.get("SOIL TYPE") == soil_type]
+    Returns:
+        tuple: Matching CropRecord objects in dataset order
+    """
+    current = current_snapshot()
+    if current.numpy_engine is not None:
+        positions = current.numpy_engine.select(soil_type, month, season, land_type)
+        return tuple(current.records[position] for position in positions.tolist())
+    
+    return tuple(select_entries(current.records, current.index, soil_type, month, season, land_type))
+
+def iter_crop_recommendations(soil_type=None, month=None, season=None, land_type=None,
+                              land_size=1.0, cursor=0, limit=None):
+    """
+    Lazily generate the recommendations matching the input criteria.
+    
+    Only the matching positions are materialized up front; recommendation
+    objects are built one at a time, so memory stays flat for any result size.
+    
+    Args:
+        cursor (int): Dataset position to resume from (inclusive)
+        limit (int): Maximum number of recommendations, or None for all
+    
+    Returns:
+        tuple: (generator of (position, recommendation), next cursor or None)
+    """
+    current = current_snapshot()
+    records, index = current.records, current.index
+    positions = select_positions(index, len(records), soil_type, month, season, land_type)
+    start = bisect_left(positions, cursor)
+    stop = len(positions) if limit is None else min(len(positions), start + limit)
+    next_cursor = positions[stop] if stop < len(positions) else None
     
-    if month:
-        filtered_data = [entry for entry in filtered_data if entry.get("MONTH") == month]
+    def generate():
+        for position in positions[start:stop]:
+            yield position, records[position].to_recommendation(land_size)
     
-    if season:
-        filtered_data = [entry for entry in filtered_data if entry.get("SEASON") == season]
+    return generate(), next_cursor
+
+class RecommendationList(Sequence):
+    """
+    Read-only list of recommendations backed by crop records.
     
-    if land_type:
-        filtered_data = [entry for entry in filtered_data if entry.get("LAND TYPE") == land_type]
+    Recommendation dicts are only built for the items that are accessed, so
+    scaling a large cached result to a land size costs nothing until the
+    formatters read from it.
+    """
     
-    # Prepare recommendations
-    recommendations = []
-    for entry in filtered_data:
-        crop_name = entry.get("CROP NAME", "Unknown Crop")
-        expected_yield = float(entry.get("YIELD", 0)) * land_size * 2.471 / 1000  # Convert to tons
+    def __init__(self, records, land_size=1.0):
+        self.records = records
+        self.land_size = land_size
+    
+    def __len__(self):
+        return len(self.records)
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [record.to_recommendation(self.land_size) for record in self.records[index]]
+        return self.records[index].to_recommendation(self.land_size)
+
+@lru_cache(maxsize=MEASURE_CACHE_SIZE)
+def format_measures(measures_text):
+    """
+    Split remedial measures text into structured items, see split_measures.
+    
+    Results are cached per distinct text and shared between callers, so
+    they must not be modified.
+    """
+    return split_measures(measures_text)
+
+def split_measures(measures_text):
+    """
+    Split remedial measures text into structured items.
+    
+    Args:
+        measures_text (str): Remedial measures as stored in the dataset
+    
+    Returns:
+        tuple: {"title", "detail"} dicts; the title is None for measures
+            without one
+    """
+    if not measures_text:
+        return (MEASURES_UNAVAILABLE,)
+    
+    items = tuple(
+        {"title": title, "detail": _join_detail(parts)}
+        for title, parts in _measure_paragraphs(measures_text)
+    )
+    return items or (MEASURES_UNAVAILABLE,)
+
+def _measure_paragraphs(measures_text):
+    """
+    Group the paragraphs of a remedial measures text into (title, parts) pairs.
+    
+    Paragraphs are "Title: detail", a "Title:" heading whose detail follows
+    in the next paragraphs (possibly a list introduced by a line ending in
+    ':'), or plain sentences without a title. Each paragraph is looked at
+    once, so the cost is linear in the length of the text.
+    """
+    items = []
+    heading = None  # Item opened by a "Title:" heading, collecting its detail
+    for paragraph in PARAGRAPH_BREAK.split(measures_text):
+        paragraph = " ".join(paragraph.split())
+        if not paragraph:
+            continue
         
-        # Get remedial measures
-        drought_measures = entry.get("REMEDIAL MEASURES - DROUGHT", "Information not available")
-        flood_measures = entry.get("REMEDIAL MEASURE - FLOOD", "Information not available")
+        if paragraph.endswith(":") and (heading is None or heading[1]):
+            heading = (paragraph[:-1].rstrip(), [])
+            items.append(heading)
+            continue
         
-        # Format measures for better readability
-        drought_measures = format_measures(drought_measures)
-        flood_measures = format_measures(flood_measures)
+        title = MEASURE_TITLE.match(paragraph)
+        if title:
+            heading = None
+            items.append((title.group(1), [paragraph[title.end():]]))
+        elif heading is not None:
+            heading[1].append(paragraph)
+        else:
+            items.append((None, [paragraph]))
+    return items
+
+def _join_detail(parts):
+    """Join the detail paragraphs of an item into one line."""
+    pieces = []
+    for part in parts:
+        if pieces:
+            pieces.append(" " if pieces[-1].endswith(SENTENCE_ENDINGS) else "; ")
+        pieces.append(part)
+    return "".join(pieces)
+
+def measure_text(item):
+    """
+    Render a remedial measure item as a single line of text.
+    
+    Args:
+        item (dict): Item from format_measures
+    
+    Returns:
+        str: "Title: detail", or whichever of the two the item has
+    """
+    title, detail = item["title"], item["detail"]
+    if title and detail:
+        return f"{title}: {detail}"
+    return title or detail
+
+class MeasureIndex:
+    """
+    Remedial-measure items ranked by the number of dataset rows carrying them.
+    
+    Rankings are precomputed per condition for the whole dataset, for each
+    soil type, each land type and each soil and land type pair, so the most
+    common measures for a climate request are a lookup and a slice.
+    
+    Args:
+        records (list): CropRecord objects of a snapshot
+        measures (MeasureTable): The snapshot's measure table
+    """
+    
+    def __init__(self, records, measures):
+        self.measures = measures
+        unavailable = set(UNAVAILABLE_IDS)
+        counts = {}
+        for record in records:
+            scopes = ((None, None), (record.soil_type, None),
+                      (None, record.land_type), (record.soil_type, record.land_type))
+            for condition, ids_field in MEASURE_CONDITIONS.items():
+                # Count each item once per row, even if its text repeats it
+                ids = [i for i in dict.fromkeys(getattr(record, ids_field)) if i not in unavailable]
+                for soil_type, land_type in scopes:
+                    counts.setdefault((condition, soil_type, land_type), Counter()).update(ids)
         
-        # Create recommendation object
-        recommendation = {
-            "crop_name": crop_name,
-            "soil_type": entry.get("SOIL TYPE", "Unknown"),
-            "month": entry.get("MONTH", "Unknown"),
-            "season": entry.get("SEASON", "Unknown"),
-            "land_type": entry.get("LAND TYPE", "Unknown"),
-            "expected_yield": round(expected_yield, 2),
-            "drought_measures": drought_measures,
-            "flood_measures": flood_measures
+        # most_common keeps the first-seen order among equally common items
+        self.rankings = {
+            key: tuple(measure_id for measure_id, _ in counter.most_common())
+            for key, counter in counts.items()
         }
+    
+    def top(self, condition, soil_type=None, land_type=None, limit=CLIMATE_MEASURE_LIMIT):
+        """
+        Get the most common measures for a condition.
         
-        recommendations.append(recommendation)
+        Args:
+            condition (str): "drought" or "flood"
+            soil_type (str): Only count rows with this soil type
+            land_type (str): Only count rows with this land type
+            limit (int): Maximum number of measures
+        
+        Returns:
+            tuple: Measure items, most common first, or None if no row
+                matches the soil and land type
+        """
+        ranking = self.rankings.get((condition, soil_type, land_type))
+        if ranking is None:
+            return None
+        return self.measures.resolve(ranking[:limit])
+
+def rank_measures(condition, recommendations, limit=CLIMATE_MEASURE_LIMIT):
+    """
+    Rank the measures of recommendations by how many of them carry each.
+    
+    A RecommendationList is counted on its records' measure IDs, so no
+    recommendation dicts are built.
     
-    return recommendations
+    Args:
+        condition (str): "drought" or "flood"
+        recommendations (list): Crop recommendation objects, or a
+            RecommendationList
+        limit (int): Maximum number of measures
+    
+    Returns:
+        list: Measure items, most common first
+    """
+    if isinstance(recommendations, RecommendationList):
+        if not recommendations.records:
+            return []
+        ids_field = MEASURE_CONDITIONS[condition]
+        counts = Counter()
+        for record in recommendations.records:
+            counts.update(dict.fromkeys(getattr(record, ids_field)).keys())
+        for measure_id in UNAVAILABLE_IDS:
+            counts.pop(measure_id, None)
+        measures = recommendations.records[0].measures
+        return list(measures.resolve(tuple(measure_id for measure_id, _ in counts.most_common(limit))))
+    
+    field = f"{condition}_measures"
+    counts = Counter()
+    items = {}
+    for rec in recommendations:
+        row_items = {(item["title"], item["detail"]): item for item in rec[field]}
+        counts.update(row_items.keys())
+        for key, item in row_items.items():
+            items.setdefault(key, item)
+    
+    unavailable = (MEASURES_UNAVAILABLE["title"], MEASURES_UNAVAILABLE["detail"])
+    counts.pop(unavailable, None)
+    return [items[key] for key, _ in counts.most_common(limit)]
 
-def format_measures(measures_text):
-    """Format remedial measures text for better readability."""
-    # Split by periods or line breaks
-    if not measures_text:
-        return ["Information not available"]
-        
-    # Split by periods followed by space or newlines
-    parts = []
-    current_part = ""
+class DatasetSnapshot(namedtuple("DatasetSnapshot", [
+    "version", "data", "index", "facets", "records", "measures", "measure_index", "numpy_engine", "source",
+    "loaded_at"
+])):
+    """
+    Immutable, versioned view of the dataset and everything derived from it.
+    
+    Reloads build a new snapshot and swap it in with a single assignment, so
+    code holding a snapshot keeps a consistent view while a newer one is
+    published. Caches derived from the dataset key their entries on the
+    version instead of being cleared.
+    """
+    __slots__ = ()
+
+def build_snapshot(data, version, source=None):
+    """
+    Build the index, facets, records, measure table, measure rankings and NumPy columns for loaded data.
+    
+    Args:
+        data (list): Crop data entries from load_data
+        version (int): Dataset version of the snapshot
+        source (dict): Source file signature the data was loaded from
     
-    for char in measures_text:
-        current_part += char
-        if char == '.' and len(current_part.strip()) > 0:
-            parts.append(current_part.strip())
-            current_part = ""
+    Returns:
+        DatasetSnapshot: The new snapshot
+    """
+    measures = MeasureTable()
+    records = [CropRecord.from_entry(entry, measures) for entry in data]
+    return DatasetSnapshot(
+        version=version,
+        data=data,
+        index=build_index(data),
+        facets=build_facets(data),
+        # Pre-parsed records, aligned by position with data and index
+        records=records,
+        # Distinct remedial-measure items of this snapshot only
+        measures=measures,
+        measure_index=MeasureIndex(records, measures),
+        # Column arrays for the optional NumPy backend
+        numpy_engine=numpy_backend.NumpyEngine(records) if USE_NUMPY else None,
+        source=source,
+        loaded_at=time.time()
+    )
+
+def estimate_snapshot_size(dataset):
+    """
+    Approximate number of bytes held by a snapshot.
     
-    # Add any remaining text
-    if current_part.strip():
-        parts.append(current_part.strip())
+    Walks the data, index, facets, records, measure table and rankings and
+    NumPy columns. Objects shared between them, such as a remedial-measure
+    text held by both the rows and the measure table, are counted once.
     
-    return parts if parts else ["Information not available"]
+    Args:
+        dataset (DatasetSnapshot): Snapshot to measure
+    
+    Returns:
+        int: Size in bytes
+    """
+    pending = [dataset.data, dataset.index, dataset.facets, dataset.records,
+               dataset.measures, dataset.measure_index, dataset.numpy_engine]
+    seen = set()
+    size = 0
+    while pending:
+        obj = pending.pop()
+        if obj is None or id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        size += sys.getsizeof(obj)
+        if isinstance(obj, dict):
+            pending.extend(obj.keys())
+            pending.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            pending.extend(obj)
+        elif hasattr(obj, "__dict__"):
+            pending.append(vars(obj))
+    return size
 
-def format_recommendations_for_chat(recommendations, land_size=1.0):
+def dataset_signature(path=DATA_PATH):
+    """
+    Signature of a JSON source, or of the compiled dataset when there is no
+    JSON file, or None if neither can be read.
+    """
+    for source_path in (path, Path(path).with_suffix(".bin")):
+        try:
+            return source_signature(source_path)
+        except OSError:
+            pass
+    return None
+
+# Versions are unique across the default dataset and every regional one
+# (see dataset_registry.py), so caches keyed on the version never mix them
+_versions = itertools.count(1)
+
+def next_version():
+    """Return an unused dataset version."""
+    return next(_versions)
+
+# Load data once when module is imported
+snapshot = build_snapshot(load_data(), version=next_version(), source=dataset_signature())
+
+# Snapshot pinned for the current request, see pinned_snapshot()
+_pinned = contextvars.ContextVar("pinned_snapshot", default=None)
+
+def current_snapshot():
+    """Return the snapshot pinned for the current request, or the latest one."""
+    return _pinned.get() or snapshot
+
+def latest_snapshot():
+    """Return the most recently published snapshot, ignoring any pin."""
+    return snapshot
+
+def pin_snapshot(pinned=None):
+    """
+    Pin a snapshot for the current context, e.g. a request.
+    
+    Everything the context reads from the dataset then comes from that
+    snapshot, even if a reload swaps in a new one before it finishes.
+    
+    Args:
+        pinned (DatasetSnapshot): Snapshot to pin, e.g. a region's, or
+            None for the latest one
+    
+    Returns:
+        contextvars.Token: Token to pass to unpin_snapshot
+    """
+    return _pinned.set(pinned if pinned is not None else snapshot)
+
+def unpin_snapshot(token):
+    """Release a snapshot pinned with pin_snapshot."""
+    _pinned.reset(token)
+
+def dataset_version():
+    """Version of the snapshot used by the current request."""
+    return current_snapshot().version
+
+# Content fingerprints of recent snapshots by version, computed on first use
+_fingerprints = {}
+
+# Entries kept by caches of data derived per dataset version, enough for the
+# default dataset and the regional datasets a worker serves
+VERSION_CACHE_SIZE = 64
+
+def dataset_fingerprint():
+    """
+    Hash of the content of the snapshot used by the current request.
+    
+    Unlike the version, which counts reloads within one process, it is the
+    same in every worker that loaded the same data.
+    """
+    current = current_snapshot()
+    fingerprint = _fingerprints.get(current.version)
+    if fingerprint is None:
+        serialized = json.dumps(current.data, sort_keys=True).encode("utf-8")
+        fingerprint = hashlib.sha256(serialized).hexdigest()[:16]
+        if len(_fingerprints) >= VERSION_CACHE_SIZE:
+            _fingerprints.pop(min(_fingerprints), None)
+        _fingerprints[current.version] = fingerprint
+    return fingerprint
+
+def __getattr__(name):
+    # Read-only access to the latest snapshot under the former module globals
+    fields = {
+        "crop_data": "data",
+        "crop_index": "index",
+        "crop_facets": "facets",
+        "crop_records": "records",
+        "measure_table": "measures",
+        "numpy_engine": "numpy_engine",
+    }
+    if name in fields:
+        return getattr(snapshot, fields[name])
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+# Callbacks run after a new snapshot has been published
+_reload_listeners = []
+
+# Serializes reloads, so versions are published in order
+_reload_lock = threading.Lock()
+
+def add_reload_listener(callback):
+    """Register a callback to run after reload_data() publishes a new snapshot."""
+    _reload_listeners.append(callback)
+
+def install_snapshot(data, source=None):
+    """
+    Build a snapshot for data with the next version and publish it.
+    
+    Returns:
+        DatasetSnapshot: The published snapshot
+    """
+    global snapshot
+    
+    with _reload_lock:
+        new_snapshot = build_snapshot(data, next_version(), source)
+        snapshot = new_snapshot
+    
+    for callback in _reload_listeners:
+        callback()
+    
+    return new_snapshot
+
+def reload_data():
+    """
+    Reload the dataset from disk and publish a new snapshot.
+    
+    The index, facets and records are built before the swap, so requests
+    never wait for a reload, and requests already running finish on the
+    snapshot they pinned.
+    
+    Returns:
+        int: Number of entries loaded
+    """
+    source = dataset_signature()
+    data = load_data()
+    if not data:
+        # Keep serving the current snapshot rather than an empty dataset
+        raise DatasetFormatError(f"No crop data could be loaded from {DATA_PATH}")
+    
+    new_snapshot = install_snapshot(data, source)
+    logger.info("Reloaded crop data with %d entries as version %d", len(data), new_snapshot.version)
+    return len(data)
+
+def reload_in_background():
+    """
+    Reload the dataset in a daemon thread.
+    
+    Returns:
+        threading.Thread: The started thread
+    """
+    def run():
+        try:
+            reload_data()
+        except Exception as e:
+            logger.error("Error reloading crop data: %s", e)
+    
+    thread = threading.Thread(target=run, name="crop-data-reload", daemon=True)
+    thread.start()
+    return thread
+
+def watch_dataset(interval):
+    """
+    Poll the dataset file and reload it in the background when it changes.
+    
+    Args:
+        interval (float): Seconds between checks of the file's size and
+            modification time
+    
+    Returns:
+        threading.Thread: The started watcher thread
+    """
+    def watch():
+        while True:
+            time.sleep(interval)
+            source = dataset_signature()
+            if source is not None and source != snapshot.source:
+                logger.info("Crop data changed on disk, reloading")
+                try:
+                    reload_data()
+                except Exception as e:
+                    logger.error("Error reloading crop data: %s", e)
+    
+    thread = threading.Thread(target=watch, name="crop-data-watcher", daemon=True)
+    thread.start()
+    return thread
+
+def top_recommendations(recommendations, k, month=None, season=None):
+    """
+    Select the k best recommendations with the scoring engine.
+    
+    Args:
+        recommendations (Sequence): Recommendation dicts, or a RecommendationList
+            (ranked on its records, so only the selected dicts are built)
+        k (int): Number of recommendations to keep
+        month (str): Requested month; its usual season is the target season
+            when no season is requested
+        season (str): Requested season
+    
+    Returns:
+        list: Up to k recommendation dicts, best first
+    """
+    target = season or month_season(month)
+    if isinstance(recommendations, RecommendationList):
+        records = scoring_engine.top_k(recommendations.records, k, RECORD_FEATURES, target)
+        return [record.to_recommendation(recommendations.land_size) for record in records]
+    return scoring_engine.top_k(recommendations, k, RECOMMENDATION_FEATURES, target)
+
+def record_measure_count(ids):
+    """Number of remedial-measure items behind item IDs, 0 for a missing text."""
+    return len(ids) if ids != UNAVAILABLE_IDS else 0
+
+# Scoring features of crop records and of recommendation dicts
+RECORD_FEATURES = ItemFeatures(
+    yield_per_acre=attrgetter("base_yield"),
+    drought_measures=lambda record: record_measure_count(record.drought_ids),
+    flood_measures=lambda record: record_measure_count(record.flood_ids),
+    season=attrgetter("season")
+)
+
+RECOMMENDATION_FEATURES = ItemFeatures(
+    yield_per_acre=itemgetter("expected_yield"),
+    drought_measures=lambda rec: measure_count(rec["drought_measures"]),
+    flood_measures=lambda rec: measure_count(rec["flood_measures"]),
+    season=itemgetter("season")
+)
+
+def measure_count(items):
+    """Number of remedial-measure items, 0 for a missing text."""
+    return 0 if len(items) == 1 and items[0] == MEASURES_UNAVAILABLE else len(items)
+
+def month_season(month):
+    """The season most dataset rows of a month are planted in, or None."""
+    if not month:
+        return None
+    return _month_seasons(current_snapshot().version).get(month)
+
+@lru_cache(maxsize=VERSION_CACHE_SIZE)
+def _month_seasons(version):
+    seasons = {}
+    for record in current_snapshot().records:
+        seasons.setdefault(record.month, Counter())[record.season] += 1
+    return {month: counts.most_common(1)[0][0] for month, counts in seasons.items()}
+
+@instrument("format_chat")
+def format_recommendations_for_chat(recommendations, land_size=1.0, month=None, season=None):
     """
     Format crop recommendations for chat display.
     
     Args:
         recommendations (list): List of crop recommendation objects
         land_size (float): Size of land in acres
-        
+        month (str): Requested month, for the season score
+        season (str): Requested season, for the season score
+    
     Returns:
         str: Formatted string with recommendations
     """
@@ -142,8 +987,8 @@ def format_recommendations_for_chat(recommendations, land_size=1.0):
     
     response = f"Based on your criteria, here are {len(recommendations)} crop recommendations:\n\n"
     
-    # Limit to top 5 recommendations to avoid overwhelming the user
-    for rec in recommendations[:5]:
+    # Limit to the 5 best-scoring recommendations to avoid overwhelming the user
+    for rec in top_recommendations(recommendations, 5, month, season):
         response += f"🌾 **{rec['crop_name']}**\n"
         response += f"   - Soil: {rec['soil_type']}\n"
         response += f"   - Planting Month: {rec['month']}\n"
@@ -154,12 +999,12 @@ def format_recommendations_for_chat(recommendations, land_size=1.0):
         # Add drought measures (limited to 3 for readability)
         response += "🏜️ **Drought Measures**:\n"
         for measure in rec['drought_measures'][:3]:
-            response += f"   - {measure}\n"
+            response += f"   - {measure_text(measure)}\n"
         
         # Add flood measures (limited to 3 for readability)
         response += "\n🌊 **Flood Measures**:\n"
         for measure in rec['flood_measures'][:3]:
-            response += f"   - {measure}\n"
+            response += f"   - {measure_text(measure)}\n"
         
         response += "\n" + "-" * 40 + "\n\n"
     
@@ -169,13 +1014,21 @@ def format_recommendations_for_chat(recommendations, land_size=1.0):
     
     return response
 
-def format_recommendations_for_chart(recommendations):
+@instrument("format_chart")
+def format_recommendations_for_chart(recommendations, month=None, season=None):
     """
     Format recommendations data for chart visualization.
     
+    A RecommendationList is ranked and scaled on the unrounded yields of
+    its records at its land size; recommendation dicts on their rounded
+    expected yields.
+    
     Args:
-        recommendations (list): List of crop recommendation objects
-        
+        recommendations (list): List of crop recommendation objects, or a
+            RecommendationList
+        month (str): Requested month, for the season score
+        season (str): Requested season, for the season score
+    
     Returns:
         dict: Data formatted for chart visualization
     """
@@ -185,99 +1038,68 @@ def format_recommendations_for_chart(recommendations):
             "values": [0]
         }
     
-    # Sort recommendations by expected yield
-    sorted_recs = sorted(recommendations, key=lambda x: x['expected_yield'], reverse=True)
+    # Limit to the 8 best-scoring recommendations for better visualization
+    if isinstance(recommendations, RecommendationList):
+        target = season or month_season(month)
+        records = scoring_engine.top_k(recommendations.records, 8, RECORD_FEATURES, target)
+        yields = [record.yield_tons(recommendations.land_size) for record in records]
+        peak = max(yields)
+        return {
+            "labels": [record.crop_name for record in records],
+            # Dividing first keeps the best crop at exactly 100
+            "values": [expected_yield / peak * 100 if peak else 0 for expected_yield in yields]
+        }
     
-    # Limit to top 8 for better visualization
-    top_recs = sorted_recs[:8]
+    top_recs = top_recommendations(recommendations, 8, month, season)
+    peak = max(rec['expected_yield'] for rec in top_recs)
     
     return {
         "labels": [rec['crop_name'] for rec in top_recs],
-        "values": [rec['expected_yield'] * 100 / max(rec['expected_yield'] for rec in top_recs) for rec in top_recs]
+        "values": [rec['expected_yield'] * 100 / peak for rec in top_recs]
     }
 
-def get_climate_remedial_measures(climate_condition, recommendations=None):
+@instrument("climate_measures")
+def get_climate_remedial_measures(climate_condition, recommendations=None, soil_type=None, land_type=None):
     """
     Get climate remedial measures based on condition and available recommendations.
     
+    The measures are ranked by how many of the recommendations carry them.
+    Without recommendations, the most common measures of the dataset rows
+    with the given soil and land type are looked up in the precomputed
+    measure index, or those of the whole dataset if no row matches.
+    
     Args:
         climate_condition (str): Climate condition (e.g., "drought", "flood")
         recommendations (list): Optional list of crop recommendations to extract measures from
+        soil_type (str): Soil type to rank measures for when no recommendations are given
+        land_type (str): Land type to rank measures for when no recommendations are given
         
     Returns:
         str: Formatted climate remedial measures
     """
     climate_condition = climate_condition.lower()
     
-    if not recommendations:
-        # If no specific recommendations, provide general measures from the first matching entries
-        if "drought" in climate_condition:
-            measures = []
-            # Get unique drought measures from the first 3 entries that have them
-            for entry in crop_data[:20]:
-                drought_measures = entry.get("REMEDIAL MEASURES - DROUGHT")
-                if drought_measures and drought_measures not in measures:
-                    measures.append(drought_measures)
-                if len(measures) >= 5:
-                    break
-            
-            response = "Here are general remedial measures for drought conditions:\n\n"
-            for i, measure in enumerate(measures, 1):
-                response += f"{i}. {measure}\n\n"
-            
-            return response
-            
-        elif "flood" in climate_condition:
-            measures = []
-            # Get unique flood measures from the first 3 entries that have them
-            for entry in crop_data[:20]:
-                flood_measures = entry.get("REMEDIAL MEASURE - FLOOD")
-                if flood_measures and flood_measures not in measures:
-                    measures.append(flood_measures)
-                if len(measures) >= 5:
-                    break
-            
-            response = "Here are general remedial measures for flood conditions:\n\n"
-            for i, measure in enumerate(measures, 1):
-                response += f"{i}. {measure}\n\n"
-            
-            return response
-        
-        else:
-            return "Please specify 'drought' or 'flood' to get climate remedial measures."
-    
-    # If recommendations are provided, extract measures from them
-    response = f"Remedial measures for {climate_condition} conditions:\n\n"
-    
     if "drought" in climate_condition:
-        all_measures = []
-        for rec in recommendations:
-            all_measures.extend(rec['drought_measures'])
-        
-        # Get unique measures
-        unique_measures = []
-        for measure in all_measures:
-            if measure not in unique_measures and measure != "Information not available":
-                unique_measures.append(measure)
-        
-        for i, measure in enumerate(unique_measures[:7], 1):
-            response += f"{i}. {measure}\n\n"
-            
+        condition = "drought"
     elif "flood" in climate_condition:
-        all_measures = []
-        for rec in recommendations:
-            all_measures.extend(rec['flood_measures'])
-        
-        # Get unique measures
-        unique_measures = []
-        for measure in all_measures:
-            if measure not in unique_measures and measure != "Information not available":
-                unique_measures.append(measure)
-        
-        for i, measure in enumerate(unique_measures[:7], 1):
-            response += f"{i}. {measure}\n\n"
+        condition = "flood"
+    else:
+        return "Please specify 'drought' or 'flood' to get climate remedial measures."
+    
+    measures = None
+    if recommendations:
+        measures = rank_measures(condition, recommendations)
+    elif recommendations is None:
+        measures = current_snapshot().measure_index.top(condition, soil_type, land_type)
     
+    if measures is None or not (recommendations or soil_type or land_type):
+        # Nothing matches, so fall back to the most common measures overall
+        measures = current_snapshot().measure_index.top(condition)
+        response = f"Here are general remedial measures for {condition} conditions:\n\n"
     else:
-        response = "Please specify 'drought' or 'flood' to get climate remedial measures."
+        response = f"Remedial measures for {climate_condition} conditions:\n\n"
     
-    return response
\ No newline at end of file
+    for i, measure in enumerate(measures, 1):
+        response += f"{i}. {measure_text(measure)}\n\n"
+    
+    return response
@@ -0,0 +1,194 @@
+"""
+Regional crop datasets, loaded on first use and evicted under a memory budget.
+
+Each region is a `<region>.json` file in the same format as csvjson.json,
+with an optional compiled `<region>.bin` next to it (see
+columnar_dataset.py), or only a `<region>.bin` built by ingest.py, in
+FARMBOT_REGIONS_DIR. A region is loaded into its
+own DatasetSnapshot the first time a request names it, so a worker serving
+tens of regions only holds the ones in use. Loaded regions are kept in
+least-recently-used order; when their estimated size exceeds the memory
+budget, the least recently used ones are dropped and load again on their
+next request.
+
+Requests that name no region keep using the default dataset of
+crop_recommendation, which is loaded at import. Snapshot versions are unique
+across regions, so every cache keyed on the dataset version keeps regions
+apart.
+"""
+
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+from columnar_dataset import DatasetFormatError
+from crop_recommendation import (
+    build_snapshot,
+    dataset_signature,
+    estimate_snapshot_size,
+    load_data,
+    next_version,
+)
+
+logger = logging.getLogger(__name__)
+
+# Directory of the regional datasets
+REGIONS_DIR = Path(os.environ.get(
+    "FARMBOT_REGIONS_DIR", Path(__file__).parent / "static" / "data" / "regions"
+))
+
+# Estimated memory the loaded regions of a worker may take, in MB
+REGION_MEMORY_MB = float(os.environ.get("FARMBOT_REGION_MEMORY_MB", "256"))
+
+# Region names are file names, so only these characters are accepted
+REGION_NAME = re.compile(r"[A-Za-z0-9_-]{1,64}")
+
+class UnknownRegion(LookupError):
+    """Raised for a region name with no dataset file."""
+
+class DatasetRegistry:
+    """
+    Regional dataset snapshots by name, loaded lazily and evicted LRU.
+    
+    The region most recently loaded is never evicted, even if it alone
+    exceeds the budget. Requests that pinned an evicted snapshot finish on
+    it; the memory is freed when the last of them is done.
+    
+    Args:
+        directory (Path): Directory of the `<region>.json` files
+        memory_budget (int): Estimated bytes the loaded regions may take
+    """
+    
+    def __init__(self, directory, memory_budget):
+        self.directory = Path(directory)
+        self.memory_budget = memory_budget
+        self._loaded = OrderedDict()  # region -> (snapshot, estimated bytes)
+        self._lock = threading.Lock()
+        self._loading = {}  # region -> lock held while the region loads
+        self.loads = 0
+        self.evictions = 0
+    
+    def path(self, region):
+        """
+        Dataset file of a region, the JSON path even if only the compiled
+        file exists.
+        
+        Raises:
+            UnknownRegion: If the name is malformed or has no dataset file
+        """
+        if not isinstance(region, str) or not REGION_NAME.fullmatch(region):
+            raise UnknownRegion(region)
+        path = self.directory / f"{region}.json"
+        if not path.is_file() and not path.with_suffix(".bin").is_file():
+            raise UnknownRegion(region)
+        return path
+    
+    def regions(self):
+        """Names of the regions with a dataset file, sorted."""
+        if not self.directory.is_dir():
+            return []
+        return sorted({
+            path.stem for path in self.directory.iterdir()
+            if path.suffix in (".json", ".bin") and REGION_NAME.fullmatch(path.stem)
+        })
+    
+    def get(self, region):
+        """
+        Return the snapshot of a region, loading it on first use.
+        
+        Concurrent requests for a region that is not loaded yet wait for a
+        single load rather than each loading it.
+        
+        Args:
+            region (str): Region name
+        
+        Returns:
+            DatasetSnapshot: The region's snapshot
+        
+        Raises:
+            UnknownRegion: If the region has no dataset file
+            DatasetFormatError: If the region's file holds no crop data
+        """
+        with self._lock:
+            entry = self._loaded.get(region)
+            if entry is not None:
+                self._loaded.move_to_end(region)
+                return entry[0]
+        
+        path = self.path(region)
+        with self._lock:
+            load_lock = self._loading.setdefault(region, threading.Lock())
+        
+        with load_lock:
+            with self._lock:
+                entry = self._loaded.get(region)
+                if entry is not None:
+                    self._loaded.move_to_end(region)
+                    return entry[0]
+            
+            snapshot, size = self._load(region, path)
+            with self._lock:
+                self._loaded[region] = (snapshot, size)
+                self.loads += 1
+                self._evict()
+            return snapshot
+    
+    def _load(self, region, path):
+        """Build the snapshot of a region and estimate its size."""
+        start = time.perf_counter()
+        source = dataset_signature(path)
+        data = load_data(path=path)
+        if not data:
+            raise DatasetFormatError(f"No crop data could be loaded from {path}")
+        
+        snapshot = build_snapshot(data, next_version(), source)
+        size = estimate_snapshot_size(snapshot)
+        logger.info("Loaded region %s with %d entries (%.1f MB) in %.0f ms", region, len(data),
+                    size / 2**20, (time.perf_counter() - start) * 1000)
+        return snapshot, size
+    
+    def _evict(self):
+        """Drop least recently used regions until the rest fit the budget."""
+        size = sum(entry[1] for entry in self._loaded.values())
+        while size > self.memory_budget and len(self._loaded) > 1:
+            region, (_, region_size) = self._loaded.popitem(last=False)
+            size -= region_size
+            self.evictions += 1
+            logger.info("Evicted region %s (%.1f MB)", region, region_size / 2**20)
+    
+    def invalidate(self, region):
+        """
+        Drop a loaded region, so its next request reloads its file.
+        
+        Returns:
+            bool: Whether the region was loaded
+        """
+        with self._lock:
+            return self._loaded.pop(region, None) is not None
+    
+    def stats(self):
+        """Return the loaded regions and counters as a dict."""
+        with self._lock:
+            loaded = {
+                region: {
+                    "version": snapshot.version,
+                    "entries": len(snapshot.data),
+                    "estimated_bytes": size,
+                    "loaded_at": snapshot.loaded_at
+                }
+                for region, (snapshot, size) in self._loaded.items()
+            }
+            return {
+                "directory": str(self.directory),
+                "memory_budget": self.memory_budget,
+                "estimated_bytes": sum(region["estimated_bytes"] for region in loaded.values()),
+                "loaded": loaded,
+                "loads": self.loads,
+                "evictions": self.evictions
+            }
+
+registry = DatasetRegistry(REGIONS_DIR, int(REGION_MEMORY_MB * 2**20))
@@ -0,0 +1,236 @@
+"""
+Fuzzy and multilingual lookup of filter values.
+
+Resolves approximate, misspelled and transliterated inputs ("red soils",
+"karisal", "thai month", "tomatoe") to the canonical values used in the
+dataset, using a character trigram index over the canonical values, the
+Tamil month names, Tamil/transliterated aliases and the Tamil strings in
+static/js/translations.js.
+"""
+
+import logging
+import re
+from collections import Counter
+from functools import lru_cache
+from pathlib import Path
+
+from crop_recommendation import MONTH_ORDER, VERSION_CACHE_SIZE, dataset_version, get_options
+
+logger = logging.getLogger(__name__)
+
+TRANSLATIONS_PATH = Path(__file__).parent / "static" / "js" / "translations.js"
+
+# Fields that can be resolved, besides the dataset's filter columns
+CLIMATE_FIELD = "CLIMATE"
+CLIMATE_CONDITIONS = ("drought", "flood")
+
+# Tamil and transliterated names, keyed by the English canonical value
+ALIASES = {
+    "SOIL TYPE": {
+        "Black Soil": ["karisal", "karisal mann", "கரிசல் மண்", "கரிசல்", "regur"],
+        "Red Soil": ["semman", "sem mann", "செம்மண்", "செம்மண் நிலம்"],
+        "Sandy Soil": ["manal", "manal mann", "மணல் மண்", "மணல்"],
+        "Silty Soil": ["vandal", "vandal mann", "வண்டல் மண்", "வண்டல்", "alluvial soil"],
+    },
+    "SEASON": {
+        "Summer": ["kodai", "kodai kaalam", "கோடை", "கோடைக்காலம்"],
+        "Winter": ["kulir kaalam", "பனிக்காலம்", "குளிர்காலம்"],
+        "Monsoon": ["rainy", "rainy season", "mazhai kaalam", "மழைக்காலம்"],
+    },
+    "LAND TYPE": {
+        "Dry Land": ["punjai", "புஞ்சை", "dryland", "rainfed"],
+        "Wet Land": ["nanjai", "நஞ்சை", "wetland", "irrigated"],
+    },
+    "MONTH": {
+        "Chithirai": ["சித்திரை", "chitrai"],
+        "Vaikasi": ["வைகாசி", "vaigasi"],
+        "Aani": ["ஆனி", "ani"],
+        "Aadi": ["ஆடி", "adi"],
+        "Aavani": ["ஆவணி", "avani"],
+        "Purattasi": ["புரட்டாசி", "puratasi"],
+        "Aippasi": ["ஐப்பசி", "ipasi"],
+        "Karthigai": ["கார்த்திகை", "karthikai", "kartigai"],
+        "Margazhi": ["மார்கழி", "margali"],
+        "Thai": ["தை"],
+        "Maasi": ["மாசி", "masi"],
+        "Panguni": ["பங்குனி"],
+    },
+}
+
+# Words that carry no information about the value ("thai month", "red soils")
+NOISE_WORDS = {"month", "season", "the", "in", "of", "maatham", "masam", "மாதம்"}
+
+# Minimum Dice similarity of trigram sets for a fuzzy match
+MIN_SIMILARITY = 0.5
+
+# A fuzzy match must be at least this much more similar than any other
+# value, so generic words ("soil", "land", "gram") resolve to nothing
+MIN_MARGIN = 0.2
+
+class AmbiguousValue(ValueError):
+    """Raised when an input is about as similar to several values."""
+    
+    def __init__(self, text, candidates):
+        choices = f"{', '.join(candidates[:-1])} or {candidates[-1]}"
+        super().__init__(f"Ambiguous value {text!r}: could be {choices}")
+        self.text = text
+        self.candidates = candidates
+
+def normalize_text(text):
+    """Lowercase, drop punctuation and noise words, collapse whitespace."""
+    # Tamil vowel signs are not \w, so the Tamil block is matched explicitly
+    words = re.findall(r"[\w\u0B80-\u0BFF]+", str(text).lower())
+    return " ".join(word for word in words if word not in NOISE_WORDS)
+
+def trigrams(text):
+    """Character trigrams of a normalized string, padded at word boundaries."""
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+class FuzzyIndex:
+    """
+    Trigram index over lookup keys.
+    
+    Args:
+        entries (iterable): (key, canonical value) pairs; several keys may
+            map to the same canonical value
+    """
+    
+    def __init__(self, entries):
+        self.exact = {}
+        self.keys = []
+        self.postings = {}
+        for key, canonical in entries:
+            normalized = normalize_text(key)
+            if not normalized or normalized in self.exact:
+                continue
+            self.exact[normalized] = canonical
+            key_id = len(self.keys)
+            grams = trigrams(normalized)
+            self.keys.append((canonical, len(grams)))
+            for gram in grams:
+                self.postings.setdefault(gram, []).append(key_id)
+    
+    def lookup(self, text, min_similarity=MIN_SIMILARITY, min_margin=MIN_MARGIN):
+        """
+        Find the canonical value closest to the text.
+        
+        Returns:
+            tuple: (canonical value, similarity between 0 and 1), or None if
+                nothing is similar enough
+        
+        Raises:
+            AmbiguousValue: If another value is within min_margin of the
+                closest one
+        """
+        normalized = normalize_text(text)
+        if not normalized:
+            return None
+        if normalized in self.exact:
+            return self.exact[normalized], 1.0
+        
+        grams = trigrams(normalized)
+        shared = Counter()
+        for gram in grams:
+            shared.update(self.postings.get(gram, ()))
+        
+        # Several keys (aliases) may share a value; keep each value's closest
+        similarities = {}
+        for key_id, count in shared.items():
+            canonical, size = self.keys[key_id]
+            similarity = 2 * count / (len(grams) + size)
+            if similarity > similarities.get(canonical, 0.0):
+                similarities[canonical] = similarity
+        
+        ranked = sorted(similarities.items(), key=lambda match: match[1], reverse=True)
+        if not ranked or ranked[0][1] < min_similarity:
+            return None
+        close = [canonical for canonical, similarity in ranked if ranked[0][1] - similarity < min_margin]
+        if len(close) > 1:
+            raise AmbiguousValue(text, close)
+        return ranked[0]
+
+def load_translation_aliases(path=TRANSLATIONS_PATH):
+    """
+    Read the Tamil strings of translations.js whose English text is a
+    climate condition or filter value.
+    
+    Returns:
+        dict: {English text (lowercase): [Tamil text, ...]}
+    """
+    try:
+        source = Path(path).read_text(encoding="utf-8")
+    except OSError as e:
+        logger.warning("Could not read translations for fuzzy lookup: %s", e)
+        return {}
+    
+    sections = {}
+    for name, body in re.findall(r"(\w+)\s*:\s*\{(.*?)\n\s*\}", source, re.DOTALL):
+        sections[name] = dict(re.findall(r'"(\w+)"\s*:\s*"([^"]*)"', body))
+    
+    english, tamil = sections.get("english", {}), sections.get("tamil", {})
+    aliases = {}
+    for key, text in english.items():
+        if key in tamil:
+            aliases.setdefault(text.lower(), []).append(tamil[key])
+    return aliases
+
+def build_indexes():
+    """
+    Build one FuzzyIndex per resolvable field from the current dataset.
+    
+    Returns:
+        dict: {field: FuzzyIndex}
+    """
+    translations = load_translation_aliases()
+    entries = {}
+    
+    for field in ("SOIL TYPE", "SEASON", "LAND TYPE", "CROP NAME"):
+        values = get_options(field)
+        entries[field] = [(value, value) for value in values]
+        for value in values:
+            entries[field] += [(alias, value) for alias in ALIASES.get(field, {}).get(value, [])]
+            entries[field] += [(alias, value) for alias in translations.get(value.lower(), [])]
+    
+    # Months resolve from the Tamil name alone, e.g. "thai" -> "Thai(Mid January-Mid February)"
+    entries["MONTH"] = []
+    for value in get_options("MONTH"):
+        name = value.split("(")[0].strip()
+        entries["MONTH"] += [(value, value), (name, value)]
+        if name in MONTH_ORDER:
+            entries["MONTH"] += [(alias, value) for alias in ALIASES["MONTH"].get(name, [])]
+    
+    entries[CLIMATE_FIELD] = []
+    for condition in CLIMATE_CONDITIONS:
+        entries[CLIMATE_FIELD] += [(condition, condition)]
+        entries[CLIMATE_FIELD] += [(alias, condition) for alias in translations.get(condition, [])]
+    
+    return {field: FuzzyIndex(field_entries) for field, field_entries in entries.items()}
+
+def get_index(field):
+    """Return the FuzzyIndex for a field, building all indexes on first use of a dataset version."""
+    return _indexes(dataset_version())[field]
+
+@lru_cache(maxsize=VERSION_CACHE_SIZE)
+def _indexes(version):
+    return build_indexes()
+
+def resolve(field, text, min_similarity=MIN_SIMILARITY):
+    """
+    Resolve user input to a canonical value of a field.
+    
+    Args:
+        field (str): "SOIL TYPE", "MONTH", "SEASON", "LAND TYPE", "CROP NAME" or "CLIMATE"
+        text (str): User input
+        min_similarity (float): Minimum trigram similarity for a fuzzy match
+    
+    Returns:
+        str: Canonical value, or None if nothing is close enough
+    
+    Raises:
+        AmbiguousValue: If the input is about as close to several values
+    """
+    if not text:
+        return None
+    match = get_index(field).lookup(text, min_similarity)
+    return match[0] if match else None
@@ -0,0 +1,486 @@
+"""
+Streaming, incremental ingestion of the crop dataset from CSV.
+
+    python ingest.py [source.csv] [output.bin] [--json output.json]
+
+The source CSV is read one row at a time, and every row is validated and
+normalized on the way:
+
+- column names are matched ignoring case and punctuation, so "Remedial
+  Measures - Flood", "FLOOD MEASURES" and "REMEDIAL MEASURE - FLOOD" all
+  fill the dataset's REMEDIAL MEASURE - FLOOD column
+- YIELD and CROP ID must be numbers ("1,250.5" is accepted)
+- MONTH must be a month of MONTH_ORDER, by its Tamil or transliterated
+  name with or without the Gregorian span, and is stored as the dataset's
+  full label, e.g. "Thai(Mid January-Mid February)"
+- soil, land type and season are title-cased, whitespace is trimmed and
+  measure text gets Unix line endings
+
+Rows that fail are reported with their row number, counting the header as
+row 1 as spreadsheets do, and left out.
+
+Updates are incremental. A SQLite staging database next to the output keeps
+every normalized row under a hash of its source fields, and the row order
+as a list of those hashes. A rerun only normalizes rows with a hash it has
+not seen, and leaves the compiled file alone if no row was added, changed,
+removed or moved. Otherwise the compiled dataset is streamed from the
+staging database through a ColumnarWriter, so memory is bounded by one
+batch of rows and the compiled columns, however large the CSV is.
+"""
+
+import argparse
+import csv
+import hashlib
+import json
+import logging
+import math
+import os
+import re
+import sqlite3
+import sys
+import time
+from collections import namedtuple
+from pathlib import Path
+
+from columnar_dataset import ColumnarWriter, source_signature
+from crop_recommendation import DATA_PATH, DROUGHT_MEASURES_FIELD, FLOOD_MEASURES_FIELD, MONTH_ORDER
+from fuzzy_lookup import ALIASES
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SOURCE = DATA_PATH.with_suffix(".csv")
+DEFAULT_OUTPUT = DATA_PATH.with_suffix(".bin")
+
+# Columns of the compiled dataset and their kinds, in file order
+COLUMNS = {
+    "SOIL TYPE": "category",
+    "MONTH": "category",
+    "SEASON": "category",
+    "LAND TYPE": "category",
+    "CROP ID": "int",
+    "CROP NAME": "category",
+    "YIELD": "float",
+    DROUGHT_MEASURES_FIELD: "text",
+    FLOOD_MEASURES_FIELD: "text",
+}
+
+# Columns every row must have a value for
+REQUIRED_COLUMNS = ("SOIL TYPE", "MONTH", "SEASON", "LAND TYPE", "CROP NAME", "YIELD")
+
+# Dataset column of source column names, as normalized by column_key
+COLUMN_ALIASES = {
+    "SOIL": "SOIL TYPE",
+    "SOIL TYPE": "SOIL TYPE",
+    "MONTH": "MONTH",
+    "SOWING MONTH": "MONTH",
+    "PLANTING MONTH": "MONTH",
+    "SEASON": "SEASON",
+    "LAND": "LAND TYPE",
+    "LAND TYPE": "LAND TYPE",
+    "ID": "CROP ID",
+    "CROP ID": "CROP ID",
+    "CROP": "CROP NAME",
+    "CROP NAME": "CROP NAME",
+    "YIELD": "YIELD",
+    "YIELD PER ACRE": "YIELD",
+}
+
+# Measure columns are recognized by the climate condition in their name
+MEASURE_COLUMNS = {"DROUGHT": DROUGHT_MEASURES_FIELD, "FLOOD": FLOOD_MEASURES_FIELD}
+
+# Columns whose values are title-cased
+TITLE_COLUMNS = ("SOIL TYPE", "SEASON", "LAND TYPE")
+
+# Gregorian span of every Tamil month, as in the dataset's month labels
+MONTH_SPANS = {
+    "Chithirai": "Mid April-Mid May",
+    "Vaikasi": "Mid May-Mid June",
+    "Aani": "Mid June-Mid July",
+    "Aadi": "Mid July-Mid August",
+    "Aavani": "Mid August-Mid September",
+    "Purattasi": "Mid September-Mid October",
+    "Aippasi": "Mid October-Mid November",
+    "Karthigai": "Mid November-Mid December",
+    "Margazhi": "Mid December - Mid January",
+    "Thai": "Mid January-Mid February",
+    "Maasi": "Mid February-Mid March",
+    "Panguni": "Mid March-Mid April",
+}
+
+# Month of MONTH_ORDER by lower-cased name or alias
+MONTH_NAMES = {
+    name.lower(): month
+    for month in MONTH_ORDER
+    for name in (month, *ALIASES["MONTH"].get(month, ()))
+}
+
+# Changes whenever normalize_row does, so rows staged by an older version
+# are normalized again
+NORMALIZER_VERSION = "1"
+
+# Source rows read, hashed and staged together
+BATCH_SIZE = 1000
+
+class IngestError(Exception):
+    """Raised when a source cannot be ingested at all."""
+
+class IngestReport(namedtuple("IngestReport", ["rows", "normalized", "removed", "rejected", "compiled", "errors"])):
+    """
+    Outcome of an ingestion run.
+    
+    `rows` is the number of rows in the dataset, `normalized` the number of
+    new or changed rows that had to be normalized, `removed` the number of
+    staged rows no longer in the source, `rejected` the number of invalid
+    rows, `compiled` whether the compiled dataset was rewritten, and
+    `errors` the first messages about rejected rows.
+    """
+    __slots__ = ()
+
+def column_key(name):
+    """Upper-case a column name and reduce its punctuation to single spaces."""
+    return re.sub(r"[^A-Z0-9]+", " ", name.upper()).strip()
+
+def map_columns(header):
+    """
+    Dataset column of every source column.
+    
+    Args:
+        header (list): Source column names
+    
+    Returns:
+        list: Dataset column name, or None for a column that is ignored
+    
+    Raises:
+        IngestError: If a required column is missing or two source columns
+            fill the same dataset column
+    """
+    columns = []
+    for name in header:
+        key = column_key(name)
+        column = COLUMN_ALIASES.get(key)
+        if column is None:
+            fields = [field for condition, field in MEASURE_COLUMNS.items() if condition in key.split()]
+            if len(fields) == 1:
+                column = fields[0]
+        if column is None:
+            logger.warning("Ignoring column %r", name)
+        elif column in columns:
+            raise IngestError(f"Columns {header[columns.index(column)]!r} and {name!r} both fill {column}")
+        columns.append(column)
+    
+    missing = [column for column in REQUIRED_COLUMNS if column not in columns]
+    if missing:
+        raise IngestError(f"Missing columns: {', '.join(missing)}")
+    return columns
+
+def parse_number(value, column):
+    """Parse a number, allowing thousands separators."""
+    try:
+        number = float(value.replace(",", ""))
+    except ValueError:
+        raise ValueError(f"{column} is not a number: {value!r}") from None
+    if not math.isfinite(number) or number < 0:
+        raise ValueError(f"{column} must be a non-negative number: {value!r}")
+    return number
+
+def normalize_month(value):
+    """Full dataset label of a month given by name, alias or label."""
+    month = MONTH_NAMES.get(value.split("(", 1)[0].strip().lower())
+    if month is None:
+        raise ValueError(f"Unknown month: {value!r}")
+    return f"{month}({MONTH_SPANS[month]})"
+
+def normalize_row(fields):
+    """
+    Validate and normalize the fields of one source row.
+    
+    Args:
+        fields (dict): Raw text by dataset column
+    
+    Returns:
+        dict: Crop data entry with the columns in dataset order; empty
+            values are left out
+    
+    Raises:
+        ValueError: If a value is invalid or a required one is missing
+    """
+    row = {}
+    for column, value in fields.items():
+        value = value.replace("\r\n", "\n").strip()
+        if not value:
+            continue
+        if column == "MONTH":
+            row[column] = normalize_month(value)
+        elif column == "YIELD":
+            row[column] = parse_number(value, column)
+        elif column == "CROP ID":
+            number = parse_number(value, column)
+            if not number.is_integer():
+                raise ValueError(f"CROP ID is not an integer: {value!r}")
+            row[column] = int(number)
+        elif column in TITLE_COLUMNS:
+            row[column] = " ".join(value.split()).title()
+        elif column == "CROP NAME":
+            row[column] = " ".join(value.split())
+        else:
+            row[column] = value
+    
+    missing = [column for column in REQUIRED_COLUMNS if column not in row]
+    if missing:
+        raise ValueError(f"Missing {', '.join(missing)}")
+    return {column: row[column] for column in COLUMNS if column in row}
+
+def row_hash(fields):
+    """Hash of a row's raw fields under their dataset column names."""
+    text = "\x1f".join(f"{column}\x1e{value}" for column, value in sorted(fields.items()))
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+class StagingDatabase:
+    """
+    Normalized rows of previous runs, by the hash of their source fields,
+    and the row order of the last run.
+    
+    Args:
+        path (str or Path): SQLite file, created if missing
+    """
+    
+    def __init__(self, path):
+        self.connection = sqlite3.connect(path, isolation_level=None)
+        self.connection.executescript("""
+            PRAGMA journal_mode=WAL;
+            PRAGMA synchronous=NORMAL;
+            CREATE TABLE IF NOT EXISTS rows (hash TEXT PRIMARY KEY, row TEXT NOT NULL);
+            CREATE TABLE IF NOT EXISTS positions (position INTEGER PRIMARY KEY, hash TEXT NOT NULL);
+            CREATE TABLE IF NOT EXISTS next_positions (position INTEGER PRIMARY KEY, hash TEXT NOT NULL);
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+        """)
+    
+    def get_meta(self, key):
+        """Value of a run setting, or None."""
+        row = self.connection.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row is not None else None
+    
+    def set_meta(self, key, value):
+        """Store a run setting."""
+        self.connection.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+    
+    def known(self, hashes):
+        """The hashes of a batch that are already staged."""
+        hashes = list(hashes)
+        found = self.connection.execute(
+            f"SELECT hash FROM rows WHERE hash IN ({', '.join('?' * len(hashes))})", hashes
+        )
+        return {row[0] for row in found}
+    
+    def add_rows(self, rows):
+        """Stage (hash, normalized row JSON) pairs."""
+        self.connection.executemany("INSERT OR IGNORE INTO rows (hash, row) VALUES (?, ?)", rows)
+    
+    def add_positions(self, positions):
+        """Record (position, hash) pairs of the current run."""
+        self.connection.executemany("INSERT INTO next_positions (position, hash) VALUES (?, ?)", positions)
+    
+    def finish_run(self):
+        """
+        Make the current run's row order the staged one and drop rows it
+        no longer uses.
+        
+        Returns:
+            tuple: (whether the row order changed, number of rows dropped)
+        """
+        execute = self.connection.execute
+        moved = execute(
+            "SELECT COUNT(*) FROM next_positions n LEFT JOIN positions p USING (position) "
+            "WHERE p.hash IS NOT n.hash"
+        ).fetchone()[0]
+        changed = moved > 0 or (
+            execute("SELECT COUNT(*) FROM positions").fetchone()[0]
+            != execute("SELECT COUNT(*) FROM next_positions").fetchone()[0]
+        )
+        
+        execute("DELETE FROM positions")
+        execute("INSERT INTO positions SELECT position, hash FROM next_positions")
+        execute("DELETE FROM next_positions")
+        removed = execute("DELETE FROM rows WHERE hash NOT IN (SELECT hash FROM positions)").rowcount
+        return changed, removed
+    
+    def rows(self):
+        """Iterate over the staged rows as JSON text, in source order."""
+        return (row for (row,) in self.connection.execute(
+            "SELECT r.row FROM positions p JOIN rows r USING (hash) ORDER BY p.position"
+        ))
+    
+    def close(self):
+        """Close the database."""
+        self.connection.close()
+
+def ingest(source_path=DEFAULT_SOURCE, output_path=DEFAULT_OUTPUT, json_path=None, staging_path=None,
+           max_errors=100, force=False):
+    """
+    Ingest a CSV source into the compiled dataset.
+    
+    Args:
+        source_path (str or Path): CSV file with a header row
+        output_path (str or Path): Compiled dataset to update
+        json_path (str or Path): Also write the rows as JSON here, e.g. for
+            the JSON loader or tools that read it
+        staging_path (str or Path): Staging database, next to the output
+            with a .staging.db suffix if not given
+        max_errors (int): Rejected rows after which the run is abandoned,
+            leaving the staging database and the output unchanged
+        force (bool): Rewrite the outputs even if nothing changed
+    
+    Returns:
+        IngestReport: What the run did
+    
+    Raises:
+        IngestError: If the source is empty, its header is unusable or
+            more than max_errors rows are invalid
+    """
+    output_path = Path(output_path)
+    staging_path = Path(staging_path) if staging_path else output_path.with_suffix(".staging.db")
+    json_sibling = output_path.with_suffix(".json")
+    if json_sibling.exists() and (json_path is None or Path(json_path) != json_sibling):
+        logger.warning("%s exists, so the app checks %s against it rather than the CSV; "
+                       "pass --json %s to regenerate it, or remove it", json_sibling, output_path, json_sibling)
+    
+    staging = StagingDatabase(staging_path)
+    try:
+        staging.connection.execute("BEGIN")
+        if staging.get_meta("normalizer") != NORMALIZER_VERSION:
+            staging.connection.execute("DELETE FROM rows")
+            staging.set_meta("normalizer", NORMALIZER_VERSION)
+        
+        rows = normalized = rejected = 0
+        errors = []
+        
+        def stage(batch):
+            nonlocal rows, normalized, rejected
+            known = staging.known(hashed for _, _, hashed in batch)
+            new_rows, positions = [], []
+            for number, fields, hashed in batch:
+                if hashed not in known:
+                    try:
+                        row = normalize_row(fields)
+                    except ValueError as e:
+                        rejected += 1
+                        if len(errors) < 20:
+                            errors.append(f"row {number}: {e}")
+                        if rejected > max_errors:
+                            raise IngestError(f"More than {max_errors} invalid rows, the last in row {number}: {e}")
+                        continue
+                    new_rows.append((hashed, json.dumps(row, ensure_ascii=False)))
+                    known.add(hashed)
+                    normalized += 1
+                positions.append((rows, hashed))
+                rows += 1
+            staging.add_rows(new_rows)
+            staging.add_positions(positions)
+        
+        with open(source_path, newline="", encoding="utf-8-sig") as file:
+            reader = csv.reader(file)
+            header = next(reader, None)
+            if header is None:
+                raise IngestError(f"{source_path} is empty")
+            columns = map_columns(header)
+            
+            batch = []
+            for number, record in enumerate(reader, start=2):
+                if not any(field.strip() for field in record):
+                    continue
+                fields = {column: value for column, value in zip(columns, record) if column is not None}
+                batch.append((number, fields, row_hash(fields)))
+                if len(batch) >= BATCH_SIZE:
+                    stage(batch)
+                    batch = []
+            stage(batch)
+        
+        moved, removed = staging.finish_run()
+        changed = normalized > 0 or removed > 0 or moved
+        outputs = [output_path] + ([Path(json_path)] if json_path else [])
+        # Outputs edited or deleted since the last run are rewritten too
+        signatures = json.dumps([signature_or_none(path) for path in outputs])
+        compiled = changed or force or staging.get_meta("outputs") != signatures
+        if compiled:
+            write_outputs(staging, source_path, output_path, json_path)
+            staging.set_meta("outputs", json.dumps([signature_or_none(path) for path in outputs]))
+        
+        staging.connection.execute("COMMIT")
+    except BaseException:
+        if staging.connection.in_transaction:
+            staging.connection.execute("ROLLBACK")
+        raise
+    finally:
+        staging.close()
+    
+    return IngestReport(rows, normalized, removed, rejected, compiled, errors)
+
+def signature_or_none(path):
+    """Signature of a file, or None if it does not exist."""
+    try:
+        return source_signature(path)
+    except OSError:
+        return None
+
+def write_outputs(staging, source_path, output_path, json_path=None):
+    """
+    Stream the staged rows into the compiled dataset, and the JSON file if
+    one is requested. The compiled dataset records the signature of the
+    JSON file when one is written, else of the CSV source.
+    """
+    writer = ColumnarWriter(COLUMNS)
+    json_file = None
+    if json_path:
+        temp_json_path = Path(str(json_path) + ".tmp")
+        json_file = open(temp_json_path, "w", encoding="utf-8")
+        json_file.write("[")
+    
+    try:
+        for number, row in enumerate(staging.rows()):
+            writer.add(json.loads(row))
+            if json_file is not None:
+                json_file.write(",\n" if number else "\n")
+                json_file.write(row)
+    finally:
+        if json_file is not None:
+            json_file.write("\n]\n")
+            json_file.close()
+    
+    if json_path:
+        os.replace(temp_json_path, json_path)
+        source = source_signature(json_path)
+    else:
+        source = source_signature(source_path)
+    return writer.write(output_path, source=source)
+
+def main(argv=None):
+    """Ingest a CSV dataset: python ingest.py [source.csv] [output.bin] [--json output.json]"""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("source", nargs="?", default=DEFAULT_SOURCE, help="CSV source")
+    parser.add_argument("output", nargs="?", default=None, help="compiled dataset (default: source with .bin)")
+    parser.add_argument("--json", dest="json_path", help="also write the rows to this JSON file")
+    parser.add_argument("--staging", help="staging database (default: output with .staging.db)")
+    parser.add_argument("--max-errors", type=int, default=100, help="invalid rows tolerated (default 100)")
+    parser.add_argument("--force", action="store_true", help="rewrite the outputs even if nothing changed")
+    args = parser.parse_args(argv)
+    
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+    source_path = Path(args.source)
+    output_path = Path(args.output) if args.output else source_path.with_suffix(".bin")
+    
+    start = time.perf_counter()
+    try:
+        report = ingest(source_path, output_path, args.json_path, args.staging, args.max_errors, args.force)
+    except (IngestError, OSError) as e:
+        print(f"Ingestion failed: {e}", file=sys.stderr)
+        return 1
+    
+    for error in report.errors:
+        print(f"Rejected {error}", file=sys.stderr)
+    outcome = f"rewrote {output_path}" if report.compiled else f"{output_path} is up to date"
+    print(f"Ingested {report.rows} rows from {source_path} in {time.perf_counter() - start:.2f} s: "
+          f"{report.normalized} new or changed, {report.removed} removed, {report.rejected} rejected; {outcome}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
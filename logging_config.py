@@ -0,0 +1,190 @@
+"""
+Logging setup for FarmBot.
+
+The level and output format come from the environment. Records are handed
+to a bounded queue by the thread that logs them and written to stderr by a
+single background listener, so a slow terminal or log collector never
+blocks a request. The listener thread starts with the first record of each
+process, so workers forked from a preloaded app (gunicorn --preload), which
+do not inherit the parent's threads, start their own. Every record carries
+the ID of the request it was logged in, and FARMBOT_LOG_FORMAT=json writes
+one JSON object per line for log collectors.
+
+Log with %-style arguments, not f-strings, so messages below the configured
+level are never formatted:
+    
+    logger.debug("Finding crops with soil=%s", soil_type)
+"""
+
+import atexit
+import contextvars
+import json
+import logging
+import os
+import queue
+import re
+import sys
+import threading
+import time
+import uuid
+from logging.handlers import QueueHandler, QueueListener
+
+LOG_LEVEL = os.environ.get("FARMBOT_LOG_LEVEL", "INFO").upper()
+
+# "text" or "json"
+LOG_FORMAT = os.environ.get("FARMBOT_LOG_FORMAT", "text").lower()
+
+# Records waiting for the listener; further records are dropped when full
+LOG_QUEUE_SIZE = int(os.environ.get("FARMBOT_LOG_QUEUE_SIZE", "10000"))
+
+TEXT_FORMAT = "%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s"
+
+# ID of the request being handled, "-" outside requests
+request_id = contextvars.ContextVar("request_id", default="-")
+
+# Incoming X-Request-ID values are reused only when they are safe to log
+REQUEST_ID_PATTERN = re.compile(r"[A-Za-z0-9._-]{1,64}")
+
+def new_request_id(incoming=None):
+    """
+    Pick the ID of a request.
+    
+    Args:
+        incoming (str): X-Request-ID header sent by the client or a proxy
+    
+    Returns:
+        str: The incoming ID if it is well formed, otherwise a random one
+    """
+    if incoming and REQUEST_ID_PATTERN.fullmatch(incoming):
+        return incoming
+    return uuid.uuid4().hex
+
+class RequestIdFilter(logging.Filter):
+    """Attach the current request ID to records on the logging thread."""
+    
+    def filter(self, record):
+        record.request_id = request_id.get()
+        return True
+
+class JsonFormatter(logging.Formatter):
+    """Format records as single-line JSON objects."""
+    
+    def format(self, record):
+        entry = {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created)) + f".{int(record.msecs):03d}Z",
+            "level": record.levelname,
+            "logger": record.name,
+            "request_id": getattr(record, "request_id", "-"),
+            "message": record.getMessage(),
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False)
+
+class DroppingQueueHandler(QueueHandler):
+    """Queue handler that drops records instead of blocking when the queue is full."""
+    
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+    
+    def prepare(self, record):
+        # Keep the exception for the listener's formatter instead of
+        # folding its text into the message here
+        exc_info = record.exc_info
+        if exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(exc_info)
+        record.message = record.getMessage()
+        record.msg, record.args, record.exc_info = record.message, None, None
+        return record
+    
+    def enqueue(self, record):
+        if _listener_pid != os.getpid():
+            _start_listener()
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+_listener = None
+_handler = None
+_listener_pid = None  # Process whose listener thread is running
+_start_lock = threading.Lock()
+
+def configure_logging(level=None, fmt=None, stream=None):
+    """
+    Route all logging through a queue to a background writer.
+    
+    Calling it again replaces the previous configuration. An unknown level
+    falls back to INFO with a warning rather than failing the import of
+    the app.
+    
+    Args:
+        level (str): Level name, defaults to FARMBOT_LOG_LEVEL (INFO)
+        fmt (str): "text" or "json", defaults to FARMBOT_LOG_FORMAT (text)
+        stream: Where records are written, defaults to stderr
+    """
+    global _listener, _handler
+    
+    requested = (level or LOG_LEVEL).upper()
+    level = requested if isinstance(logging.getLevelName(requested), int) else "INFO"
+    fmt = (fmt or LOG_FORMAT).lower()
+    
+    stop_logging()
+    
+    output = logging.StreamHandler(stream or sys.stderr)
+    output.setFormatter(JsonFormatter() if fmt == "json" else logging.Formatter(TEXT_FORMAT))
+    
+    log_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+    _handler = DroppingQueueHandler(log_queue)
+    _handler.addFilter(RequestIdFilter())
+    _listener = QueueListener(log_queue, output, respect_handler_level=True)
+    
+    root = logging.getLogger()
+    root.addHandler(_handler)
+    root.setLevel(level)
+    
+    if level != requested:
+        logging.getLogger(__name__).warning("Unknown log level %r, logging at INFO", requested)
+
+def _start_listener():
+    """Start the listener thread in the calling process, once."""
+    global _listener_pid
+    with _start_lock:
+        if _listener is not None and _listener_pid != os.getpid():
+            _listener.start()
+            _listener_pid = os.getpid()
+
+def _after_fork():
+    """
+    Give a forked child its own queue and listener.
+    
+    The parent's queue may hold its unwritten records and locks taken by
+    its listener thread, which the child does not have.
+    """
+    global _listener, _listener_pid, _start_lock
+    _start_lock = threading.Lock()
+    _listener_pid = None
+    if _listener is not None:
+        log_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+        _handler.queue = log_queue
+        _listener = QueueListener(log_queue, *_listener.handlers, respect_handler_level=True)
+
+def stop_logging():
+    """Write out the queued records and stop the background writer."""
+    global _listener, _listener_pid
+    if _listener is not None:
+        logging.getLogger().removeHandler(_handler)
+        if _listener_pid == os.getpid():
+            _listener.stop()
+        _listener = None
+        _listener_pid = None
+
+def dropped_records():
+    """Number of records dropped because the queue was full."""
+    return _handler.dropped if _handler is not None else 0
+
+atexit.register(stop_logging)
+os.register_at_fork(after_in_child=_after_fork)
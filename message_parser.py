@@ -0,0 +1,235 @@
+"""
+Single-pass intent and entity extraction for chat messages.
+
+The vocabulary (soil types, Tamil months, seasons, land types, crop names,
+climate conditions, land sizes in acres) is built from the dataset at
+startup and compiled into a word-level trie, so every entity in a message
+is found in a single scan instead of a chain of substring checks.
+"""
+
+from collections import namedtuple
+from functools import lru_cache
+
+from crop_recommendation import MONTH_ORDER, VERSION_CACHE_SIZE, dataset_version, get_options
+from fuzzy_lookup import ALIASES, CLIMATE_FIELD, AmbiguousValue, get_index
+from metrics import instrument
+from term_matcher import TermMatcher, tokenize
+
+# Season words users type, mapped to the dataset's SEASON values
+SEASON_SYNONYMS = {
+    "summer": "Summer",
+    "winter": "Winter",
+    "monsoon": "Monsoon",
+    "rainy": "Monsoon",
+    "rainy season": "Monsoon",
+}
+
+# Climate words that turn a message into a remedial-measures request
+CLIMATE_TERMS = {
+    "climate": None,
+    "climatic": None,
+    "remedy": None,
+    "remedies": None,
+    "remedial": None,
+    "drought": "drought",
+    "droughts": "drought",
+    "dry spell": "drought",
+    "flood": "flood",
+    "floods": "flood",
+    "flooding": "flood",
+    "flooded": "flood",
+}
+
+# Units that make a number a land size, e.g. "3 acres", "2.5acre"
+ACRE_UNITS = ("acre", "acres", "ac")
+
+# Fuzzy fallback for misspelt entities: categories tried, in order, with the
+# index they resolve against
+FUZZY_CATEGORIES = (
+    ("soil_type", "SOIL TYPE"),
+    ("month", "MONTH"),
+    ("season", "SEASON"),
+    ("crop", "CROP NAME"),
+)
+
+# Stricter than fuzzy_lookup.MIN_SIMILARITY, since free text has many
+# words that are not entities at all
+FUZZY_SIMILARITY = 0.7
+
+# Shortest word considered for a fuzzy match
+FUZZY_MIN_LENGTH = 5
+
+ParsedMessage = namedtuple("ParsedMessage", [
+    "intent", "soil_type", "month", "season", "land_type", "land_size",
+    "crops", "climate_condition"
+])
+
+def _with_plurals(terms):
+    """Add a plural form of each term, e.g. "red soils" for "red soil", "tomatoes" for "tomato"."""
+    plurals = {}
+    for term, canonical in terms.items():
+        if term.endswith("o"):
+            plurals[f"{term}es"] = canonical
+        elif not term.endswith("s"):
+            plurals[f"{term}s"] = canonical
+    return {**plurals, **terms}
+
+def build_vocabulary():
+    """
+    Build the chat vocabulary from the dataset's facet values.
+    
+    Returns:
+        dict: {category: {term: canonical value}}
+    """
+    months = {}
+    for month in get_options("MONTH"):
+        name = month.split("(")[0].strip()
+        if name in MONTH_ORDER:
+            months[name] = month
+            months.update({alias: month for alias in ALIASES["MONTH"].get(name, [])})
+    
+    return {
+        "soil_type": _with_plurals({
+            **_aliases("SOIL TYPE"),
+            **{soil: soil for soil in get_options("SOIL TYPE")},
+        }),
+        "month": months,
+        "season": {
+            **_aliases("SEASON"),
+            **SEASON_SYNONYMS,
+            **{season: season for season in get_options("SEASON")},
+        },
+        "land_type": {
+            **_aliases("LAND TYPE"),
+            **{land: land for land in get_options("LAND TYPE")},
+            **{land.replace(" ", ""): land for land in get_options("LAND TYPE")},
+        },
+        "crop": _with_plurals({crop: crop for crop in get_options("CROP NAME")}),
+        "climate": {
+            **{key: condition for key, condition in get_index(CLIMATE_FIELD).exact.items()},
+            **CLIMATE_TERMS,
+        },
+    }
+
+def _aliases(field):
+    """Tamil and transliterated names of a field's values present in the dataset."""
+    values = set(get_options(field))
+    return {
+        alias: value
+        for value, aliases in ALIASES.get(field, {}).items() if value in values
+        for alias in aliases
+    }
+
+@lru_cache(maxsize=4096)
+def _fuzzy_match(version, field, phrase):
+    """Fuzzy lookup of a phrase, cached per dataset version since chat messages reuse the same words."""
+    try:
+        match = get_index(field).lookup(phrase, FUZZY_SIMILARITY)
+    except AmbiguousValue:
+        return None
+    return match[0] if match else None
+
+def _fuzzy_entities(version, tokens, matched, found, crops):
+    """
+    Resolve misspelt entities among the words no vocabulary term matched.
+    
+    Each unmatched word is tried together with the next word ("blak soil"),
+    whatever its length, and then alone if it has at least FUZZY_MIN_LENGTH
+    letters, for every category the message did not mention exactly. A word
+    that resolved together with the one before it is not tried again.
+    """
+    used = set(matched)
+    for position, token in enumerate(tokens):
+        if position in used or not token.isalpha():
+            continue
+        phrases = []
+        following = tokens[position + 1] if position + 1 < len(tokens) else None
+        if following is not None and position + 1 not in used and following.isalpha():
+            phrases.append((f"{token} {following}", 2))
+        if len(token) >= FUZZY_MIN_LENGTH:
+            phrases.append((token, 1))
+        
+        for category, field in FUZZY_CATEGORIES:
+            if category in found or (category == "crop" and crops):
+                continue
+            for phrase, length in phrases:
+                value = _fuzzy_match(version, field, phrase)
+                if value is not None:
+                    break
+            else:
+                continue
+            if category == "crop":
+                crops.append(value)
+            else:
+                found[category] = value
+            used.update(range(position, position + length))
+            break
+
+def build_parser():
+    """Compile a TermMatcher for chat messages over the current dataset."""
+    return TermMatcher(build_vocabulary(), number_units={"land_size": ACRE_UNITS})
+
+@lru_cache(maxsize=VERSION_CACHE_SIZE)
+def _parser(version):
+    return build_parser()
+
+@instrument("parse")
+def parse_message(message):
+    """
+    Extract the intent and all entities from a chat message in one scan.
+    
+    Words the vocabulary does not know are then tried against the fuzzy
+    index, so misspelt soils, months, seasons and crops still resolve.
+    
+    Args:
+        message (str): The user's chat message
+    
+    Returns:
+        ParsedMessage: intent ("climate" or "recommend"), the first soil
+            type, month, season and land type mentioned, the land size in
+            acres (or None), the crops mentioned and the climate condition
+            ("flood" wins over "drought"; None if not stated)
+    """
+    version = dataset_version()
+    parser = _parser(version)
+    
+    found = {}
+    crops = []
+    land_size = None
+    climate = False
+    conditions = set()
+    
+    tokens = tokenize(message)
+    matched = set()
+    
+    for category, value, start, end in parser.scan(tokens):
+        matched.update(range(start, end))
+        if category == "land_size":
+            if land_size is None:
+                land_size = value
+        elif category == "crop":
+            if value not in crops:
+                crops.append(value)
+        elif category == "climate":
+            climate = True
+            if value:
+                conditions.add(value)
+        else:
+            found.setdefault(category, value)
+    
+    # Words no term matched may be misspelt entities
+    if len(matched) < len(tokens):
+        _fuzzy_entities(version, tokens, matched, found, crops)
+    
+    condition = "flood" if "flood" in conditions else ("drought" if conditions else None)
+    
+    return ParsedMessage(
+        intent="climate" if climate else "recommend",
+        soil_type=found.get("soil_type"),
+        month=found.get("month"),
+        season=found.get("season"),
+        land_type=found.get("land_type"),
+        land_size=land_size,
+        crops=tuple(crops),
+        climate_condition=condition
+    )
@@ -0,0 +1,313 @@
+"""
+Lightweight latency instrumentation for the API endpoints.
+
+Requests and the hot-path stages inside them (message parsing, finding
+recommendations, ranking climate measures, formatting responses, JSON
+serialization)
+are recorded in fixed-bucket histograms labelled by endpoint and stage, and
+exposed in the Prometheus text format on /metrics. An opt-in sampling
+profiler collects stacks of the worker's threads in the collapsed format
+used by flame graph tools.
+
+Set FARMBOT_METRICS=0 to disable the instrumentation: instrumented functions
+are then left undecorated and timers are shared no-ops.
+"""
+
+import contextvars
+import os
+import sys
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+from functools import wraps
+
+METRICS_ENABLED = os.environ.get("FARMBOT_METRICS", "1") != "0"
+
+# Upper bounds of the histogram buckets, in seconds
+BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+REQUEST_METRIC = "farmbot_request_duration_seconds"
+STAGE_METRIC = "farmbot_stage_duration_seconds"
+
+HELP = {
+    REQUEST_METRIC: "Time spent handling API requests, by endpoint.",
+    STAGE_METRIC: "Time spent in hot-path stages of API requests, by endpoint and stage.",
+}
+
+# Endpoint of the request being handled, used to label stage timings
+current_endpoint = contextvars.ContextVar("current_endpoint", default="none")
+
+class Histogram:
+    """
+    Cumulative latency histogram with fixed buckets.
+    
+    Args:
+        buckets (tuple): Sorted upper bounds of the buckets, in seconds
+    """
+    __slots__ = ("buckets", "counts", "sum", "count", "lock")
+    
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        # One extra bucket for observations above the largest bound (+Inf)
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self.lock = threading.Lock()
+    
+    def observe(self, seconds):
+        """Record one observation."""
+        bucket = bisect_left(self.buckets, seconds)
+        with self.lock:
+            self.counts[bucket] += 1
+            self.sum += seconds
+            self.count += 1
+    
+    def snapshot(self):
+        """
+        Read the histogram consistently.
+        
+        Returns:
+            tuple: (cumulative counts per bucket including +Inf, sum, count)
+        """
+        with self.lock:
+            counts, total, count = list(self.counts), self.sum, self.count
+        cumulative, running = [], 0
+        for bucket_count in counts:
+            running += bucket_count
+            cumulative.append(running)
+        return cumulative, total, count
+
+class MetricsRegistry:
+    """Histograms keyed by metric name and label values."""
+    
+    def __init__(self):
+        self.histograms = {}
+        self.lock = threading.Lock()
+    
+    def histogram(self, name, labels):
+        """
+        Get or create the histogram for a metric and its labels.
+        
+        Args:
+            name (str): Metric name
+            labels (tuple): (label name, value) pairs
+        """
+        key = (name, labels)
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            with self.lock:
+                histogram = self.histograms.setdefault(key, Histogram())
+        return histogram
+    
+    def observe(self, name, labels, seconds):
+        """Record one observation of a labelled metric."""
+        self.histogram(name, labels).observe(seconds)
+    
+    def render(self):
+        """
+        Render every histogram in the Prometheus text exposition format.
+        
+        Returns:
+            str: The exposition text
+        """
+        with self.lock:
+            items = sorted(self.histograms.items())
+        
+        lines = []
+        previous_name = None
+        for (name, labels), histogram in items:
+            if name != previous_name:
+                lines.append(f"# HELP {name} {HELP.get(name, name)}")
+                lines.append(f"# TYPE {name} histogram")
+                previous_name = name
+            
+            cumulative, total, count = histogram.snapshot()
+            label_text = ",".join(f'{key}="{_escape(value)}"' for key, value in labels)
+            separator = "," if label_text else ""
+            for bound, bucket_count in zip(histogram.buckets + (float("inf"),), cumulative):
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f'{name}_bucket{{{label_text}{separator}le="{le}"}} {bucket_count}')
+            lines.append(f"{name}_sum{{{label_text}}} {total!r}")
+            lines.append(f"{name}_count{{{label_text}}} {count}")
+        
+        return "\n".join(lines) + "\n"
+    
+    def clear(self):
+        """Drop all histograms."""
+        with self.lock:
+            self.histograms.clear()
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+registry = MetricsRegistry()
+
+def observe_request(endpoint, seconds):
+    """Record the duration of a request to an endpoint."""
+    if METRICS_ENABLED:
+        registry.observe(REQUEST_METRIC, (("endpoint", endpoint),), seconds)
+
+class StageTimer:
+    """Context manager recording the time spent in a stage of the current request."""
+    __slots__ = ("stage", "start")
+    
+    def __init__(self, stage):
+        self.stage = stage
+    
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+    
+    def __exit__(self, *exc_info):
+        elapsed = time.perf_counter() - self.start
+        labels = (("endpoint", current_endpoint.get()), ("stage", self.stage))
+        registry.observe(STAGE_METRIC, labels, elapsed)
+        return False
+
+class _NoopTimer:
+    __slots__ = ()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        return False
+
+_NOOP_TIMER = _NoopTimer()
+
+def timed(stage):
+    """
+    Time a block as a stage of the current request:
+        
+        with timed("serialize"):
+            body = jsonify(payload).get_data()
+    
+    Returns a shared no-op context manager when metrics are disabled.
+    """
+    return StageTimer(stage) if METRICS_ENABLED else _NOOP_TIMER
+
+def instrument(stage):
+    """
+    Decorator timing every call of a function as a stage.
+    
+    When metrics are disabled the function is returned undecorated, so
+    disabled instrumentation costs nothing.
+    """
+    def decorate(func):
+        if not METRICS_ENABLED:
+            return func
+        
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                labels = (("endpoint", current_endpoint.get()), ("stage", stage))
+                registry.observe(STAGE_METRIC, labels, time.perf_counter() - start)
+        
+        return wrapper
+    
+    return decorate
+
+class SamplingProfiler:
+    """
+    Statistical profiler sampling the stacks of all other threads.
+    
+    A daemon thread wakes every `interval` seconds and counts each thread's
+    current stack, so the cost depends on the sampling rate rather than on
+    how much code runs. Samples are kept as collapsed stacks
+    ("module:function;module:function count"), the input format of
+    flamegraph.pl and speedscope.
+    
+    Args:
+        interval (float): Seconds between samples
+        max_depth (int): Innermost frames kept per stack
+    """
+    
+    def __init__(self, interval=0.01, max_depth=64):
+        self.interval = interval
+        self.max_depth = max_depth
+        self.samples = Counter()
+        self.sample_count = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+    
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+    
+    def start(self):
+        """Start sampling; does nothing if already running."""
+        with self._lock:
+            if self.running:
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="farmbot-profiler", daemon=True)
+            self._thread.start()
+    
+    def stop(self):
+        """Stop sampling, keeping the samples collected so far."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._stop.set()
+            thread.join()
+    
+    def reset(self):
+        """Drop the collected samples."""
+        with self._lock:
+            self.samples.clear()
+            self.sample_count = 0
+    
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            stacks = []
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                # Code objects are collected as is and only named when reported
+                codes = []
+                while frame is not None and len(codes) < self.max_depth:
+                    codes.append(frame.f_code)
+                    frame = frame.f_back
+                stacks.append(tuple(codes))
+            with self._lock:
+                self.samples.update(stacks)
+                self.sample_count += 1
+    
+    def collapsed(self):
+        """
+        The collected samples as collapsed stacks, most frequent first.
+        
+        Returns:
+            str: One "stack count" line per distinct stack
+        """
+        with self._lock:
+            items = self.samples.most_common()
+        return "".join(f"{_collapse(codes)} {count}\n" for codes, count in items)
+    
+    def status(self):
+        """Return whether the profiler runs and how much it collected."""
+        with self._lock:
+            return {
+                "running": self.running,
+                "interval": self.interval,
+                "samples": self.sample_count,
+                "stacks": len(self.samples),
+            }
+
+def _collapse(codes):
+    """Name a sampled stack, outermost frame first."""
+    return ";".join(
+        f"{os.path.splitext(os.path.basename(code.co_filename))[0]}:{code.co_name}"
+        for code in reversed(codes)
+    )
+
+profiler = SamplingProfiler(interval=float(os.environ.get("FARMBOT_PROFILER_INTERVAL", "0.01")))
+
+if os.environ.get("FARMBOT_PROFILER", "0") == "1":
+    profiler.start()
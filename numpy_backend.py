@@ -0,0 +1,78 @@
+"""
+Optional NumPy backend for filtering crop recommendations.
+
+Categorical columns are kept as integer code arrays and filtered with boolean
+masks; yields are scaled with vectorized operations. Results are
+identical to the pure-Python path in crop_recommendation, which is used when
+NumPy is not installed.
+"""
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Record attributes holding the filterable fields, in filter argument order
+FILTER_ATTRIBUTES = ("soil_type", "month", "season", "land_type")
+
+def available():
+    """Return True if NumPy can be imported."""
+    return np is not None
+
+class NumpyEngine:
+    """
+    Column arrays built from a list of CropRecord objects.
+    
+    Args:
+        records (list): CropRecord objects in dataset order
+    """
+    
+    def __init__(self, records):
+        self.records = records
+        self.codes = {}
+        for attribute in FILTER_ATTRIBUTES:
+            values = {}
+            codes = [values.setdefault(getattr(record, attribute), len(values)) for record in records]
+            self.codes[attribute] = (values, np.array(codes, dtype=np.int32))
+        self.base_yield = np.array([record.base_yield for record in records], dtype=np.float64)
+    
+    def select(self, soil_type=None, month=None, season=None, land_type=None):
+        """
+        Find the positions of the records matching the filters.
+        
+        Returns:
+            numpy.ndarray: Matching positions in dataset order
+        """
+        mask = None
+        for attribute, value in zip(FILTER_ATTRIBUTES, (soil_type, month, season, land_type)):
+            if not value:
+                continue
+            values, codes = self.codes[attribute]
+            code = values.get(value)
+            if code is None:
+                return np.empty(0, dtype=np.intp)
+            matches = codes == code
+            mask = matches if mask is None else mask & matches
+        
+        if mask is None:
+            return np.arange(len(self.records))
+        return np.flatnonzero(mask)
+    
+    def expected_yields(self, positions, land_size=1.0):
+        """Unrounded expected yields in tons, computed like CropRecord.expected_yield."""
+        return self.base_yield[positions] * land_size * 2.471 / 1000
+    
+    def find(self, soil_type=None, month=None, season=None, land_type=None, land_size=1.0):
+        """
+        Build recommendation objects for the matching records.
+        
+        Returns:
+            list: Recommendation dicts, as CropRecord.to_recommendation builds them
+        """
+        positions = self.select(soil_type, month, season, land_type)
+        yields = self.expected_yields(positions, land_size).tolist()
+        # Python's round() keeps the results identical to the pure-Python path
+        return [
+            self.records[position].to_recommendation(land_size, round(expected_yield, 2))
+            for position, expected_yield in zip(positions.tolist(), yields)
+        ]
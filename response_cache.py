@@ -0,0 +1,81 @@
+"""
+In-process response cache for the API endpoints.
+Keeps a bounded number of rendered payloads in least-recently-used order.
+"""
+
+import threading
+from collections import OrderedDict
+
+class LRUCache:
+    """
+    Thread-safe, bounded LRU cache with hit, miss and eviction counters.
+    
+    Args:
+        maxsize (int): Maximum number of entries kept before the least
+            recently used one is evicted
+    """
+    
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def __len__(self):
+        return len(self._entries)
+    
+    def get(self, key, default=None):
+        """Return the cached value for key and mark it as recently used."""
+        with self._lock:
+            try:
+                value = self._entries[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+    
+    def set(self, key, value):
+        """Store a value, evicting the least recently used entry if full."""
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+    
+    def get_or_compute(self, key, compute):
+        """
+        Return the cached value for key, computing and storing it on a miss.
+        
+        The computation runs outside the lock, so two concurrent misses for
+        the same key may both compute it; the last result wins.
+        """
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = compute()
+            self.set(key, value)
+        return value
+    
+    def clear(self):
+        """Drop all entries, keeping the counters."""
+        with self._lock:
+            self._entries.clear()
+    
+    def stats(self):
+        """Return the cache counters as a dict."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+_MISSING = object()
@@ -0,0 +1,163 @@
+"""
+Weighted scoring and top-k ranking of crop recommendations.
+
+A candidate is scored from three features, each scaled to 0..1:
+
+- yield: yield per acre relative to the best candidate
+- resilience: how many drought and flood remedial measures it has, up to
+  RESILIENCE_MEASURES of each
+- season: 1 if its season is the season the farmer plants in (the
+  requested season, or the usual season of the requested month), else 0
+
+The score is the weighted sum, with weights from FARMBOT_SCORE_WEIGHTS
+("yield=1,resilience=0.3,season=0.2"); further features can be registered
+with register_feature. Only the k best candidates are kept, in a heap, so
+ranking n candidates takes O(n log k). Equal scores keep their input order.
+"""
+
+import heapq
+import os
+from collections import namedtuple
+
+# Measures per climate condition that count as fully resilient
+RESILIENCE_MEASURES = 7
+
+# Used when FARMBOT_SCORE_WEIGHTS is unset: rank by yield alone
+DEFAULT_WEIGHTS = {"yield": 1.0}
+
+class ItemFeatures(namedtuple("ItemFeatures", ["yield_per_acre", "drought_measures", "flood_measures", "season"])):
+    """
+    Accessors of the raw features of the items being ranked.
+    
+    Each field is a function of an item: its yield per acre (or any value
+    proportional to it), its number of available drought and flood
+    measures, and its season.
+    """
+    __slots__ = ()
+
+class RankingContext(namedtuple("RankingContext", ["max_yield", "season"])):
+    """What features compare an item with: the best yield and the target season."""
+    __slots__ = ()
+
+# Feature functions build a function scoring one item from 0 to 1, given
+# the ItemFeatures accessors and the RankingContext
+
+def yield_feature(features, context):
+    """Yield per acre relative to the best item."""
+    get_yield = features.yield_per_acre
+    scale = 1 / context.max_yield if context.max_yield > 0 else 0.0
+    return lambda item: get_yield(item) * scale
+
+def resilience_feature(features, context):
+    """Share of RESILIENCE_MEASURES drought and flood measures available."""
+    get_drought, get_flood = features.drought_measures, features.flood_measures
+    return lambda item: (min(get_drought(item), RESILIENCE_MEASURES)
+                         + min(get_flood(item), RESILIENCE_MEASURES)) / (2 * RESILIENCE_MEASURES)
+
+def season_feature(features, context):
+    """1 if the item is planted in the target season or there is none."""
+    if context.season is None:
+        return lambda item: 1.0
+    get_season, target = features.season, context.season
+    return lambda item: 1.0 if get_season(item) == target else 0.0
+
+# Feature functions by name
+FEATURES = {
+    "yield": yield_feature,
+    "resilience": resilience_feature,
+    "season": season_feature,
+}
+
+def register_feature(name, feature):
+    """
+    Add a feature that weights can refer to.
+    
+    Args:
+        name (str): Name used in the weights
+        feature (callable): Maps (ItemFeatures, RankingContext) to a function
+            scoring an item from 0 to 1
+    """
+    FEATURES[name] = feature
+
+def parse_weights(text):
+    """
+    Parse a "name=weight,..." string.
+    
+    Returns:
+        dict: Weight by feature name
+    
+    Raises:
+        ValueError: If an entry is malformed or names an unknown feature
+    """
+    weights = {}
+    for entry in text.split(","):
+        if not entry.strip():
+            continue
+        name, separator, weight = entry.partition("=")
+        name = name.strip()
+        if not separator or name not in FEATURES:
+            raise ValueError(f"Invalid score weight: {entry.strip()!r}")
+        weights[name] = float(weight)
+    return weights
+
+class ScoringEngine:
+    """
+    Ranks items by the weighted sum of their features.
+    
+    Args:
+        weights (dict): Weight by feature name; features weighted 0 are not
+            computed
+    """
+    
+    def __init__(self, weights=None):
+        weights = DEFAULT_WEIGHTS if weights is None else weights
+        unknown = set(weights) - set(FEATURES)
+        if unknown:
+            raise ValueError(f"Unknown score features: {', '.join(sorted(unknown))}")
+        self.weights = {name: weight for name, weight in weights.items() if weight}
+    
+    def score_key(self, items, features, season=None):
+        """
+        Function scoring one of the items.
+        
+        Args:
+            items (Sequence): Items that will be ranked, for the best yield
+            features (ItemFeatures): Accessors of the items' features
+            season (str): Target season of the season feature, if any
+        """
+        if list(self.weights) == ["yield"] and self.weights["yield"] > 0:
+            # Yield alone ranks like the raw yield accessor, with no Python-level scoring
+            return features.yield_per_acre
+        
+        max_yield = max(map(features.yield_per_acre, items)) if "yield" in self.weights else 0.0
+        context = RankingContext(max_yield, season)
+        terms = [(FEATURES[name](features, context), weight) for name, weight in self.weights.items()]
+        
+        def score(item):
+            total = 0.0
+            for feature, weight in terms:
+                total += weight * feature(item)
+            return total
+        
+        return score
+    
+    def top_k(self, items, k, features, season=None):
+        """
+        Select the k best-scoring items.
+        
+        Args:
+            items (Sequence): Items to rank
+            k (int): Number of items to keep
+            features (ItemFeatures): Accessors of the items' features
+            season (str): Target season of the season feature, if any
+        
+        Returns:
+            list: Up to k items, best first; equal scores keep input order
+        """
+        if not items:
+            return []
+        # nlargest keeps a heap of k entries and breaks ties by position
+        return heapq.nlargest(k, items, key=self.score_key(items, features, season))
+
+engine = ScoringEngine(parse_weights(os.environ["FARMBOT_SCORE_WEIGHTS"])
+                       if os.environ.get("FARMBOT_SCORE_WEIGHTS") else None)
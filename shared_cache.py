@@ -0,0 +1,354 @@
+"""
+Result cache shared by the workers of a deployment.
+
+Every gunicorn worker holds its own dataset and response cache, so a query
+that is cold in one worker gets recomputed even if another worker just
+answered it. SharedCache sits behind the per-worker LRU cache and stores
+rendered bodies in a store all workers reach:
+
+- SQLiteStore: a local SQLite file, for the workers of one machine
+- a Redis client (redis.Redis), when the optional redis package is installed
+- LocalStore: an in-process stand-in for tests and single-worker runs
+
+The stores share the small subset of the Redis interface SharedCache uses
+(get, set with ex/nx, delete), so any Redis-compatible client can be
+plugged in. Keys include a fingerprint of the dataset content, so workers
+that loaded the same data share entries and a reload never serves results
+of the previous data. A lock entry taken with set(nx=True) makes N workers
+asking the same cold query compute it once; the others wait for the result.
+The lock holds a random token of its holder and is only deleted while it
+still holds that token, so a holder whose lock expired never releases the
+lock another worker took over (delete_if_equal on the local stores, a Lua
+script on Redis).
+"""
+
+import hashlib
+import logging
+import os
+import secrets
+import sqlite3
+import threading
+import time
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+# Deletes KEYS[1] only if its value is ARGV[1], atomically on the Redis server
+RELEASE_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+class LocalStore:
+    """
+    In-process store with the Redis get/set/delete interface.
+    
+    Stands in for a Redis server in tests; entries are only shared by the
+    threads of one process.
+    """
+    
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+    
+    def get(self, name):
+        """Return the value of a key, or None if it is missing or expired."""
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is None:
+                return None
+            if entry[1] is not None and entry[1] <= time.time():
+                del self._entries[name]
+                return None
+            return entry[0]
+    
+    def set(self, name, value, ex=None, nx=False):
+        """
+        Store a value.
+        
+        Args:
+            name (str): Key
+            value (bytes): Value
+            ex (float): Seconds until the key expires, or None to keep it
+            nx (bool): Only set the key if it does not exist
+        
+        Returns:
+            bool: True if the value was stored, None if nx prevented it
+        """
+        with self._lock:
+            now = time.time()
+            if nx:
+                entry = self._entries.get(name)
+                if entry is not None and (entry[1] is None or entry[1] > now):
+                    return None
+            self._entries[name] = (value, now + ex if ex is not None else None)
+            return True
+    
+    def delete(self, *names):
+        """Delete keys, returning the number that existed."""
+        with self._lock:
+            return sum(self._entries.pop(name, None) is not None for name in names)
+    
+    def delete_if_equal(self, name, value):
+        """Delete a key only if it holds value, returning whether it did."""
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is None or entry[0] != value:
+                return False
+            del self._entries[name]
+            return True
+
+class SQLiteStore:
+    """
+    Store in a local SQLite file with the Redis get/set/delete interface.
+    
+    Workers on one machine open the same file. Each thread, and each
+    process after a fork, uses its own connection; the database runs in WAL
+    mode so readers do not block the writer.
+    
+    Args:
+        path (str): Database file, created if missing
+        timeout (float): Seconds to wait for a lock held by another worker
+    """
+    
+    # Expired rows are purged after this many writes
+    PURGE_INTERVAL = 1000
+    
+    def __init__(self, path, timeout=5.0):
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+        self._writes = 0
+        self._connection().executescript("""
+            PRAGMA journal_mode=WAL;
+            CREATE TABLE IF NOT EXISTS cache (
+                key TEXT PRIMARY KEY,
+                value BLOB NOT NULL,
+                expires REAL
+            );
+        """)
+    
+    def _connection(self):
+        """The connection of the calling thread in this process."""
+        local = self._local
+        if getattr(local, "pid", None) != os.getpid():
+            local.connection = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            local.connection.execute("PRAGMA synchronous=NORMAL")
+            local.pid = os.getpid()
+        return local.connection
+    
+    def get(self, name):
+        """Return the value of a key, or None if it is missing or expired."""
+        row = self._connection().execute(
+            "SELECT value FROM cache WHERE key = ? AND (expires IS NULL OR expires > ?)",
+            (name, time.time())
+        ).fetchone()
+        return row[0] if row is not None else None
+    
+    def set(self, name, value, ex=None, nx=False):
+        """
+        Store a value; see LocalStore.set.
+        
+        Returns:
+            bool: True if the value was stored, None if nx prevented it
+        """
+        now = time.time()
+        expires = now + ex if ex is not None else None
+        if nx:
+            # Take over an expired row, but never a live one
+            cursor = self._connection().execute(
+                "INSERT INTO cache (key, value, expires) VALUES (?, ?, ?) "
+                "ON CONFLICT (key) DO UPDATE SET value = excluded.value, expires = excluded.expires "
+                "WHERE cache.expires IS NOT NULL AND cache.expires <= ?",
+                (name, value, expires, now)
+            )
+        else:
+            cursor = self._connection().execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires) VALUES (?, ?, ?)",
+                (name, value, expires)
+            )
+        
+        self._writes += 1
+        if self._writes % self.PURGE_INTERVAL == 0:
+            self.purge()
+        return True if cursor.rowcount > 0 else None
+    
+    def delete(self, *names):
+        """Delete keys, returning the number that existed."""
+        cursor = self._connection().execute(
+            f"DELETE FROM cache WHERE key IN ({', '.join('?' * len(names))})", names
+        )
+        return cursor.rowcount
+    
+    def delete_if_equal(self, name, value):
+        """Delete a key only if it holds value, returning whether it did."""
+        cursor = self._connection().execute("DELETE FROM cache WHERE key = ? AND value = ?", (name, value))
+        return cursor.rowcount > 0
+    
+    def purge(self):
+        """Delete expired rows."""
+        self._connection().execute("DELETE FROM cache WHERE expires <= ?", (time.time(),))
+
+def open_store(url):
+    """
+    Open the store named by a FARMBOT_SHARED_CACHE value.
+    
+    Args:
+        url (str): "sqlite:///path/to/file.db", "redis://host:port/db" or
+            "local"
+    
+    Returns:
+        The store
+    
+    Raises:
+        ValueError: If the scheme is unknown
+        RuntimeError: If a redis URL is given but redis is not installed
+    """
+    if url == "local":
+        return LocalStore()
+    if url.startswith("sqlite:///"):
+        return SQLiteStore(url[len("sqlite:///"):])
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        if redis is None:
+            raise RuntimeError("FARMBOT_SHARED_CACHE names a Redis server but redis is not installed")
+        return redis.Redis.from_url(url)
+    raise ValueError(f"Unknown shared cache URL: {url}")
+
+class SharedCache:
+    """
+    Cache of rendered bodies in a store shared by the workers.
+    
+    Store errors are logged and counted, and the body is computed locally,
+    so an unavailable store slows requests down but never fails them.
+    
+    Args:
+        store: Object with Redis-style get, set(ex, nx) and delete
+        ttl (int): Seconds entries are kept
+        lock_timeout (int): Seconds a worker computing an entry holds its
+            lock; waiting workers compute it themselves after this long
+        poll_interval (float): Seconds between checks while waiting
+        prefix (str): Namespace of the keys
+    """
+    
+    def __init__(self, store, ttl=300, lock_timeout=10, poll_interval=0.005, prefix="farmbot"):
+        self.store = store
+        self.ttl = ttl
+        self.lock_timeout = lock_timeout
+        self.poll_interval = poll_interval
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.waits = 0
+        self.errors = 0
+    
+    def key(self, version, key):
+        """Store key for a cache key under a dataset version."""
+        digest = hashlib.sha256(repr(key).encode("utf-8")).hexdigest()[:32]
+        return f"{self.prefix}:{version}:{digest}"
+    
+    def get_or_compute(self, version, key, compute):
+        """
+        Return the stored body for key, computing and storing it on a miss.
+        
+        Only one worker computes a missing body; the others poll the store
+        until it appears or the computing worker's lock expires.
+        
+        Args:
+            version (str): Dataset fingerprint the body was computed from
+            key (tuple): Cache key
+            compute (callable): Returns the body as bytes
+        
+        Returns:
+            bytes: The body
+        """
+        name = self.key(version, key)
+        lock_name = name + ":lock"
+        try:
+            value = self.store.get(name)
+            token = None
+            if value is None:
+                value, token = self._wait_or_lock(name, lock_name)
+        except Exception as e:
+            self._count("errors")
+            logger.warning("Shared cache unavailable, computing locally: %s", e)
+            return compute()
+        
+        if value is not None:
+            self._count("hits")
+            return value
+        
+        self._count("misses")
+        try:
+            value = compute()
+            self.store.set(name, value, ex=self.ttl)
+        except Exception as e:
+            if value is None:
+                raise
+            self._count("errors")
+            logger.warning("Shared cache error storing a result: %s", e)
+        finally:
+            if token is not None:
+                self._release(lock_name, token)
+        return value
+    
+    def _wait_or_lock(self, name, lock_name):
+        """
+        Take the lock for computing a body, or wait for the worker holding it.
+        
+        Returns:
+            tuple: (body stored by another worker or None, the lock's token
+                if the lock was taken or None)
+        """
+        token = secrets.token_bytes(16)
+        deadline = time.monotonic() + self.lock_timeout
+        while not self.store.set(lock_name, token, ex=self.lock_timeout, nx=True):
+            if time.monotonic() > deadline:
+                return None, None
+            self._count("waits")
+            time.sleep(self.poll_interval)
+            value = self.store.get(name)
+            if value is not None:
+                return value, None
+        
+        # The previous holder may have stored the body and released the lock
+        # between our first lookup and taking the lock
+        value = self.store.get(name)
+        if value is not None:
+            self._release(lock_name, token)
+            return value, None
+        return None, token
+    
+    def _release(self, lock_name, token):
+        """Delete a lock, unless it expired and another worker holds it now."""
+        try:
+            if hasattr(self.store, "delete_if_equal"):
+                self.store.delete_if_equal(lock_name, token)
+            else:
+                self.store.eval(RELEASE_SCRIPT, 1, lock_name, token)
+        except Exception as e:
+            logger.warning("Shared cache error releasing a lock: %s", e)
+    
+    def _count(self, counter):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+    
+    def stats(self):
+        """Return the cache counters as a dict."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "store": type(self.store).__name__,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "waits": self.waits,
+                "errors": self.errors,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+            }
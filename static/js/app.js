@@ -8,6 +8,14 @@ document.addEventListener('DOMContentLoaded', function() {
     const applyFiltersBtn = document.getElementById('apply-filters');
     const resetFiltersBtn = document.getElementById('reset-filters');
     
+    // Filter dropdowns, keyed by the dataset field listing their options
+    const OPTION_DROPDOWNS = {
+        'SOIL TYPE': 'soil-type',
+        'MONTH': 'month',
+        'SEASON': 'season',
+        'LAND TYPE': 'land-type'
+    };
+    
     // Initialize chatbot
     initChat();
     
@@ -50,24 +58,23 @@ document.addEventListener('DOMContentLoaded', function() {
      * Load filter options from server
      */
     function loadFilterOptions() {
-        // Load soil types
-        fetchOptions('SOIL TYPE', 'soil-type');
-        
-        // Load months
-        fetchOptions('MONTH', 'month');
-        
-        // Load seasons
-        fetchOptions('SEASON', 'season');
-        
-        // Load land types
-        fetchOptions('LAND TYPE', 'land-type');
+        // One request returns every dropdown's options and facet counts
+        fetchOptions({});
     }
     
     /**
-     * Fetch options for a specific filter type
+     * Fetch all filter options, with counts for the selected filters
      */
-    function fetchOptions(optionType, elementId) {
-        fetch(`/api/options?type=${encodeURIComponent(optionType)}`)
+    function fetchOptions(filters) {
+        const params = new URLSearchParams();
+        ['soil', 'month', 'season', 'land_type'].forEach(key => {
+            if (filters[key]) {
+                params.append(key, filters[key]);
+            }
+        });
+        const query = params.toString();
+        
+        fetch(query ? `/api/options?${query}` : '/api/options')
             .then(response => {
                 if (!response.ok) {
                     throw new Error('Network response was not ok');
@@ -76,25 +83,28 @@ document.addEventListener('DOMContentLoaded', function() {
             })
             .then(data => {
                 if (data.status === 'success') {
-                    populateDropdown(elementId, data.options);
+                    Object.entries(OPTION_DROPDOWNS).forEach(([optionType, elementId]) => {
+                        populateDropdown(elementId, data.options[optionType], data.counts[optionType]);
+                    });
                 } else {
-                    console.error(`Error fetching ${optionType} options:`, data.message);
+                    console.error('Error fetching filter options:', data.message);
                 }
             })
             .catch(error => {
-                console.error(`Fetch error for ${optionType}:`, error);
+                console.error('Fetch error for filter options:', error);
             });
     }
     
     /**
      * Populate a dropdown with options
      */
-    function populateDropdown(elementId, options) {
+    function populateDropdown(elementId, options, counts) {
         const dropdown = document.getElementById(elementId);
         if (!dropdown) return;
         
-        // Keep the first "Any" option
+        // Keep the first "Any" option and the current selection
         const firstOption = dropdown.options[0];
+        const selected = dropdown.value;
         dropdown.innerHTML = '';
         dropdown.appendChild(firstOption);
         
@@ -102,9 +112,10 @@ document.addEventListener('DOMContentLoaded', function() {
         options.forEach(option => {
             const optionElement = document.createElement('option');
             optionElement.value = option;
-            optionElement.textContent = option;
+            optionElement.textContent = counts ? `${option} (${counts[option] || 0})` : option;
             dropdown.appendChild(optionElement);
         });
+        dropdown.value = selected;
     }
     
     /**
@@ -145,8 +156,21 @@ document.addEventListener('DOMContentLoaded', function() {
                 
                 // Update chart with default values
                 updateChartWithFilters({});
+                
+                // Refresh the counts for the cleared filters
+                fetchOptions({});
             });
         }
+        
+        // Refresh the facet counts whenever a filter changes
+        Object.values(OPTION_DROPDOWNS).forEach(elementId => {
+            const dropdown = document.getElementById(elementId);
+            if (dropdown) {
+                dropdown.addEventListener('change', function() {
+                    fetchOptions(getCurrentFilters());
+                });
+            }
+        });
     }
     
     /**
@@ -0,0 +1,96 @@
+"""
+Compiled single-pass matching of vocabulary terms in free text.
+"""
+
+import re
+
+# Numbers (including decimals), words and single punctuation marks
+TOKEN_PATTERN = re.compile(r"\d+(?:\.\d+)?|\w+|[^\w\s]")
+
+_TERMINAL = None
+
+def tokenize(text):
+    """Split text into the lowercase tokens the trie is built from."""
+    return TOKEN_PATTERN.findall(text.lower())
+
+class TermMatcher:
+    """
+    Word-level trie over a categorized vocabulary.
+    
+    Text is tokenized once and the trie is walked from each token, taking
+    the longest term that matches there, so a single pass returns every
+    entity in the text regardless of vocabulary size.
+    
+    Args:
+        vocabulary (dict): {category: {term: canonical value}}; terms are
+            matched case-insensitively, token by token
+        number_units (dict): Optional {category: unit words}; a number
+            followed by one of the units (e.g. "3 acres") is reported in
+            that category with the number as a float
+    """
+    
+    def __init__(self, vocabulary, number_units=None):
+        self.root = {}
+        for category, terms in vocabulary.items():
+            for term, canonical in terms.items():
+                node = self.root
+                for token in tokenize(term):
+                    node = node.setdefault(token, {})
+                node[_TERMINAL] = (category, canonical)
+        
+        self.units = {}
+        for category, units in (number_units or {}).items():
+            for unit in units:
+                self.units[unit.lower()] = category
+    
+    def finditer(self, text):
+        """
+        Find every vocabulary term in the text.
+        
+        Yields:
+            tuple: (category, canonical value, matched tokens)
+        """
+        tokens = tokenize(text)
+        for category, value, start, end in self.scan(tokens):
+            yield category, value, tokens[start:end]
+    
+    def scan(self, tokens):
+        """
+        Find every vocabulary term in already tokenized text.
+        
+        Args:
+            tokens (list): Lowercase tokens, as returned by tokenize()
+        
+        Yields:
+            tuple: (category, canonical value, start, end), where
+                tokens[start:end] are the matched tokens
+        """
+        count = len(tokens)
+        position = 0
+        
+        while position < count:
+            token = tokens[position]
+            
+            if self.units and token[0].isdigit() and position + 1 < count:
+                category = self.units.get(tokens[position + 1])
+                if category is not None:
+                    yield category, float(token), position, position + 2
+                    position += 2
+                    continue
+            
+            node, end, match = self.root, position, None
+            while end < count:
+                node = node.get(tokens[end])
+                if node is None:
+                    break
+                end += 1
+                if _TERMINAL in node:
+                    match = (end, node[_TERMINAL])
+            
+            if match is None:
+                position += 1
+                continue
+            
+            end, (category, value) = match
+            yield category, value, position, end
+            position = end
@@ -0,0 +1,73 @@
+import gc
+import json
+import weakref
+
+import crop_recommendation
+from crop_recommendation import DROUGHT_MEASURES_FIELD, FLOOD_MEASURES_FIELD, load_data
+
+# Two spellings of the same measures, which split into the same items
+MEASURES = "Mulch: keep soil moist\n\nIrrigate: at night"
+RESPACED_MEASURES = "Mulch:  keep soil moist\n\n\nIrrigate: at night "
+
+def write_rows(tmp_path, rows):
+    path = tmp_path / "crops.json"
+    path.write_text(json.dumps(rows), encoding="utf-8")
+    return path
+
+def row(crop_name, drought, flood):
+    return {
+        "CROP NAME": crop_name, "SOIL TYPE": "Red Soil", "MONTH": "Thai(Mid January-Mid February)",
+        "SEASON": "Winter", "LAND TYPE": "Dry Land", "YIELD": "1000",
+        DROUGHT_MEASURES_FIELD: drought, FLOOD_MEASURES_FIELD: flood
+    }
+
+def test_interned_load_keeps_every_text(tmp_path):
+    rows = [row("Ragi", MEASURES, RESPACED_MEASURES), row("Maize", RESPACED_MEASURES, MEASURES),
+            row("Wheat", MEASURES, "")]
+    path = write_rows(tmp_path, rows)
+    
+    data = load_data(intern_measures=True, path=path)
+    
+    assert data == rows
+    assert json.dumps(data) == json.dumps(rows)
+    assert data[0][DROUGHT_MEASURES_FIELD] is data[1][FLOOD_MEASURES_FIELD]
+    assert data[0][FLOOD_MEASURES_FIELD] is data[1][DROUGHT_MEASURES_FIELD]
+
+def test_interned_texts_share_measure_items(tmp_path):
+    path = write_rows(tmp_path, [row("Ragi", MEASURES, RESPACED_MEASURES)])
+    
+    snapshot = crop_recommendation.build_snapshot(load_data(intern_measures=True, path=path), version=0)
+    record = snapshot.records[0]
+    
+    assert record.drought_ids == record.flood_ids
+    assert record.drought_measures[0] == {"title": "Mulch", "detail": "keep soil moist"}
+
+def test_replaced_snapshot_frees_its_measures(tmp_path, monkeypatch):
+    # Restore the module's snapshot after the test
+    monkeypatch.setattr(crop_recommendation, "snapshot", crop_recommendation.snapshot)
+    path = write_rows(tmp_path, [row("Ragi", MEASURES, RESPACED_MEASURES)])
+    old = crop_recommendation.install_snapshot(load_data(path=path))
+    token = crop_recommendation.pin_snapshot()
+    measures = weakref.ref(old.measures)
+    del old
+    
+    path.write_text(json.dumps([row("Ragi", "Mulch: twice a week", "")]), encoding="utf-8")
+    new = crop_recommendation.install_snapshot(load_data(path=path))
+    gc.collect()
+    assert measures() is not None  # Still used by the pinned request
+    assert new.measures is not measures()
+    
+    crop_recommendation.unpin_snapshot(token)
+    gc.collect()
+    assert measures() is None
+
+def test_size_estimate_counts_measure_texts(tmp_path):
+    long_measures = "Mulch: " + "keep the soil covered " * 500
+    sizes = []
+    for drought in ("", long_measures):
+        path = write_rows(tmp_path, [row("Ragi", drought, "")])
+        snapshot = crop_recommendation.build_snapshot(load_data(path=path), version=0)
+        sizes.append(crop_recommendation.estimate_snapshot_size(snapshot))
+    
+    # The text once in the row and the table, and its split item once more
+    assert sizes[1] - sizes[0] >= 2 * len(long_measures)
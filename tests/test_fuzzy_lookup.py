@@ -0,0 +1,25 @@
+import pytest
+
+from fuzzy_lookup import AmbiguousValue, resolve
+
+@pytest.mark.parametrize("field, text, expected", [
+    ("SOIL TYPE", "red soils", "Red Soil"),
+    ("SOIL TYPE", "blak soil", "Black Soil"),
+    ("SOIL TYPE", "karisal", "Black Soil"),
+    ("CROP NAME", "tomatoe", "Tomato"),
+    ("SEASON", "sumer", "Summer"),
+    ("LAND TYPE", "dry", "Dry Land"),
+    ("SOIL TYPE", "loam", None),
+])
+def test_resolves_close_values(field, text, expected):
+    assert resolve(field, text) == expected
+
+@pytest.mark.parametrize("field, text", [
+    ("SOIL TYPE", "soil"),
+    ("LAND TYPE", "land"),
+    ("CROP NAME", "gram"),
+    ("SOIL TYPE", "good soil"),
+])
+def test_rejects_generic_values(field, text):
+    with pytest.raises(AmbiguousValue):
+        resolve(field, text)
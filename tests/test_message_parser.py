@@ -0,0 +1,19 @@
+import pytest
+
+from message_parser import parse_message
+
+@pytest.mark.parametrize("message, soil_type", [
+    ("blak soil crops", "Black Soil"),
+    ("crops for blak soil in margazi", "Black Soil"),
+    ("grow redd soil crops", "Red Soil"),
+    ("What should I grow in black soil during summer?", "Black Soil"),
+    ("i have some land and good soil", None),
+])
+def test_misspelt_soil_types(message, soil_type):
+    assert parse_message(message).soil_type == soil_type
+
+def test_short_misspelt_crop_with_the_next_word():
+    parsed = parse_message("blak gram in winter")
+    
+    assert parsed.crops == ("Black Gram",)
+    assert parsed.season == "Winter"
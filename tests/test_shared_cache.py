@@ -0,0 +1,164 @@
+import threading
+import time
+
+import pytest
+
+from shared_cache import RELEASE_SCRIPT, LocalStore, SharedCache, SQLiteStore
+
+class FakeRedis:
+    """
+    The part of the redis.Redis client SharedCache uses, in memory.
+    
+    Unlike LocalStore it has no delete_if_equal, so locks are released
+    through eval of RELEASE_SCRIPT, as on a Redis server.
+    """
+    
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+    
+    def _live(self, name):
+        entry = self._entries.get(name)
+        if entry is not None and entry[1] is not None and entry[1] <= time.time():
+            del self._entries[name]
+            return None
+        return entry
+    
+    def get(self, name):
+        with self._lock:
+            entry = self._live(name)
+            return entry[0] if entry is not None else None
+    
+    def set(self, name, value, ex=None, nx=False):
+        with self._lock:
+            if nx and self._live(name) is not None:
+                return None
+            self._entries[name] = (value, time.time() + ex if ex is not None else None)
+            return True
+    
+    def delete(self, *names):
+        with self._lock:
+            return sum(self._entries.pop(name, None) is not None for name in names)
+    
+    def eval(self, script, numkeys, *keys_and_args):
+        assert script == RELEASE_SCRIPT and numkeys == 1
+        name, token = keys_and_args
+        with self._lock:
+            entry = self._live(name)
+            if entry is None or entry[0] != token:
+                return 0
+            del self._entries[name]
+            return 1
+
+@pytest.fixture(params=["local", "sqlite", "redis"])
+def store(request, tmp_path):
+    if request.param == "local":
+        return LocalStore()
+    if request.param == "sqlite":
+        return SQLiteStore(str(tmp_path / "cache.db"))
+    return FakeRedis()
+
+class Computation:
+    """Counts its calls and returns a body after an optional delay."""
+    
+    def __init__(self, body=b"body", delay=0.0):
+        self.body = body
+        self.delay = delay
+        self.calls = 0
+        self._lock = threading.Lock()
+    
+    def __call__(self):
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.delay)
+        return self.body
+
+def test_miss_then_hit(store):
+    cache = SharedCache(store)
+    compute = Computation()
+    
+    assert cache.get_or_compute("v1", ("chart", "Red Soil"), compute) == b"body"
+    assert cache.get_or_compute("v1", ("chart", "Red Soil"), compute) == b"body"
+    assert compute.calls == 1
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+def test_concurrent_cold_callers_compute_once(store):
+    cache = SharedCache(store, poll_interval=0.001)
+    compute = Computation(delay=0.1)
+    callers = 8
+    barrier = threading.Barrier(callers)
+    bodies = []
+    
+    def call():
+        barrier.wait()
+        bodies.append(cache.get_or_compute("v1", ("chart", "Red Soil"), compute))
+    
+    threads = [threading.Thread(target=call) for _ in range(callers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    assert compute.calls == 1
+    assert bodies == [b"body"] * callers
+    assert cache.stats()["waits"] > 0
+
+def test_lock_is_released_after_computing(store):
+    cache = SharedCache(store)
+    name = cache.key("v1", ("chart",))
+    
+    cache.get_or_compute("v1", ("chart",), Computation())
+    
+    assert store.get(name + ":lock") is None
+
+def test_release_keeps_a_lock_taken_over_by_another_worker(store):
+    cache = SharedCache(store)
+    lock_name = cache.key("v1", ("chart",)) + ":lock"
+    value, token = cache._wait_or_lock(cache.key("v1", ("chart",)), lock_name)
+    assert value is None and token is not None
+    
+    # The lock expired and another worker took it
+    store.delete(lock_name)
+    assert store.set(lock_name, b"other worker", ex=10, nx=True)
+    cache._release(lock_name, token)
+    assert store.get(lock_name) == b"other worker"
+    
+    # The other worker's own token releases it
+    cache._release(lock_name, b"other worker")
+    assert store.get(lock_name) is None
+
+def test_entries_expire_after_the_ttl(store):
+    cache = SharedCache(store, ttl=1)
+    compute = Computation()
+    
+    cache.get_or_compute("v1", ("chart",), compute)
+    time.sleep(1.1)
+    cache.get_or_compute("v1", ("chart",), compute)
+    
+    assert compute.calls == 2
+
+def test_versions_and_keys_are_isolated(store):
+    cache = SharedCache(store)
+    
+    assert cache.get_or_compute("v1", ("chart",), Computation(b"first")) == b"first"
+    assert cache.get_or_compute("v2", ("chart",), Computation(b"second")) == b"second"
+    assert cache.get_or_compute("v1", ("table",), Computation(b"third")) == b"third"
+    assert cache.get_or_compute("v1", ("chart",), Computation(b"fourth")) == b"first"
+
+class BrokenStore:
+    def get(self, name):
+        raise ConnectionError("store down")
+    
+    def set(self, name, value, ex=None, nx=False):
+        raise ConnectionError("store down")
+    
+    def delete(self, *names):
+        raise ConnectionError("store down")
+
+def test_unavailable_store_computes_locally():
+    cache = SharedCache(BrokenStore())
+    compute = Computation()
+    
+    assert cache.get_or_compute("v1", ("chart",), compute) == b"body"
+    assert compute.calls == 1
+    assert cache.stats()["errors"] == 1
@@ -0,0 +1,193 @@
+"""
+Compression and caching of what the browser downloads.
+
+Responses of text types above a size threshold are compressed with brotli,
+when the optional brotli package is installed and the client accepts it,
+or with gzip. Compressed bodies are cached, so the cached API responses are
+compressed once rather than on every request.
+
+Static files are kept in memory with their content hash and compressed
+variants. Pages link them with the hash in the URL, so browsers can cache
+them as immutable and a changed file gets a new URL.
+"""
+
+import gzip
+import hashlib
+import mimetypes
+import os
+import threading
+from collections import namedtuple
+
+from werkzeug.http import parse_accept_header
+from werkzeug.security import safe_join
+
+from response_cache import LRUCache
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Set FARMBOT_COMPRESS=0 to send every response uncompressed
+COMPRESS_ENABLED = os.environ.get("FARMBOT_COMPRESS", "1") != "0"
+
+# Smaller bodies gain too little to be worth compressing
+COMPRESS_MIN_SIZE = int(os.environ.get("FARMBOT_COMPRESS_MIN_SIZE", "512"))
+
+COMPRESSIBLE_TYPES = frozenset([
+    "application/javascript",
+    "application/json",
+    "application/x-ndjson",
+    "image/svg+xml",
+    "text/css",
+    "text/csv",
+    "text/html",
+    "text/javascript",
+    "text/plain",
+])
+
+# Compression levels for bodies compressed per response and for static files compressed once
+DYNAMIC_LEVELS = {"br": 5, "gzip": 6}
+STATIC_LEVELS = {"br": 11, "gzip": 9}
+
+# Cache lifetime of content-hashed static URLs
+STATIC_MAX_AGE = 365 * 24 * 3600
+
+# Compressed bodies keyed by encoding and uncompressed body
+compressed_cache = LRUCache(maxsize=int(os.environ.get("FARMBOT_COMPRESS_CACHE_SIZE", "512")))
+
+def available_encodings():
+    """Content codings this worker can produce, preferred first."""
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+def choose_encoding(accept_encoding):
+    """
+    Pick the content coding for a response.
+    
+    Args:
+        accept_encoding (str): The request's Accept-Encoding header
+    
+    Returns:
+        str: "br" or "gzip", or None to send the body as is
+    """
+    if not COMPRESS_ENABLED or not accept_encoding:
+        return None
+    accepted = parse_accept_header(accept_encoding)
+    for encoding in available_encodings():
+        if accepted.quality(encoding) > 0:
+            return encoding
+    return None
+
+def compressible(mimetype, size):
+    """Whether a body of this type and size should be compressed."""
+    return mimetype in COMPRESSIBLE_TYPES and size >= COMPRESS_MIN_SIZE
+
+def compress(body, encoding, level=None):
+    """
+    Compress a body.
+    
+    Args:
+        body (bytes): Uncompressed body
+        encoding (str): "br" or "gzip"
+        level (int): Compression level, defaults to the per-response level
+    
+    Returns:
+        bytes: The compressed body
+    """
+    level = DYNAMIC_LEVELS[encoding] if level is None else level
+    if encoding == "br":
+        return brotli.compress(body, quality=level)
+    # A fixed mtime keeps the output identical for identical bodies
+    return gzip.compress(body, compresslevel=level, mtime=0)
+
+def compress_cached(body, encoding):
+    """Compress a body, reusing the result for a body compressed before."""
+    return compressed_cache.get_or_compute((encoding, body), lambda: compress(body, encoding))
+
+def encoded_etag(etag, encoding):
+    """
+    Get the strong ETag of a body's encoded form. Each encoding has its own
+    bytes, so it gets its own tag rather than sharing a weakened one.
+    
+    Args:
+        etag (str): ETag of the identity body, without quotes
+        encoding (str): Content-Encoding, or None for the identity body
+    
+    Returns:
+        str: The ETag suffixed with the encoding, without quotes
+    """
+    return f"{etag}-{encoding}" if encoding else etag
+
+class StaticAsset(namedtuple("StaticAsset", ["body", "mimetype", "digest", "compressed"])):
+    """
+    A static file held in memory.
+    
+    `compressed` maps each content coding to the compressed body, filled in
+    on first use.
+    """
+    __slots__ = ()
+
+class StaticAssets:
+    """
+    Static files loaded into memory on first use, with content hashes.
+    
+    Files are read once per process, or re-read when their modification
+    time changes while `reload()` returns True (e.g. in debug mode).
+    
+    Args:
+        folder (str): The static folder
+        reload (callable): Returns whether to check files for changes on access
+    """
+    
+    def __init__(self, folder, reload=lambda: False):
+        self.folder = folder
+        self.reload = reload
+        self._assets = {}
+        self._lock = threading.Lock()
+    
+    def get(self, filename):
+        """
+        Get a static file.
+        
+        Args:
+            filename (str): Path relative to the static folder
+        
+        Returns:
+            StaticAsset: The file, or None if it does not exist
+        """
+        entry = self._assets.get(filename)
+        if entry is not None and not self.reload():
+            return entry[1]
+        
+        path = safe_join(self.folder, filename)
+        if path is None or not os.path.isfile(path):
+            return None
+        
+        mtime_ns = os.stat(path).st_mtime_ns
+        if entry is not None and entry[0] == mtime_ns:
+            return entry[1]
+        
+        with open(path, "rb") as file:
+            body = file.read()
+        mimetype = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+        asset = StaticAsset(body, mimetype, hashlib.sha256(body).hexdigest()[:12], {})
+        with self._lock:
+            self._assets[filename] = (mtime_ns, asset)
+        return asset
+    
+    def digest(self, filename):
+        """Content hash of a static file, or None if it does not exist."""
+        asset = self.get(filename)
+        return asset.digest if asset is not None else None
+    
+    def encoded(self, asset, encoding):
+        """
+        The body of a static file in a content coding, compressed at the
+        highest level the first time it is asked for.
+        """
+        if encoding is None:
+            return asset.body
+        body = asset.compressed.get(encoding)
+        if body is None:
+            body = asset.compressed[encoding] = compress(asset.body, encoding, STATIC_LEVELS[encoding])
+        return body